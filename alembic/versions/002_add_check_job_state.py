@@ -0,0 +1,37 @@
+"""Add job state columns to dns_checks
+
+Revision ID: 002
+Revises: 001
+Create Date: 2025-07-01 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('dns_checks', sa.Column('status', sa.String(length=20), server_default='completed', nullable=False))
+    op.add_column('dns_checks', sa.Column('progress', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('dns_checks', sa.Column('test_id', sa.String(length=64), nullable=True))
+    op.add_column('dns_checks', sa.Column('error', sa.Text(), nullable=True))
+    op.add_column('dns_checks', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+    # Checks created before job mode ran synchronously to completion
+    op.execute("UPDATE dns_checks SET progress = 100, completed_at = created_at")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('dns_checks') as batch_op:
+        batch_op.drop_column('completed_at')
+        batch_op.drop_column('error')
+        batch_op.drop_column('test_id')
+        batch_op.drop_column('progress')
+        batch_op.drop_column('status')
@@ -0,0 +1,41 @@
+"""Create check batches table
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-07-02 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('check_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('current_timestamp'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_check_batches_id'), 'check_batches', ['id'], unique=False)
+    with op.batch_alter_table('dns_checks') as batch_op:
+        batch_op.add_column(sa.Column('batch_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_dns_checks_batch_id', 'check_batches', ['batch_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index(batch_op.f('ix_dns_checks_batch_id'), ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('dns_checks') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_dns_checks_batch_id'))
+        batch_op.drop_constraint('fk_dns_checks_batch_id', type_='foreignkey')
+        batch_op.drop_column('batch_id')
+    op.drop_index(op.f('ix_check_batches_id'), table_name='check_batches')
+    op.drop_table('check_batches')
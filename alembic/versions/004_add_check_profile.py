@@ -0,0 +1,27 @@
+"""Add Zonemaster profile to dns_checks
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-07-03 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('dns_checks', sa.Column('profile', sa.String(length=64), server_default='default', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('dns_checks') as batch_op:
+        batch_op.drop_column('profile')
@@ -0,0 +1,25 @@
+"""Add (created_at, id) index for keyset pagination of dns_checks
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-07-04 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_dns_checks_created_at_id', 'dns_checks', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dns_checks_created_at_id', table_name='dns_checks')
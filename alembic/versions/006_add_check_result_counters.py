@@ -0,0 +1,45 @@
+"""Add denormalized result counters to dns_checks
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-07-05 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTED_LEVELS = ('INFO', 'NOTICE', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def upgrade() -> None:
+    op.add_column('dns_checks', sa.Column('results_count', sa.Integer(), server_default='0', nullable=False))
+    for level in COUNTED_LEVELS:
+        op.add_column('dns_checks', sa.Column(f'{level.lower()}_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing result rows
+    level_counts = ", ".join(
+        f"{level.lower()}_count = (SELECT count(*) FROM dns_results r "
+        f"WHERE r.dns_check_id = dns_checks.id AND upper(r.level) = '{level}')"
+        for level in COUNTED_LEVELS
+    )
+    op.execute(
+        "UPDATE dns_checks SET "
+        "results_count = (SELECT count(*) FROM dns_results r WHERE r.dns_check_id = dns_checks.id), "
+        + level_counts
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('dns_checks') as batch_op:
+        for level in reversed(COUNTED_LEVELS):
+            batch_op.drop_column(f'{level.lower()}_count')
+        batch_op.drop_column('results_count')
@@ -0,0 +1,33 @@
+"""Replace single-column dns_results indexes with (dns_check_id, level)
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-07-09 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_dns_results_dns_check_id_level', 'dns_results', ['dns_check_id', 'level'], unique=False)
+    op.drop_index(op.f('ix_dns_results_tag'), table_name='dns_results')
+    op.drop_index(op.f('ix_dns_results_module'), table_name='dns_results')
+    op.drop_index(op.f('ix_dns_results_level'), table_name='dns_results')
+    op.drop_index(op.f('ix_dns_results_dns_check_id'), table_name='dns_results')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_dns_results_dns_check_id'), 'dns_results', ['dns_check_id'], unique=False)
+    op.create_index(op.f('ix_dns_results_level'), 'dns_results', ['level'], unique=False)
+    op.create_index(op.f('ix_dns_results_module'), 'dns_results', ['module'], unique=False)
+    op.create_index(op.f('ix_dns_results_tag'), 'dns_results', ['tag'], unique=False)
+    op.drop_index('ix_dns_results_dns_check_id_level', table_name='dns_results')
@@ -0,0 +1,27 @@
+"""Replace ix_dns_checks_domain with a (domain, created_at) index
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-07-10 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_dns_checks_domain_created_at', 'dns_checks', ['domain', 'created_at'], unique=False)
+    op.drop_index(op.f('ix_dns_checks_domain'), table_name='dns_checks')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_dns_checks_domain'), 'dns_checks', ['domain'], unique=False)
+    op.drop_index('ix_dns_checks_domain_created_at', table_name='dns_checks')
@@ -0,0 +1,37 @@
+"""Create result_rollups statistics table
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-07-11 12:00:00.000000
+
+Existing results are not counted by this migration; backfill with
+`python -m app.commands.rebuild_stats` after upgrading.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('result_rollups',
+    sa.Column('period', sa.String(length=8), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('level', sa.String(length=50), nullable=False),
+    sa.Column('module', sa.String(length=100), nullable=False),
+    sa.Column('tag', sa.String(length=100), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('period', 'bucket_start', 'level', 'module', 'tag')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('result_rollups')
@@ -0,0 +1,41 @@
+"""Add created_at to dns_results
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-07-14 12:00:00.000000
+
+Existing rows take the creation time of their check. The column is the
+partition key for `python -m app.commands.partition_results` on Postgres.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('dns_results', sa.Column('created_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        "UPDATE dns_results SET created_at = "
+        "(SELECT dns_checks.created_at FROM dns_checks WHERE dns_checks.id = dns_results.dns_check_id)"
+    )
+    with op.batch_alter_table('dns_results') as batch_op:
+        batch_op.alter_column(
+            'created_at',
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text('current_timestamp')
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('dns_results') as batch_op:
+        batch_op.drop_column('created_at')
@@ -0,0 +1,39 @@
+"""Add delta storage of results
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-07-15 12:00:00.000000
+
+Checks stored in delta mode keep only the results added or removed since
+base_check_id; existing checks are all full snapshots.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('dns_checks') as batch_op:
+        batch_op.add_column(sa.Column('storage', sa.String(length=8), server_default='full', nullable=False))
+        batch_op.add_column(sa.Column('base_check_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_dns_checks_base_check_id', 'dns_checks', ['base_check_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_dns_checks_base_check_id'), ['base_check_id'], unique=False)
+    op.add_column('dns_results', sa.Column('change', sa.String(length=1), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('dns_results', 'change')
+    with op.batch_alter_table('dns_checks') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_dns_checks_base_check_id'))
+        batch_op.drop_constraint('fk_dns_checks_base_check_id', type_='foreignkey')
+        batch_op.drop_column('base_check_id')
+        batch_op.drop_column('storage')
@@ -0,0 +1,29 @@
+"""Add compressed raw results to dns_checks
+
+Revision ID: 012
+Revises: 011
+Create Date: 2025-07-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('dns_checks', sa.Column('raw_results', sa.LargeBinary(), nullable=True))
+    op.add_column('dns_checks', sa.Column('raw_codec', sa.String(length=8), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('dns_checks') as batch_op:
+        batch_op.drop_column('raw_codec')
+        batch_op.drop_column('raw_results')
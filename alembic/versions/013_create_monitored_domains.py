@@ -0,0 +1,43 @@
+"""Create monitored domains table
+
+Revision ID: 013
+Revises: 012
+Create Date: 2025-07-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('monitored_domains',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('domain', sa.String(length=255), nullable=False),
+    sa.Column('profile', sa.String(length=64), server_default='default', nullable=False),
+    sa.Column('interval_seconds', sa.Integer(), nullable=False),
+    sa.Column('enabled', sa.Boolean(), server_default=sa.true(), nullable=False),
+    sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_check_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('current_timestamp'), nullable=False),
+    sa.ForeignKeyConstraint(['last_check_id'], ['dns_checks.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('domain', 'profile', name='uq_monitored_domains_domain_profile')
+    )
+    op.create_index(op.f('ix_monitored_domains_id'), 'monitored_domains', ['id'], unique=False)
+    op.create_index('ix_monitored_domains_enabled_next_run_at', 'monitored_domains', ['enabled', 'next_run_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_monitored_domains_enabled_next_run_at', table_name='monitored_domains')
+    op.drop_index(op.f('ix_monitored_domains_id'), table_name='monitored_domains')
+    op.drop_table('monitored_domains')
@@ -0,0 +1,46 @@
+"""Create check jobs queue table
+
+Revision ID: 014
+Revises: 013
+Create Date: 2025-07-21 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('check_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('check_id', sa.Integer(), nullable=False),
+    sa.Column('domain', sa.String(length=255), nullable=False),
+    sa.Column('profile', sa.String(length=64), server_default='default', nullable=False),
+    sa.Column('status', sa.String(length=10), server_default='queued', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('current_timestamp'), nullable=False),
+    sa.Column('lease_owner', sa.String(length=64), nullable=True),
+    sa.Column('test_id', sa.String(length=64), nullable=True),
+    sa.Column('backend_url', sa.String(length=512), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('current_timestamp'), nullable=False),
+    sa.ForeignKeyConstraint(['check_id'], ['dns_checks.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('check_id')
+    )
+    op.create_index(op.f('ix_check_jobs_id'), 'check_jobs', ['id'], unique=False)
+    op.create_index('ix_check_jobs_status_available_at', 'check_jobs', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_check_jobs_status_available_at', table_name='check_jobs')
+    op.drop_index(op.f('ix_check_jobs_id'), table_name='check_jobs')
+    op.drop_table('check_jobs')
@@ -0,0 +1,39 @@
+"""Add priority lanes to check jobs
+
+Revision ID: 015
+Revises: 014
+Create Date: 2025-07-22 12:00:00.000000
+
+Workers claim each lane (interactive, batch, background) on its own;
+existing jobs are interactive.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('check_jobs') as batch_op:
+        batch_op.add_column(sa.Column('priority', sa.String(length=16), server_default='interactive', nullable=False))
+        batch_op.drop_index('ix_check_jobs_status_available_at')
+        batch_op.create_index(
+            'ix_check_jobs_priority_status_available_at',
+            ['priority', 'status', 'available_at'],
+            unique=False
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('check_jobs') as batch_op:
+        batch_op.drop_index('ix_check_jobs_priority_status_available_at')
+        batch_op.create_index('ix_check_jobs_status_available_at', ['status', 'available_at'], unique=False)
+        batch_op.drop_column('priority')
@@ -0,0 +1,39 @@
+"""Add result positions
+
+Revision ID: 016
+Revises: 015
+Create Date: 2025-07-23 12:00:00.000000
+
+Results are ordered and paginated by their place in the check, which
+delta storage keeps, instead of by id. Rows of full snapshots are numbered
+in id order; delta rows written before keep NULL and are rebuilt in id
+order as before.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '016'
+down_revision: Union[str, None] = '015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('dns_results', sa.Column('position', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE dns_results SET position = ("
+        "SELECT count(*) FROM dns_results AS earlier "
+        "WHERE earlier.dns_check_id = dns_results.dns_check_id "
+        "AND earlier.change IS NULL AND earlier.id <= dns_results.id"
+        ") WHERE change IS NULL"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('dns_results') as batch_op:
+        batch_op.drop_column('position')
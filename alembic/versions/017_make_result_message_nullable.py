@@ -0,0 +1,32 @@
+"""Make result messages nullable
+
+Revision ID: 017
+Revises: 016
+Create Date: 2025-07-24 12:00:00.000000
+
+Checks stored in indexed mode keep a row per result without its message,
+which is read from the compressed raw results by position.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '017'
+down_revision: Union[str, None] = '016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('dns_results') as batch_op:
+        batch_op.alter_column('message', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("UPDATE dns_results SET message = '' WHERE message IS NULL")
+    with op.batch_alter_table('dns_results') as batch_op:
+        batch_op.alter_column('message', existing_type=sa.Text(), nullable=False)
@@ -0,0 +1,39 @@
+import secrets
+from typing import Optional
+from fastapi import HTTPException, Request, status
+from app.core.config import settings
+from app.services.admission import AdmissionRejected
+from app.services.zonemaster_service import zonemaster_service
+
+def client_key(request: Request) -> str:
+    """Identify the caller by API key when one is sent, else by client address"""
+    api_key = request.headers.get("X-API-Key")
+    if api_key:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+async def rate_limit(request: Request) -> None:
+    """Per-client token bucket on check submissions (RATE_LIMIT_PER_MINUTE)"""
+    limiter = zonemaster_service.rate_limiter
+    if not limiter.enabled:
+        return
+    try:
+        limiter.acquire(client_key(request))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(settings.PROFILING_ADMIN_TOKEN) and token is not None and secrets.compare_digest(
+        token.encode(), settings.PROFILING_ADMIN_TOKEN.encode()
+    )
+
+async def require_profiling_admin(request: Request) -> None:
+    """X-Admin-Token must match PROFILING_ADMIN_TOKEN; the endpoints do not exist while profiling is off"""
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_token(request.headers.get("X-Admin-Token")):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
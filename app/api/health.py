@@ -1,7 +1,33 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Header
+from app.api.deps import is_admin_token
+from app.services.monitoring import monitoring_scheduler
+from app.services.retention import retention_service
+from app.services.zonemaster_service import zonemaster_service
 
 router = APIRouter()
 
+# Backend stats only sent with the admin token: internal URLs and raw error text
+PRIVATE_BACKEND_FIELDS = ("url", "last_error")
+
 @router.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "zonemaster-api"}
+
+@router.get("/health/stats")
+async def health_stats(x_admin_token: Optional[str] = Header(None)):
+    """In-process runtime counters; backend URLs and errors need X-Admin-Token"""
+    backends = zonemaster_service.backends.stats()
+    if not is_admin_token(x_admin_token):
+        backends = [
+            {key: value for key, value in backend.items() if key not in PRIVATE_BACKEND_FIELDS}
+            for backend in backends
+        ]
+    return {
+        "cache": zonemaster_service.cache.stats(),
+        "backends": backends,
+        "admission": zonemaster_service.admission.stats(),
+        "rate_limit": zonemaster_service.rate_limiter.stats(),
+        "retention": retention_service.last_run,
+        "monitoring": monitoring_scheduler.stats()
+    }
@@ -0,0 +1,41 @@
+import hashlib
+from typing import Any, Optional
+from app.core.config import settings
+from app.models.dns_check import CheckStatus
+
+FINISHED_STATUSES = (CheckStatus.COMPLETED.value, CheckStatus.FAILED.value)
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the values that identify a representation"""
+    fingerprint = "|".join(str(part) for part in parts)
+    return f'"{hashlib.sha256(fingerprint.encode()).hexdigest()[:32]}"'
+
+def check_etag(state: Any, variant: str = "") -> str:
+    """
+    ETag of a check from its state row (id, status, progress, completed_at,
+    storage); `variant` tells representations of the same check apart
+    """
+    return make_etag(state.id, state.status, state.progress, state.completed_at, state.storage, variant)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 asks)"""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def check_cache_control(status: str) -> str:
+    """
+    A finished check may be cached briefly but is not immutable: a delta
+    check is rewritten in full when its base is deleted, and retention
+    deletes it, which revalidation against the ETag picks up. A queued or
+    running one must always be revalidated.
+    """
+    if status in FINISHED_STATUSES and settings.HTTP_CACHE_MAX_AGE_FINISHED > 0:
+        return f"public, max-age={settings.HTTP_CACHE_MAX_AGE_FINISHED}"
+    return "no-cache"
+
+def listing_cache_control() -> str:
+    if settings.HTTP_CACHE_MAX_AGE_LIST > 0:
+        return f"public, max-age={settings.HTTP_CACHE_MAX_AGE_LIST}"
+    return "no-cache"
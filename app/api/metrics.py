@@ -0,0 +1,65 @@
+import time
+from fastapi import APIRouter, HTTPException
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core import metrics
+from app.core.config import settings
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+class MetricsMiddleware:
+    """
+    Records latency, database statements and database time of every HTTP
+    request, labelled by route template so path parameters do not create
+    new series. Unmatched paths share one "unmatched" label.
+
+    A request is measured up to the last body chunk of its response:
+    background tasks run afterwards inside the same ASGI call and are not
+    counted against it.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        recorded = False
+        queries = metrics.QueryStats()
+
+        def record() -> None:
+            nonlocal recorded
+            recorded = True
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            path = getattr(route, "path_format", None) or "unmatched"
+            metrics.http_request_duration.observe(elapsed, scope["method"], path, str(status))
+            metrics.db_request_statements.observe(queries.statements, path)
+            metrics.db_request_duration.observe(queries.seconds, path)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not recorded:
+                record()
+                # Statements of background tasks are not the request's
+                metrics.request_queries.set(None)
+
+        token = metrics.request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.request_queries.reset(token)
+            if not recorded:
+                record()
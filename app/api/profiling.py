@@ -0,0 +1,96 @@
+import asyncio
+import functools
+import logging
+import time
+from typing import Callable, Optional
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.api.deps import is_admin_token
+from app.core import profiling
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+profile_store = profiling.ProfileStore(settings.PROFILING_MAX_PROFILES)
+
+class ProfiledRoute(APIRoute):
+    """Notes when the endpoint function returns, so Server-Timing can tell serialization apart"""
+
+    def get_route_handler(self) -> Callable:
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def timed_endpoint(*args, **kwargs):
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    profiling.mark_endpoint_done()
+            self.dependant.call = timed_endpoint
+        return super().get_route_handler()
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that carry `X-Profile` (cprofile, sampling, or any
+    other value for the best available profiler) and a valid
+    `X-Admin-Token`, adding Server-Timing and X-Profile-Id to the response.
+    Everything else passes straight through.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        requested = headers.get("x-profile")
+        if requested is None or not is_admin_token(headers.get("x-admin-token")):
+            await self.app(scope, receive, send)
+            return
+
+        profiler: Optional[profiling.RequestProfiler] = None
+        if not profile_store.active:
+            profile_store.active = True
+            profiler = profiling.RequestProfiler(
+                profiling.choose_profiler(requested),
+                settings.PROFILING_SAMPLE_INTERVAL
+            )
+        timings = profiling.RequestTimings()
+        status: Optional[int] = None
+        server_timing = ""
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, server_timing
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                server_timing = timings.server_timing(time.perf_counter())
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append("Server-Timing", server_timing)
+                if profiler is not None:
+                    response_headers["X-Profile-Id"] = profiler.id
+            await send(message)
+
+        if profiler is not None:
+            try:
+                profiler.start()
+            except ValueError as e:
+                # e.g. a debugger or coverage already holds the profiling hook
+                logger.warning("Could not start %s profiler: %s", profiler.kind, e)
+                profile_store.active = False
+                profiler = None
+
+        token = profiling.current_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiling.current_timings.reset(token)
+            if profiler is not None:
+                stored = profiler.stop()
+                profile_store.active = False
+                stored.method = scope["method"]
+                stored.path = scope["path"]
+                stored.status = status
+                stored.duration = time.perf_counter() - timings.started
+                stored.server_timing = server_timing
+                profile_store.add(stored)
@@ -1,8 +1,14 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import dns_check
+from app.api.v1.endpoints import check_batch, dns_check, domains, export, monitored_domains, profiles, stats
 from app.api import health
 
 api_router = APIRouter()
 
 api_router.include_router(health.router, tags=["health"])
-api_router.include_router(dns_check.router, prefix="/checks", tags=["dns-checks"])
\ No newline at end of file
+api_router.include_router(check_batch.router, prefix="/checks/batch", tags=["dns-checks"])
+api_router.include_router(export.router, prefix="/checks/export", tags=["dns-checks"])
+api_router.include_router(dns_check.router, prefix="/checks", tags=["dns-checks"])
+api_router.include_router(domains.router, prefix="/domains", tags=["domains"])
+api_router.include_router(monitored_domains.router, prefix="/monitored-domains", tags=["monitoring"])
+api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
+api_router.include_router(profiles.router, prefix="/admin/profiles", tags=["admin"])
\ No newline at end of file
@@ -0,0 +1,152 @@
+from typing import Iterable, List
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Response, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.api.deps import rate_limit
+from app.core.config import settings
+from app.db import get_db, get_session_factory
+from app.schemas.dns_check import normalize_domain
+from app.schemas.check_batch import (
+    DNSCheckBatchCreate,
+    DNSCheckBatchItem,
+    DNSCheckBatchResponse
+)
+from app.crud.check_batch import check_batch_crud
+from app.models.check_batch import CheckBatch
+from app.models.dns_check import CheckStatus
+from app.services.zonemaster_service import zonemaster_service
+
+router = APIRouter()
+
+def _clean_domains(domains: Iterable[str]) -> List[str]:
+    """Normalize, drop blanks and duplicates (keeping order) and enforce limits"""
+    cleaned = list(dict.fromkeys(normalize_domain(d) for d in domains if d and normalize_domain(d)))
+    if not cleaned:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="No domains provided"
+        )
+    if len(cleaned) > settings.BATCH_MAX_DOMAINS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A batch accepts at most {settings.BATCH_MAX_DOMAINS} domains"
+        )
+    too_long = [d for d in cleaned if len(d) > 255]
+    if too_long:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Domain too long: {too_long[0][:64]}..."
+        )
+    return cleaned
+
+def _build_response(batch: CheckBatch, checks: List[dict]) -> DNSCheckBatchResponse:
+    counts = {s.value: 0 for s in CheckStatus}
+    for check in checks:
+        counts[check["status"]] = counts.get(check["status"], 0) + 1
+    finished = counts[CheckStatus.COMPLETED.value] + counts[CheckStatus.FAILED.value]
+    total = len(checks)
+    if finished == total:
+        batch_status = CheckStatus.COMPLETED.value
+    elif finished or counts[CheckStatus.RUNNING.value]:
+        batch_status = CheckStatus.RUNNING.value
+    else:
+        batch_status = CheckStatus.QUEUED.value
+    return DNSCheckBatchResponse(
+        id=batch.id,
+        created_at=batch.created_at,
+        status=batch_status,
+        total=total,
+        queued=counts[CheckStatus.QUEUED.value],
+        running=counts[CheckStatus.RUNNING.value],
+        completed=counts[CheckStatus.COMPLETED.value],
+        failed=counts[CheckStatus.FAILED.value],
+        progress=finished * 100 // total if total else 100,
+        checks=[DNSCheckBatchItem(**check) for check in checks]
+    )
+
+async def _start_batch(
+    domains: List[str],
+    background_tasks: BackgroundTasks,
+    response: Response,
+    db: AsyncSession,
+    session_factory: async_sessionmaker
+) -> DNSCheckBatchResponse:
+    batch, checks = await check_batch_crud.create(db, domains, queue_jobs=settings.uses_worker_queue)
+    if not settings.uses_worker_queue:
+        background_tasks.add_task(zonemaster_service.run_batch, session_factory, checks)
+    response.headers["Location"] = f"{settings.API_V1_STR}/checks/batch/{batch.id}"
+    return _build_response(
+        batch,
+        [
+            {"id": check_id, "domain": domain, "status": CheckStatus.QUEUED.value, "error": None}
+            for check_id, domain in checks
+        ]
+    )
+
+@router.post(
+    "",
+    response_model=DNSCheckBatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit)]
+)
+async def create_dns_check_batch(
+    batch_in: DNSCheckBatchCreate,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """
+    Queue DNS checks for a list of domains.
+    
+    Domains are checked in the background with at most BATCH_CONCURRENCY
+    Zonemaster tests in flight. Poll `GET /checks/batch/{batch_id}` for
+    per-domain status and aggregate progress.
+    """
+    domains = _clean_domains(batch_in.domains)
+    return await _start_batch(domains, background_tasks, response, db, session_factory)
+
+@router.post(
+    "/upload",
+    response_model=DNSCheckBatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit)]
+)
+async def upload_dns_check_batch(
+    background_tasks: BackgroundTasks,
+    response: Response,
+    file: UploadFile = File(..., description="Text or CSV file with one domain per line"),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """
+    Queue DNS checks for the domains listed in an uploaded file.
+    
+    Lines starting with `#` are ignored; for CSV input the first column is used.
+    """
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Uploaded file must be UTF-8 text"
+        )
+    lines = (line.split(",", 1)[0] for line in content.splitlines() if not line.lstrip().startswith("#"))
+    domains = _clean_domains(lines)
+    return await _start_batch(domains, background_tasks, response, db, session_factory)
+
+@router.get("/{batch_id}", response_model=DNSCheckBatchResponse)
+async def get_dns_check_batch(
+    batch_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a batch with per-domain status and aggregate progress.
+    """
+    batch = await check_batch_crud.get(db, batch_id)
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="DNS check batch not found"
+        )
+    checks = await check_batch_crud.get_checks(db, batch_id)
+    return _build_response(batch, checks)
@@ -1,20 +1,45 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.db import get_db
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import urlencode
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.api.deps import rate_limit
+from app.api.profiling import ProfiledRoute
+from app.api.http_cache import check_cache_control, check_etag, etag_matches, listing_cache_control
+from app.core.config import settings
+from app.core.pagination import decode_datetime_id_cursor, decode_id_cursor, encode_cursor
+from app.db import get_db, get_session_factory
 from app.schemas.dns_check import (
     DNSCheckCreate, 
     DNSCheckResponse, 
-    DNSCheckListResponse
+    DNSCheckJobResponse,
+    DNSCheckListResponse,
+    DNSResultResponse,
+    normalize_domain
 )
-from app.crud.dns_check import dns_check_crud
+from app.core.fast_json import FastJSONResponse
+from app.crud.dns_check import dns_check_crud, result_values
+from app.crud.dns_result import dns_result_crud
+from app.models.dns_result import RESULT_LEVELS, levels_at_or_above
+from app.services.admission import AdmissionRejected
 from app.services.zonemaster_service import zonemaster_service
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
-@router.post("/", response_model=DNSCheckResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=DNSCheckResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit)]
+)
 async def create_dns_check(
     dns_check: DNSCheckCreate,
+    max_age: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Return the latest completed check of this domain and profile "
+                    "if it is at most this many seconds old (0 forces a new run)"
+    ),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -27,34 +52,205 @@ async def create_dns_check(
     4. Return the complete check with results
     """
     try:
-        result = await zonemaster_service.run_check_and_save(db, dns_check.domain)
+        result = await zonemaster_service.run_check_and_save(
+            db,
+            dns_check.domain,
+            profile=dns_check.profile,
+            max_age=max_age
+        )
         return result
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Zonemaster is busy: {str(e)}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"DNS check failed: {str(e)}"
         )
 
+@router.post(
+    "/jobs",
+    response_model=DNSCheckJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit)]
+)
+async def create_dns_check_job(
+    dns_check: DNSCheckCreate,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """
+    Queue a DNS check and return immediately.
+    
+    The check is recorded as `queued` and a background task, or with
+    CHECK_QUEUE=worker a worker process, drives the Zonemaster test
+    (start_domain_test -> test_progress -> get_test_results), updating
+    status, progress and results as they come in. Poll
+    `GET /checks/{check_id}` for the outcome.
+    """
+    queued = await zonemaster_service.enqueue_check(db, dns_check)
+    if not settings.uses_worker_queue:
+        background_tasks.add_task(
+            zonemaster_service.run_check_job,
+            session_factory,
+            queued.id,
+            queued.domain,
+            queued.profile
+        )
+    response.headers["Location"] = f"{settings.API_V1_STR}/checks/{queued.id}"
+    return DNSCheckJobResponse.model_validate(queued)
+
 @router.get("/{check_id}", response_model=DNSCheckResponse)
 async def get_dns_check(
     check_id: int,
+    response: Response,
+    include_results: bool = Query(
+        True,
+        description="Set to false to return only the check and its counts; "
+                    "page through results with GET /checks/{check_id}/results"
+    ),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific DNS check by ID, including all its results.
+    
+    The `ETag` follows the check's status and progress, so `If-None-Match`
+    answers 304 without reading any results. Finished checks never change
+    and are served with a long-lived `Cache-Control`.
     """
-    dns_check = await dns_check_crud.get(db, check_id)
+    state = await dns_check_crud.get_state(db, check_id)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="DNS check not found"
+        )
+    headers = {
+        "ETag": check_etag(state, "full" if include_results else "summary"),
+        "Cache-Control": check_cache_control(state.status)
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    if settings.FAST_JSON_RESPONSES:
+        detail = await dns_check_crud.get_detail(db, check_id, with_results=include_results)
+        if detail is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="DNS check not found"
+            )
+        return FastJSONResponse(detail, headers=headers)
+    
+    dns_check = await dns_check_crud.get(db, check_id, with_results=include_results)
     if not dns_check:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="DNS check not found"
         )
+    response.headers.update(headers)
     return DNSCheckResponse.model_validate(dns_check)
 
+@router.get("/{check_id}/results", response_model=List[DNSResultResponse])
+async def list_dns_check_results(
+    check_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    level: Optional[List[str]] = Query(None, description="Only results of these levels (repeatable)"),
+    min_level: Optional[str] = Query(None, description="Only results at least this severe, e.g. WARNING"),
+    module: Optional[str] = Query(None, description="Only results of this Zonemaster module"),
+    tag: Optional[str] = Query(None, description="Only results with this message tag"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the results of one check, filtered and paginated by the database.
+    
+    Results are in Zonemaster order. Filter by exact `level` (repeatable) or by
+    `min_level` for everything at least that severe, and by `module` and
+    `tag`. When a page is full, the cursor for the next page is returned in
+    `X-Next-Cursor` (and a `Link` header with rel="next"). Pages carry an
+    `ETag` and `Cache-Control` like the check itself.
+    """
+    if level and min_level:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either level or min_level, not both"
+        )
+    levels = [value.upper() for value in level] if level else None
+    if min_level is not None:
+        levels = [min_level.upper()]
+    if levels and any(value not in RESULT_LEVELS for value in levels):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Levels must be among {', '.join(RESULT_LEVELS)}"
+        )
+    if min_level is not None:
+        levels = levels_at_or_above(min_level)
+    
+    after_position = None
+    if cursor is not None:
+        try:
+            after_position = decode_id_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    state = await dns_check_crud.get_state(db, check_id)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="DNS check not found"
+        )
+    variant = [limit, cursor, levels, module, tag]
+    headers = {"ETag": check_etag(state, repr(variant)), "Cache-Control": check_cache_control(state.status)}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    
+    results = await dns_result_crud.get_multi_for_check(
+        db,
+        check_id,
+        limit=limit,
+        after_position=after_position,
+        levels=levels,
+        module=module,
+        tag=tag,
+        storage=state.storage
+    )
+    if len(results) == limit:
+        next_cursor = encode_cursor([results[-1].position])
+        response.headers["X-Next-Cursor"] = next_cursor
+        params = [("cursor", next_cursor), ("limit", limit)]
+        params += [("level", value) for value in level or []]
+        params += [
+            (name, value)
+            for name, value in (("min_level", min_level), ("module", module), ("tag", tag))
+            if value is not None
+        ]
+        response.headers["Link"] = (
+            f'<{settings.API_V1_STR}/checks/{check_id}/results?{urlencode(params)}>; rel="next"'
+        )
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse([result_values(result) for result in results], headers=response.headers)
+    return [DNSResultResponse.model_validate(result) for result in results]
+
 @router.get("/", response_model=List[DNSCheckListResponse])
 async def list_dns_checks(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Offset paging (kept for compatibility)"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    domain: Optional[str] = Query(None, description="Only checks of this domain"),
+    created_after: Optional[datetime] = Query(None, description="Only checks created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only checks created before this time"),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -62,6 +258,52 @@ async def list_dns_checks(
     
     This endpoint returns a summary view of checks without the full results
     to improve performance when listing many checks.
+    
+    Pages are ordered newest first. When a page is full, the opaque cursor for
+    the next page is returned in the `X-Next-Cursor` header (and a `Link`
+    header with rel="next"); pass it back as `cursor` to seek past the last
+    row instead of using `skip`, which stays stable while new checks arrive.
+    Listings may be cached briefly (HTTP_CACHE_MAX_AGE_LIST).
     """
-    checks = await dns_check_crud.get_multi_with_count(db, skip=skip, limit=limit)
-    return [DNSCheckListResponse(**check) for check in checks]
\ No newline at end of file
+    after = None
+    if cursor is not None:
+        if skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either cursor or skip, not both"
+            )
+        try:
+            after = decode_datetime_id_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    checks = await dns_check_crud.get_multi_with_count(
+        db,
+        skip=skip,
+        limit=limit,
+        after=after,
+        domain=normalize_domain(domain) if domain else None,
+        created_after=created_after,
+        created_before=created_before
+    )
+    if len(checks) == limit:
+        last = checks[-1]
+        next_cursor = encode_cursor([last["created_at"], last["id"]])
+        response.headers["X-Next-Cursor"] = next_cursor
+        params = {
+            "cursor": next_cursor,
+            "limit": limit,
+            "domain": domain,
+            "created_after": created_after.isoformat() if created_after else None,
+            "created_before": created_before.isoformat() if created_before else None
+        }
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        response.headers["Link"] = f'<{settings.API_V1_STR}/checks/?{query}>; rel="next"'
+    response.headers["Cache-Control"] = listing_cache_control()
+    if settings.FAST_JSON_RESPONSES:
+        # Rows carry exactly the DNSCheckListResponse fields, in order
+        return FastJSONResponse(checks, headers=response.headers)
+    return [DNSCheckListResponse(**check) for check in checks]
@@ -0,0 +1,87 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from urllib.parse import quote, urlencode
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.pagination import decode_datetime_id_cursor, encode_cursor
+from app.db import get_db
+from app.schemas.dns_check import DNSCheckListResponse, normalize_domain
+from app.schemas.domain_history import DomainHistoryResponse, DomainTrendBucket
+from app.crud.dns_check import dns_check_crud
+
+router = APIRouter()
+
+class TrendInterval(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+
+@router.get("/{domain}/history", response_model=DomainHistoryResponse)
+async def get_domain_history(
+    domain: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    created_after: Optional[datetime] = Query(None, description="Only checks created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only checks created before this time"),
+    trend: Optional[TrendInterval] = Query(None, description="Add daily or weekly totals of completed checks"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the checks of one domain, oldest first, with their severity counts.
+    
+    Only the check rows are read (counts are stored with each check), never
+    the individual results. With `trend`, warning/error/critical totals per
+    UTC day or week over the whole `created_after`/`created_before` window are
+    added, aggregated by the database. When a page is full, the cursor for
+    the next page is returned in `X-Next-Cursor` (and a `Link` header).
+    """
+    domain = normalize_domain(domain)
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_datetime_id_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    checks = await dns_check_crud.get_domain_history(
+        db,
+        domain,
+        limit=limit,
+        after=after,
+        created_after=created_after,
+        created_before=created_before
+    )
+    if len(checks) == limit:
+        last = checks[-1]
+        next_cursor = encode_cursor([last["created_at"], last["id"]])
+        response.headers["X-Next-Cursor"] = next_cursor
+        params = {
+            "cursor": next_cursor,
+            "limit": limit,
+            "created_after": created_after.isoformat() if created_after else None,
+            "created_before": created_before.isoformat() if created_before else None
+        }
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        response.headers["Link"] = (
+            f'<{settings.API_V1_STR}/domains/{quote(domain, safe="")}/history?{query}>; rel="next"'
+        )
+    
+    buckets = None
+    if trend is not None:
+        buckets = await dns_check_crud.get_domain_trend(
+            db,
+            domain,
+            trend.value,
+            created_after=created_after,
+            created_before=created_before
+        )
+    return DomainHistoryResponse(
+        domain=domain,
+        checks=[DNSCheckListResponse(**check) for check in checks],
+        trend=[DomainTrendBucket(**bucket) for bucket in buckets] if buckets is not None else None
+    )
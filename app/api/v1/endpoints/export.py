@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row, Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.api.http_cache import etag_matches, make_etag
+from app.core.config import settings
+from app.db import get_db, get_session_factory
+from app.crud import result_storage
+from app.crud.dns_check import dns_check_crud
+from app.crud.dns_result import dns_result_crud
+from app.models.dns_result import RESULT_LEVELS, levels_at_or_above
+from app.schemas.dns_check import normalize_domain
+
+router = APIRouter()
+
+EXPORT_COLUMNS = ["check_id", "domain", "profile", "created_at", "result_id", "level", "module", "tag", "message"]
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+def _row_values(row: tuple) -> list:
+    values = list(row)
+    values[3] = values[3].isoformat()
+    return values
+
+def _encode_ndjson(rows: List[tuple]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, _row_values(row))), separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+def _encode_csv(rows: List[tuple], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(_row_values(row) for row in rows)
+    return buffer.getvalue()
+
+async def _expand_rows(db: AsyncSession, rows: List[Row], levels: Optional[List[str]]) -> List[tuple]:
+    """Export rows with each check not stored as plain rows replaced by its rebuilt results"""
+    expanded = []
+    for row in rows:
+        if row.result_id is not None:
+            expanded.append(tuple(row)[:len(EXPORT_COLUMNS)])
+            continue
+        results = await result_storage.load_results(db, row.check_id, row.storage)
+        expanded.extend(
+            (row.check_id, row.domain, row.profile, row.created_at,
+             result.id, result.level, result.module, result.tag, result.message)
+            for result in results
+            if levels is None or result.level in levels
+        )
+    return expanded
+
+async def _stream_export(
+    session_factory: async_sessionmaker,
+    stmt: Select,
+    export_format: ExportFormat,
+    min_level: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Stream rows through a server-side cursor in EXPORT_BATCH_SIZE partitions,
+    so memory stays constant whatever the size of the export. Uses its own
+    sessions since the request session is closed before the body is sent;
+    delta and raw-stored checks are rebuilt on a second one while the cursor
+    is open.
+    """
+    levels = levels_at_or_above(min_level) if min_level is not None else None
+    if export_format == ExportFormat.CSV:
+        yield _encode_csv([], header=True)
+    async with session_factory() as db, session_factory() as lookup_db:
+        result = await db.stream(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            rows = await _expand_rows(lookup_db, rows, levels)
+            if export_format == ExportFormat.CSV:
+                yield _encode_csv(rows)
+            else:
+                yield _encode_ndjson(rows)
+
+@router.get("", response_class=StreamingResponse)
+async def export_dns_checks(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    after_id: int = Query(0, ge=0, description="Resume after this check id (a previous X-Export-Watermark)"),
+    domain: Optional[str] = Query(None, description="Only checks of this domain"),
+    created_after: Optional[datetime] = Query(None, description="Only checks created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only checks created before this time"),
+    min_level: Optional[str] = Query(None, description="Only results at least this severe, e.g. WARNING"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """
+    Stream results of completed checks as NDJSON or CSV, one row per result.
+
+    The export covers checks with ids in (after_id, watermark], ordered by
+    check id. The watermark is returned in `X-Export-Watermark`; pass it as
+    `after_id` next time to fetch only what is new. The `ETag` identifies the
+    filters and watermark, so `If-None-Match` answers 304 when nothing changed.
+    """
+    if min_level is not None and min_level.upper() not in RESULT_LEVELS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"min_level must be one of {', '.join(RESULT_LEVELS)}"
+        )
+    domain = normalize_domain(domain) if domain else None
+
+    watermark = await dns_check_crud.get_export_watermark(
+        db,
+        after_id=after_id,
+        domain=domain,
+        created_after=created_after,
+        created_before=created_before
+    )
+    etag = make_etag(export_format.value, after_id, watermark, domain, created_after, created_before, min_level)
+    headers = {"ETag": etag, "X-Export-Watermark": str(watermark)}
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    stmt = dns_result_crud.export_query(
+        watermark,
+        after_id=after_id,
+        domain=domain,
+        created_after=created_after,
+        created_before=created_before,
+        min_level=min_level
+    )
+    headers["Content-Disposition"] = f'attachment; filename="dns-checks-{after_id}-{watermark}.{export_format.value}"'
+    return StreamingResponse(
+        _stream_export(session_factory, stmt, export_format, min_level),
+        media_type=MEDIA_TYPES[export_format],
+        headers=headers
+    )
@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.monitored_domain import monitored_domain_crud
+from app.db import get_db
+from app.models.monitored_domain import MonitoredDomain
+from app.schemas.dns_check import normalize_domain
+from app.schemas.monitored_domain import (
+    MonitoredDomainBulkCreate,
+    MonitoredDomainBulkResponse,
+    MonitoredDomainCreate,
+    MonitoredDomainResponse,
+    MonitoredDomainUpdate
+)
+
+router = APIRouter()
+
+async def _get_or_404(db: AsyncSession, monitored_id: int) -> MonitoredDomain:
+    monitored = await monitored_domain_crud.get(db, monitored_id)
+    if monitored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Monitored domain not found"
+        )
+    return monitored
+
+@router.post("", response_model=MonitoredDomainResponse, status_code=status.HTTP_201_CREATED)
+async def create_monitored_domain(
+    monitored_in: MonitoredDomainCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Re-check a domain every `interval_seconds`.
+
+    The first run is placed at a random point within the first interval, so
+    domains added together are spread out rather than checked at once.
+    """
+    try:
+        return await monitored_domain_crud.create(
+            db,
+            monitored_in.domain,
+            monitored_in.profile,
+            monitored_in.interval_seconds,
+            datetime.now(timezone.utc)
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Domain is already monitored with this profile"
+        )
+
+@router.post("/bulk", response_model=MonitoredDomainBulkResponse, status_code=status.HTTP_201_CREATED)
+async def create_monitored_domains(
+    monitored_in: MonitoredDomainBulkCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Monitor many domains with one interval and profile; already monitored ones are skipped"""
+    domains = list(dict.fromkeys(d for d in map(normalize_domain, monitored_in.domains) if d))
+    too_long = [d for d in domains if len(d) > 255]
+    if not domains or too_long:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Domain too long: {too_long[0][:64]}..." if too_long else "No domains provided"
+        )
+    added = await monitored_domain_crud.create_many(
+        db,
+        domains,
+        monitored_in.profile,
+        monitored_in.interval_seconds,
+        datetime.now(timezone.utc)
+    )
+    return MonitoredDomainBulkResponse(added=added, skipped=len(domains) - added)
+
+@router.get("", response_model=List[MonitoredDomainResponse])
+async def list_monitored_domains(
+    limit: int = Query(100, ge=1, le=1000),
+    after_id: Optional[int] = Query(None, description="Id of the last domain of the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """List monitored domains in id order"""
+    return await monitored_domain_crud.get_multi(db, limit=limit, after_id=after_id)
+
+@router.get("/{monitored_id}", response_model=MonitoredDomainResponse)
+async def get_monitored_domain(
+    monitored_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    return await _get_or_404(db, monitored_id)
+
+@router.patch("/{monitored_id}", response_model=MonitoredDomainResponse)
+async def update_monitored_domain(
+    monitored_id: int,
+    monitored_in: MonitoredDomainUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Change the interval (rescheduling the next run within it) or pause and resume checks"""
+    monitored = await _get_or_404(db, monitored_id)
+    return await monitored_domain_crud.update(
+        db,
+        monitored,
+        datetime.now(timezone.utc),
+        **monitored_in.model_dump(exclude_none=True)
+    )
+
+@router.delete("/{monitored_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_monitored_domain(
+    monitored_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Stop monitoring a domain; its past checks are kept"""
+    if not await monitored_domain_crud.delete(db, monitored_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Monitored domain not found"
+        )
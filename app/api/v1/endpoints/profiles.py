@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response
+from app.api.deps import require_profiling_admin
+from app.api.profiling import profile_store
+
+router = APIRouter(dependencies=[Depends(require_profiling_admin)])
+
+@router.get("")
+async def list_profiles():
+    """Profiles of requests sent with X-Profile, newest first"""
+    return {"profiles": [profile.summary() for profile in profile_store.recent()]}
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query(
+        "raw",
+        pattern="^(raw|text)$",
+        description="raw: pstats dump (cProfile) or HTML (sampling); text: readable summary"
+    )
+):
+    """Download a stored profile"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    if format == "text":
+        return PlainTextResponse(profile.text)
+    return Response(
+        profile.data,
+        media_type=profile.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{profile.filename}"'}
+    )
+
+@router.delete("", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_profiles():
+    profile_store.clear()
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_db
+from app.schemas.stats import StatsBucket, StatsResponse
+from app.crud.result_rollup import ROLLUP_DIMENSIONS, result_rollup_crud
+
+router = APIRouter()
+
+# Window returned when `since` is not given
+DEFAULT_WINDOWS = {"hour": timedelta(hours=48), "day": timedelta(days=30)}
+
+class StatsPeriod(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+
+@router.get("", response_model=StatsResponse)
+async def get_stats(
+    period: StatsPeriod = Query(StatsPeriod.DAY, description="Bucket size"),
+    since: Optional[datetime] = Query(None, description="Start of the window (default: 48 hours or 30 days ago)"),
+    until: Optional[datetime] = Query(None, description="End of the window, exclusive (default: now)"),
+    group_by: List[str] = Query(["level"], description="Dimensions to break counts down by: level, module, tag"),
+    level: Optional[str] = Query(None, description="Only results of this level"),
+    module: Optional[str] = Query(None, description="Only results of this Zonemaster module"),
+    tag: Optional[str] = Query(None, description="Only results with this message tag"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Result counts per hour or day, broken down by level, module and/or tag.
+    
+    Counts come from the result_rollups table, which is updated as checks
+    are saved, so the cost depends on the window asked for and not on how
+    many results are stored. Buckets are UTC and keyed by check completion.
+    """
+    unknown = [name for name in group_by if name not in ROLLUP_DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"group_by accepts {', '.join(ROLLUP_DIMENSIONS)}"
+        )
+    group_by = [name for name in ROLLUP_DIMENSIONS if name in group_by]
+    until = until or datetime.now(timezone.utc)
+    since = since or until - DEFAULT_WINDOWS[period.value]
+    
+    buckets = await result_rollup_crud.get_stats(
+        db,
+        period.value,
+        since,
+        until,
+        group_by,
+        level=level.upper() if level else None,
+        module=module,
+        tag=tag
+    )
+    return StatsResponse(
+        period=period.value,
+        since=since,
+        until=until,
+        group_by=group_by,
+        buckets=[StatsBucket(**bucket) for bucket in buckets]
+    )
@@ -0,0 +1,38 @@
+"""
+Convert dns_results into a table partitioned by month (Postgres only).
+
+Usage:
+    uv run python -m app.commands.partition_results
+
+Existing rows are copied into monthly partitions in one transaction, which
+locks dns_results until it commits, so run it in a maintenance window. From
+then on the retention job creates upcoming partitions and drops expired
+ones (see RETENTION_DAYS and RESULTS_PARTITION_MONTHS_AHEAD).
+"""
+import argparse
+import asyncio
+import sys
+from app.core.config import settings
+from app.db import get_session_factory
+from app.db import partitions
+
+async def main() -> int:
+    session_factory = get_session_factory()
+    try:
+        async with session_factory() as db:
+            if db.get_bind().dialect.name != "postgresql":
+                print("Partitioning is only supported on Postgres", file=sys.stderr)
+                return 1
+            if await partitions.is_partitioned(db):
+                print("dns_results is already partitioned")
+                return 0
+            names = await partitions.convert_to_partitioned(db, settings.RESULTS_PARTITION_MONTHS_AHEAD)
+            await db.commit()
+        print(f"Partitioned dns_results into {len(names)} monthly partitions")
+        return 0
+    finally:
+        await session_factory.kw["bind"].dispose()
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    sys.exit(asyncio.run(main()))
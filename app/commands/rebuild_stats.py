@@ -0,0 +1,26 @@
+"""
+Rebuild the result_rollups statistics table from the stored results.
+
+Usage:
+    uv run python -m app.commands.rebuild_stats
+
+Use it to backfill after upgrading, or to repair counts after results were
+changed outside the API. Rollups are rewritten in one transaction.
+"""
+import argparse
+import asyncio
+from app.crud.result_rollup import result_rollup_crud
+from app.db import get_session_factory
+
+async def main() -> None:
+    session_factory = get_session_factory()
+    try:
+        async with session_factory() as db:
+            rows = await result_rollup_crud.rebuild(db)
+        print(f"Rebuilt result_rollups: {rows} rows")
+    finally:
+        await session_factory.kw["bind"].dispose()
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    asyncio.run(main())
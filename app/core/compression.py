@@ -0,0 +1,40 @@
+"""
+Compression of stored payloads. zlib is always available; zstd needs the
+"zstd" extra (zstandard) and falls back to zlib when it is missing.
+"""
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+CODECS = ("zlib", "zstd")
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def resolve_codec(codec: str) -> str:
+    """The codec to write with: `codec` itself, or zlib when zstd is unavailable"""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec: {codec}")
+    if codec == "zstd" and zstandard is None:
+        logger.warning("zstd compression is configured but zstandard is not installed; using zlib")
+        return "zlib"
+    return codec
+
+def compress(data: bytes, codec: str, level: int) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, level)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed data")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown compression codec: {codec}")
@@ -1,5 +1,5 @@
 import secrets
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -14,10 +14,98 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./app.db"
     DATABASE_URL_SYNC: str = "sqlite:///./app.db"
+    RESULTS_INSERT_CHUNK_SIZE: int = 1000  # rows per multi-row INSERT
+    RESULTS_COPY_THRESHOLD: int = 500  # rows from which Postgres uses COPY
+    EXPORT_BATCH_SIZE: int = 1000  # rows fetched per round trip while streaming exports
     
     # Zonemaster API
     ZONEMASTER_API_URL: str = "http://localhost:8080/RPC2"
-    ZONEMASTER_API_TIMEOUT: int = 300  # 5 minutes
+    ZONEMASTER_API_TIMEOUT: int = 300  # 5 minutes (read timeout)
+    ZONEMASTER_CONNECT_TIMEOUT: float = 10.0
+    ZONEMASTER_HTTP_MAX_CONNECTIONS: int = 100
+    ZONEMASTER_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    ZONEMASTER_HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept
+    ZONEMASTER_HTTP2: bool = False  # requires the "http2" extra (h2)
+    ZONEMASTER_POLL_INTERVAL: float = 2.0  # seconds between test_progress calls
+    ZONEMASTER_TEST_TIMEOUT: int = 900  # 15 minutes for a background test to finish
+    ZONEMASTER_API_URLS: str = ""  # comma-separated backends; overrides ZONEMASTER_API_URL when set
+    ZONEMASTER_HEALTH_CHECK_INTERVAL: float = 30.0  # seconds between backend probes; 0 disables them
+    ZONEMASTER_CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures that take a backend out
+    ZONEMASTER_CIRCUIT_RESET_TIMEOUT: float = 30.0  # seconds before a failed backend is tried again
+    
+    # Admission control
+    ZONEMASTER_MAX_CONCURRENT_TESTS: int = 50  # tests in flight across all backends
+    ZONEMASTER_MAX_QUEUED_TESTS: int = 100  # interactive checks allowed to wait for a slot
+    ZONEMASTER_QUEUE_TIMEOUT: float = 30.0  # seconds an interactive check waits before a 503
+    # Priority lanes share the slots above: weights split contended slots between
+    # waiting lanes, and a lane never holds more than its limit (0: all it may use).
+    # Batch and background together never take the reserved interactive slots.
+    ZONEMASTER_INTERACTIVE_RESERVED: int = 10
+    ZONEMASTER_INTERACTIVE_WEIGHT: int = 8
+    ZONEMASTER_BATCH_WEIGHT: int = 2
+    ZONEMASTER_BACKGROUND_WEIGHT: int = 1
+    ZONEMASTER_INTERACTIVE_MAX_CONCURRENT: int = 0
+    ZONEMASTER_BATCH_MAX_CONCURRENT: int = 40
+    ZONEMASTER_BACKGROUND_MAX_CONCURRENT: int = 20
+    RATE_LIMIT_PER_MINUTE: float = 0  # check submissions per client (API key or IP); 0 disables
+    RATE_LIMIT_BURST: int = 10
+    
+    # Result cache
+    CHECK_CACHE_MAX_AGE: int = 0  # default freshness window in seconds; 0 always runs a new check
+    CHECK_CACHE_TTL: int = 3600  # entries older than this are evicted from memory
+    CHECK_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Read endpoints encode rows straight to JSON, skipping pydantic (orjson with the "fastjson" extra)
+    FAST_JSON_RESPONSES: bool = True
+    
+    # HTTP caching
+    HTTP_CACHE_MAX_AGE_FINISHED: int = 300  # Cache-Control max-age of completed/failed checks
+    HTTP_CACHE_MAX_AGE_LIST: int = 5  # Cache-Control max-age of check listings
+    
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
+    
+    # Per-request profiling: send X-Profile with X-Admin-Token (both settings required)
+    PROFILING_ENABLED: bool = False
+    PROFILING_ADMIN_TOKEN: str = ""
+    PROFILING_MAX_PROFILES: int = 20  # profiles kept in memory for /admin/profiles
+    PROFILING_SAMPLE_INTERVAL: float = 0.001  # seconds between samples (requires the "profiling" extra)
+    
+    # Batch checks
+    BATCH_CONCURRENCY: int = 10  # Zonemaster tests in flight per batch
+    BATCH_COMMIT_SIZE: int = 50  # finished checks written per transaction
+    BATCH_MAX_DOMAINS: int = 10000
+    
+    # Check queue: "inline" runs queued checks in the API process; "worker" stores
+    # them in check_jobs for `python -m app.worker` processes to claim
+    CHECK_QUEUE: str = "inline"
+    WORKER_CONCURRENCY: int = 20  # checks in flight per worker process
+    WORKER_CLAIM_BATCH: int = 10  # jobs claimed per round trip
+    WORKER_POLL_INTERVAL: float = 1.0  # seconds between claims when idle or full
+    WORKER_LEASE_SECONDS: float = 60.0  # a job is retried when its worker misses heartbeats this long
+    WORKER_MAX_ATTEMPTS: int = 3  # before the check is marked failed
+    WORKER_RETRY_DELAY: float = 30.0  # seconds before the first retry, doubled for each later one
+    
+    # Scheduled monitoring of monitored_domains
+    MONITOR_ENABLED: bool = False  # run the scheduler in this process (any number of replicas may)
+    MONITOR_POLL_INTERVAL: float = 10.0  # seconds between looks for due domains
+    MONITOR_BATCH_SIZE: int = 100  # due domains claimed per poll at most
+    MONITOR_CONCURRENCY: int = 20  # scheduled checks in flight per process
+    MONITOR_MAX_STARTS_PER_MINUTE: float = 0  # pace check starts per process; 0 only limits concurrency
+    MONITOR_JITTER: float = 0.1  # next run moves by up to +/- this fraction of the interval
+    
+    # Retention
+    RETENTION_DAYS: int = 0  # delete finished checks older than this; 0 keeps everything
+    RETENTION_INTERVAL: float = 3600.0  # seconds between retention runs
+    RETENTION_BATCH_SIZE: int = 1000  # checks deleted per transaction
+    RESULTS_PARTITION_MONTHS_AHEAD: int = 3  # monthly dns_results partitions created in advance (Postgres)
+    
+    # Result storage
+    RESULTS_STORAGE_MODE: str = "full"  # "delta": changes since the domain's previous check; "raw": blob only; "indexed": rows without messages, plus the blob
+    RESULTS_SNAPSHOT_INTERVAL: int = 10  # in delta mode, every Nth check of a domain is stored in full
+    RESULTS_KEEP_RAW: bool = False  # also keep each check's raw Zonemaster results as a compressed blob
+    RESULTS_RAW_CODEC: str = "zlib"  # or "zstd" (requires the "zstd" extra)
+    RESULTS_RAW_LEVEL: int = 6  # compression level of the raw blob
     
     # Environment
     DEBUG: bool = False
@@ -30,6 +118,24 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_EMAIL: str = "admin@zonemaster-api.com"
     FIRST_SUPERUSER_PASSWORD: str = "changeme"
     
+    @property
+    def zonemaster_api_urls(self) -> List[str]:
+        urls = [url.strip() for url in self.ZONEMASTER_API_URLS.split(",") if url.strip()]
+        return urls or [self.ZONEMASTER_API_URL]
+    
+    @property
+    def zonemaster_lanes(self) -> Dict[str, Tuple[int, int]]:
+        """(weight, max concurrent tests) of each priority lane, most urgent first"""
+        return {
+            "interactive": (self.ZONEMASTER_INTERACTIVE_WEIGHT, self.ZONEMASTER_INTERACTIVE_MAX_CONCURRENT),
+            "batch": (self.ZONEMASTER_BATCH_WEIGHT, self.ZONEMASTER_BATCH_MAX_CONCURRENT),
+            "background": (self.ZONEMASTER_BACKGROUND_WEIGHT, self.ZONEMASTER_BACKGROUND_MAX_CONCURRENT)
+        }
+    
+    @property
+    def uses_worker_queue(self) -> bool:
+        return self.CHECK_QUEUE.strip().lower() == "worker"
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
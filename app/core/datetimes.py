@@ -0,0 +1,7 @@
+from datetime import datetime, timezone
+
+def as_utc(moment: datetime) -> datetime:
+    """Aware UTC datetime; naive values are taken to be UTC already"""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
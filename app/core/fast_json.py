@@ -0,0 +1,41 @@
+"""
+JSON encoding for the fast read path (FAST_JSON_RESPONSES): plain dicts
+and lists are encoded straight to bytes, with orjson when the "fastjson"
+extra is installed and the standard library otherwise. The output matches
+what the pydantic response models produce for the same data.
+"""
+import json
+from datetime import date, datetime, timezone
+from typing import Any
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def format_datetime(value: datetime) -> str:
+    """ISO 8601 as pydantic writes it: "Z" for UTC, no offset for naive values"""
+    text = value.isoformat()
+    if value.tzinfo is not None and value.utcoffset() == timezone.utc.utcoffset(None):
+        text = text[:-len("+00:00")] + "Z"
+    return text
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    """JSONResponse for content that is already plain data; no validation is done"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
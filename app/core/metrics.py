@@ -0,0 +1,249 @@
+"""
+In-process Prometheus metrics (METRICS_ENABLED), exposed in the text
+exposition format at /metrics.
+
+Metrics are plain counters and bucket arrays updated on the event loop, so
+recording one is a dict lookup and a few additions. Each worker process
+keeps its own values; scrape workers separately or run a single one.
+"""
+import contextvars
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+from app.core.config import settings
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.type}\n"
+        return header + "".join(f"{line}\n" for line in self.samples())
+
+    def reset(self) -> None:
+        pass
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if settings.METRICS_ENABLED:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}"
+
+    def reset(self) -> None:
+        self._values.clear()
+
+class Gauge(Metric):
+    """
+    A gauge read from `collect` at scrape time; with labelnames, `collect`
+    returns the value of each label set
+    """
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Union[None, float, Dict[LabelValues, float]]],
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self) -> Iterable[str]:
+        values = self.collect()
+        if values is None:
+            return
+        if not self.labelnames:
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: observations per bucket (the last one is +Inf), sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def sum(self, *labels: str) -> float:
+        return self._sums.get(labels, 0.0)
+
+    def samples(self) -> Iterable[str]:
+        names = self.labelnames + ("le",)
+        for labels, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (_format_value(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_format_value(self._sums[labels])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+    def reset(self) -> None:
+        self._counts.clear()
+        self._sums.clear()
+
+M = TypeVar("M", bound=Metric)
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: M) -> M:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self.metrics)
+
+    def reset(self) -> None:
+        for metric in self.metrics:
+            metric.reset()
+
+registry = Registry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+ZONEMASTER_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+RESULT_BUCKETS = (0, 10, 25, 50, 100, 200, 300, 500, 1000, 2500, 5000)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    LATENCY_BUCKETS, ("method", "route", "status")
+))
+zonemaster_rpc_duration = registry.register(Histogram(
+    "zonemaster_rpc_duration_seconds", "Zonemaster JSON-RPC call latency by method",
+    ZONEMASTER_BUCKETS, ("method",)
+))
+zonemaster_rpc_errors = registry.register(Counter(
+    "zonemaster_rpc_errors_total", "Failed Zonemaster JSON-RPC calls by method and kind (timeout, transport, http, rpc)",
+    ("method", "kind")
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Duration of single database statements", QUERY_BUCKETS
+))
+db_request_statements = registry.register(Histogram(
+    "db_statements_per_request", "Database statements executed per HTTP request by route template",
+    STATEMENT_BUCKETS, ("route",)
+))
+db_request_duration = registry.register(Histogram(
+    "db_request_duration_seconds", "Time spent in database statements per HTTP request by route template",
+    LATENCY_BUCKETS, ("route",)
+))
+check_results = registry.register(Histogram(
+    "check_results", "Results per completed check", RESULT_BUCKETS
+))
+admission_wait = registry.register(Histogram(
+    "zonemaster_lane_wait_seconds", "Time checks waited for a Zonemaster slot by priority lane",
+    WAIT_BUCKETS, ("lane",)
+))
+
+# The pool of the application engine, read by the gauges below
+_pool = None
+
+def track_pool(pool) -> None:
+    global _pool
+    _pool = pool
+
+def _pool_value(name: str) -> Callable[[], Optional[float]]:
+    def collect() -> Optional[float]:
+        # NullPool and StaticPool do not count connections
+        method = getattr(_pool, name, None)
+        # QueuePool.overflow() is negative until pool_size connections exist
+        return max(0, method()) if method is not None else None
+    return collect
+
+registry.register(Gauge("db_pool_checked_out", "Connections currently checked out of the pool", _pool_value("checkedout")))
+registry.register(Gauge("db_pool_overflow", "Connections open beyond the pool size", _pool_value("overflow")))
+
+# Returns the Zonemaster admission controller, read by the lane gauges below
+_admission: Optional[Callable[[], Any]] = None
+
+def track_admission(get_controller: Callable[[], Any]) -> None:
+    global _admission
+    _admission = get_controller
+
+def _lane_value(name: str) -> Callable[[], Optional[Dict[LabelValues, float]]]:
+    def collect() -> Optional[Dict[LabelValues, float]]:
+        if _admission is None:
+            return None
+        return {(lane.name,): getattr(lane, name) for lane in _admission().lanes.values()}
+    return collect
+
+registry.register(Gauge(
+    "zonemaster_lane_queue_depth", "Checks waiting for a Zonemaster slot by priority lane",
+    _lane_value("queued"), ("lane",)
+))
+registry.register(Gauge(
+    "zonemaster_lane_in_flight", "Zonemaster tests in flight by priority lane",
+    _lane_value("in_flight"), ("lane",)
+))
+
+class QueryStats:
+    """Statements run on behalf of the current request"""
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+request_queries: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("request_queries", default=None)
+
+def observe_query(seconds: float) -> None:
+    db_query_duration.observe(seconds)
+    stats = request_queries.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += seconds
@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Tuple
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque, URL-safe cursor for the sort key of the last row of a page"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+def decode_datetime_id_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a (created_at, id) keyset cursor"""
+    values = decode_cursor(cursor)
+    try:
+        created_at, id = values
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def decode_id_cursor(cursor: str) -> int:
+    """Decode an (id,) keyset cursor"""
+    values = decode_cursor(cursor)
+    try:
+        (id,) = values
+        return int(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
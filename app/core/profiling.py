@@ -0,0 +1,184 @@
+"""
+On-demand profiling of single requests (PROFILING_ENABLED).
+
+A request sent with `X-Profile` and the admin token runs under pyinstrument
+(a sampling profiler, when the "profiling" extra is installed) or cProfile,
+and its profile is kept in memory for download from /admin/profiles. The
+response carries a Server-Timing breakdown of the time spent in Zonemaster,
+the database, saving the check and serializing the response.
+
+cProfile sees the whole event loop thread, so requests handled at the same
+time show up in its profiles too; pyinstrument follows only the profiled
+request. Either way only one request is profiled at a time. Requests
+without the header only pay for a context variable lookup at each timing
+point.
+"""
+import contextvars
+import cProfile
+import io
+import marshal
+import pstats
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+CPROFILE = "cprofile"
+SAMPLING = "sampling"
+
+class RequestTimings:
+    """Seconds per Server-Timing metric, and how often each was recorded"""
+    __slots__ = ("started", "seconds", "counts", "endpoint_done")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # Set when the endpoint function returns; serialization follows
+        self.endpoint_done: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def server_timing(self, response_started: float) -> str:
+        seconds = dict(self.seconds)
+        if self.endpoint_done is not None:
+            seconds["serialize"] = response_started - self.endpoint_done
+        seconds["total"] = response_started - self.started
+        entries = []
+        for name, value in seconds.items():
+            entry = f"{name};dur={value * 1000:.2f}"
+            if self.counts.get(name, 0) > 1:
+                entry += f';desc="{self.counts[name]} calls"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "current_timings", default=None
+)
+
+def record(name: str, seconds: float) -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+class span:
+    """`with span("save"):` adds the block's duration to the profiled request, if any"""
+    __slots__ = ("name", "timings", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "span":
+        self.timings = current_timings.get()
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.started)
+
+def mark_endpoint_done() -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        timings.endpoint_done = time.perf_counter()
+
+class RequestProfiler:
+    """One profiler run; `kind` is CPROFILE or SAMPLING"""
+
+    def __init__(self, kind: str, interval: float):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        if kind == SAMPLING:
+            self._profiler = SamplingProfiler(interval=interval, async_mode="enabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        if self.kind == SAMPLING:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> "StoredProfile":
+        if self.kind == SAMPLING:
+            self._profiler.stop()
+            return StoredProfile(self.id, self.kind, self._profiler.output_html().encode(), self._profiler.output_text())
+        self._profiler.disable()
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(50)
+        # What Stats.dump_stats writes: loadable with pstats, snakeviz and the like
+        return StoredProfile(self.id, self.kind, marshal.dumps(stats.stats), stream.getvalue())
+
+def choose_profiler(requested: str) -> str:
+    """The profiler named in the X-Profile header, or the best one available"""
+    requested = requested.strip().lower()
+    if requested == CPROFILE or SamplingProfiler is None:
+        return CPROFILE
+    return SAMPLING
+
+class StoredProfile:
+    def __init__(self, profile_id: str, kind: str, data: bytes, text: str):
+        self.id = profile_id
+        self.kind = kind
+        self.data = data
+        self.text = text
+        self.created_at = datetime.now(timezone.utc)
+        self.method = ""
+        self.path = ""
+        self.status: Optional[int] = None
+        self.duration = 0.0
+        self.server_timing = ""
+
+    @property
+    def media_type(self) -> str:
+        return "text/html" if self.kind == SAMPLING else "application/octet-stream"
+
+    @property
+    def filename(self) -> str:
+        return f"{self.id}.html" if self.kind == SAMPLING else f"{self.id}.prof"
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "profiler": self.kind,
+            "created_at": self.created_at,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 2),
+            "server_timing": self.server_timing,
+            "size": len(self.data)
+        }
+
+class ProfileStore:
+    """The most recent `max_profiles` profiles, oldest evicted first"""
+
+    def __init__(self, max_profiles: int):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, StoredProfile]" = OrderedDict()
+        # cProfile and pyinstrument both hook the thread, so one run at a time
+        self.active = False
+
+    def add(self, profile: StoredProfile) -> None:
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[StoredProfile]:
+        return self._profiles.get(profile_id)
+
+    def recent(self) -> List[StoredProfile]:
+        return list(reversed(self._profiles.values()))
+
+    def clear(self) -> None:
+        self._profiles.clear()
@@ -1,4 +1,15 @@
+from .check_batch import check_batch_crud
+from .check_job import check_job_crud
 from .dns_check import dns_check_crud
 from .dns_result import dns_result_crud
+from .monitored_domain import monitored_domain_crud
+from .result_rollup import result_rollup_crud
 
-__all__ = ["dns_check_crud", "dns_result_crud"]
\ No newline at end of file
+__all__ = [
+    "check_batch_crud",
+    "check_job_crud",
+    "dns_check_crud",
+    "dns_result_crud",
+    "monitored_domain_crud",
+    "result_rollup_crud"
+]
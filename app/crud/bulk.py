@@ -0,0 +1,30 @@
+from typing import Iterator, List, Type
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import Base
+
+def chunks(rows: List[dict], size: int) -> Iterator[List[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+async def insert_returning_ids(
+    db: AsyncSession,
+    model: Type[Base],
+    rows: List[dict],
+    chunk_size: int
+) -> List[int]:
+    """
+    Multi-row INSERT ... RETURNING id, with ids in the order of `rows`.
+    
+    SQLite cannot order RETURNING rows by parameter without falling back to
+    one statement per row. It assigns rowids in VALUES order, though, so
+    sorting the returned ids of a plain multi-row INSERT restores it.
+    """
+    ordered_by_db = db.get_bind().dialect.name != "sqlite"
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=ordered_by_db)
+    ids: List[int] = []
+    for chunk in chunks(rows, chunk_size):
+        result = await db.execute(stmt, chunk)
+        chunk_ids = result.scalars().all()
+        ids.extend(chunk_ids if ordered_by_db else sorted(chunk_ids))
+    return ids
@@ -0,0 +1,52 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.check_job import check_job_crud
+from app.crud.dns_check import dns_check_crud
+from app.models.check_batch import CheckBatch
+from app.models.check_job import CheckPriority
+from app.models.dns_check import CheckStatus, DNSCheck
+
+class CheckBatchCRUD:
+    async def create(
+        self,
+        db: AsyncSession,
+        domains: List[str],
+        queue_jobs: bool = False
+    ) -> Tuple[CheckBatch, List[Tuple[int, str]]]:
+        """
+        Create a batch and its queued checks in a single transaction, with a
+        check_jobs row per check for the worker processes if `queue_jobs`
+        """
+        db_obj = CheckBatch(total=len(domains))
+        db.add(db_obj)
+        await db.flush()
+        checks = await dns_check_crud.create_many(
+            db,
+            domains,
+            status=CheckStatus.QUEUED,
+            batch_id=db_obj.id
+        )
+        if queue_jobs:
+            await check_job_crud.create_many(
+                db,
+                [(check_id, domain, "default") for check_id, domain in checks],
+                CheckPriority.BATCH.value
+            )
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj, checks
+    
+    async def get(self, db: AsyncSession, id: int) -> Optional[CheckBatch]:
+        return await db.get(CheckBatch, id)
+    
+    async def get_checks(self, db: AsyncSession, batch_id: int) -> List[dict]:
+        stmt = (
+            select(DNSCheck.id, DNSCheck.domain, DNSCheck.status, DNSCheck.error)
+            .where(DNSCheck.batch_id == batch_id)
+            .order_by(DNSCheck.id)
+        )
+        result = await db.execute(stmt)
+        return [row._asdict() for row in result.all()]
+
+check_batch_crud = CheckBatchCRUD()
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.crud.bulk import chunks
+from app.models.check_job import CheckJob, CheckPriority, JobStatus
+
+class ClaimedJob(NamedTuple):
+    id: int
+    check_id: int
+    domain: str
+    profile: str
+    attempts: int
+    test_id: Optional[str]
+    backend_url: Optional[str]
+    priority: str
+
+CLAIMABLE = (JobStatus.QUEUED.value, JobStatus.LEASED.value)
+
+class CheckJobCRUD:
+    async def create_many(
+        self,
+        db: AsyncSession,
+        checks: Iterable[Tuple[int, str, str]],
+        priority: str = CheckPriority.INTERACTIVE.value
+    ) -> None:
+        """Queue a job per (check_id, domain, profile) in the `priority` lane; the caller commits"""
+        rows = [
+            {"check_id": check_id, "domain": domain, "profile": profile, "priority": priority}
+            for check_id, domain, profile in checks
+        ]
+        for chunk in chunks(rows, settings.RESULTS_INSERT_CHUNK_SIZE):
+            await db.execute(insert(CheckJob), chunk)
+
+    async def claim(
+        self,
+        db: AsyncSession,
+        owner: str,
+        now: datetime,
+        limit: int,
+        lease_seconds: float,
+        priority: str = CheckPriority.INTERACTIVE.value
+    ) -> List[ClaimedJob]:
+        """
+        Lease up to `limit` jobs of the `priority` lane that are queued and
+        due, or whose lease ran out, to `owner`, and commit. Postgres reads
+        them with FOR UPDATE SKIP LOCKED so concurrent workers take different
+        jobs without waiting; on SQLite each job is taken with an UPDATE
+        conditional on the state that was read, and jobs another worker
+        took first are dropped.
+        """
+        locking = db.get_bind().dialect.name == "postgresql"
+        stmt = (
+            select(
+                CheckJob.id,
+                CheckJob.check_id,
+                CheckJob.domain,
+                CheckJob.profile,
+                CheckJob.status,
+                CheckJob.attempts,
+                CheckJob.available_at,
+                CheckJob.test_id,
+                CheckJob.backend_url
+            )
+            .where(
+                CheckJob.priority == priority,
+                CheckJob.status.in_(CLAIMABLE),
+                CheckJob.available_at <= now
+            )
+            .order_by(CheckJob.available_at, CheckJob.id)
+            .limit(limit)
+        )
+        if locking:
+            stmt = stmt.with_for_update(skip_locked=True)
+        rows = (await db.execute(stmt)).all()
+
+        lease_until = now + timedelta(seconds=lease_seconds)
+        claimed: List[ClaimedJob] = []
+        for row in rows:
+            lease = (
+                update(CheckJob)
+                .where(CheckJob.id == row.id)
+                .values(
+                    status=JobStatus.LEASED.value,
+                    lease_owner=owner,
+                    available_at=lease_until,
+                    attempts=CheckJob.attempts + 1
+                )
+            )
+            if not locking:
+                lease = lease.where(CheckJob.status == row.status, CheckJob.available_at == row.available_at)
+            if (await db.execute(lease)).rowcount:
+                claimed.append(ClaimedJob(
+                    row.id,
+                    row.check_id,
+                    row.domain,
+                    row.profile,
+                    row.attempts + 1,
+                    row.test_id,
+                    row.backend_url,
+                    priority
+                ))
+        await db.commit()
+        return claimed
+
+    async def heartbeat(
+        self,
+        db: AsyncSession,
+        owner: str,
+        ids: List[int],
+        now: datetime,
+        lease_seconds: float
+    ) -> Set[int]:
+        """Extend the leases `owner` still holds among `ids`; returns their ids"""
+        if not ids:
+            return set()
+        owned = (CheckJob.id.in_(ids), CheckJob.lease_owner == owner, CheckJob.status == JobStatus.LEASED.value)
+        await db.execute(
+            update(CheckJob).where(*owned).values(available_at=now + timedelta(seconds=lease_seconds))
+        )
+        held = set((await db.execute(select(CheckJob.id).where(*owned))).scalars().all())
+        await db.commit()
+        return held
+
+    async def _update_owned(self, db: AsyncSession, id: int, owner: str, **values) -> bool:
+        """Update a job only while `owner` holds its lease, and commit"""
+        result = await db.execute(
+            update(CheckJob)
+            .where(CheckJob.id == id, CheckJob.lease_owner == owner, CheckJob.status == JobStatus.LEASED.value)
+            .values(**values)
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def record_test(self, db: AsyncSession, id: int, owner: str, test_id: str, backend_url: str) -> None:
+        """Remember the started test, so a retry after a lost lease resumes it"""
+        await self._update_owned(db, id, owner, test_id=test_id, backend_url=backend_url)
+
+    async def complete(self, db: AsyncSession, id: int, owner: str) -> None:
+        await self._update_owned(db, id, owner, status=JobStatus.DONE.value, lease_owner=None)
+
+    async def retry(self, db: AsyncSession, id: int, owner: str, error: str, available_at: datetime) -> None:
+        """Queue a failed attempt again; the next attempt starts a new test"""
+        await self._update_owned(
+            db,
+            id,
+            owner,
+            status=JobStatus.QUEUED.value,
+            lease_owner=None,
+            available_at=available_at,
+            test_id=None,
+            backend_url=None,
+            last_error=error
+        )
+
+    async def fail(self, db: AsyncSession, id: int, owner: str, error: str) -> None:
+        await self._update_owned(db, id, owner, status=JobStatus.FAILED.value, lease_owner=None, last_error=error)
+
+    async def release(self, db: AsyncSession, id: int, owner: str, now: datetime) -> None:
+        """Hand a job back (worker shutdown) without counting the attempt; its test is resumed"""
+        await self._update_owned(
+            db,
+            id,
+            owner,
+            status=JobStatus.QUEUED.value,
+            lease_owner=None,
+            available_at=now,
+            attempts=CheckJob.attempts - 1
+        )
+
+    async def count_by_status(self, db: AsyncSession) -> dict:
+        rows = await db.execute(select(CheckJob.status, func.count()).group_by(CheckJob.status))
+        return {status: count for status, count in rows.all()}
+
+check_job_crud = CheckJobCRUD()
@@ -1,22 +1,258 @@
-from typing import List, Optional
-from sqlalchemy import select, func
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import Date, Row, cast, delete, func, literal, literal_column, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from app.models.dns_check import DNSCheck
+from sqlalchemy.orm import noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from app.core.config import settings
+from app.crud import result_delta, result_storage
+from app.crud.bulk import insert_returning_ids
+from app.models.dns_check import CheckStatus, DNSCheck, ResultStorage
+from app.models.dns_result import COUNTED_LEVELS, DNSResult
 from app.schemas.dns_check import DNSCheckCreate
 
+# Tries of a retention batch whose delete races with new delta checks
+DELETE_ATTEMPTS = 3
+
+def result_counters(results_data: List[dict]) -> dict:
+    """Values for the denormalized results_count / <level>_count columns"""
+    counters = {f"{level.lower()}_count": 0 for level in COUNTED_LEVELS}
+    for result_data in results_data:
+        column = f"{result_data['level'].lower()}_count"
+        if column in counters:
+            counters[column] += 1
+    counters["results_count"] = len(results_data)
+    return counters
+
+# Columns of a check summary (DNSCheckListResponse); no results are read
+SUMMARY_COLUMNS = (
+    DNSCheck.id,
+    DNSCheck.domain,
+    DNSCheck.created_at,
+    DNSCheck.status,
+    DNSCheck.results_count,
+    DNSCheck.info_count,
+    DNSCheck.notice_count,
+    DNSCheck.warning_count,
+    DNSCheck.error_count,
+    DNSCheck.critical_count
+)
+
+# Columns of a full check (DNSCheckResponse), in field order, except results
+DETAIL_COLUMNS = (
+    DNSCheck.id,
+    DNSCheck.domain,
+    DNSCheck.profile,
+    DNSCheck.created_at,
+    DNSCheck.status,
+    DNSCheck.progress,
+    DNSCheck.error,
+    DNSCheck.completed_at,
+    DNSCheck.results_count,
+    DNSCheck.info_count,
+    DNSCheck.notice_count,
+    DNSCheck.warning_count,
+    DNSCheck.error_count,
+    DNSCheck.critical_count
+)
+
+# Columns of a result (DNSResultResponse)
+RESULT_COLUMNS = (DNSResult.id, DNSResult.level, DNSResult.module, DNSResult.tag, DNSResult.message)
+
+def result_values(result: DNSResult) -> dict:
+    return {column.key: getattr(result, column.key) for column in RESULT_COLUMNS}
+
+# Everything a conditional GET needs to know whether a check changed
+STATE_COLUMNS = (
+    DNSCheck.id,
+    DNSCheck.status,
+    DNSCheck.progress,
+    DNSCheck.completed_at,
+    DNSCheck.storage
+)
+
+def period_start(dialect_name: str, interval: str):
+    """
+    SQL expression for the UTC day or (Monday-based) week of created_at.
+    Constants are inlined rather than bound so the expression in GROUP BY is
+    identical to the one selected, as Postgres requires.
+    """
+    if interval not in ("day", "week"):
+        raise ValueError(f"Unsupported interval: {interval}")
+    if dialect_name == "sqlite":
+        if interval == "week":
+            # Forward to the next Sunday (or stay on it), then back to Monday
+            return func.date(DNSCheck.created_at, literal_column("'weekday 0'"), literal_column("'-6 days'"))
+        return func.date(DNSCheck.created_at)
+    return cast(
+        func.date_trunc(literal_column(f"'{interval}'"), func.timezone(literal_column("'UTC'"), DNSCheck.created_at)),
+        Date
+    )
+
+def keyset_created_at(dialect_name: str, value: Optional[datetime] = None):
+    """
+    DNSCheck.created_at, or a cursor `value` to compare with it, as keyset
+    pagination orders and compares it. SQLite keeps timestamps as text, with
+    microseconds when the ORM writes them but without when current_timestamp
+    (the server default) does, so there both are padded to the same width.
+    """
+    created_at = DNSCheck.created_at if value is None else literal(value, DNSCheck.created_at.type)
+    if dialect_name != "sqlite":
+        return created_at
+    return func.substr(created_at.op("||")(literal_column("'.000000'")), 1, 26)
+
+def apply_check_filters(
+    stmt,
+    domain: Optional[str],
+    created_after: Optional[datetime],
+    created_before: Optional[datetime]
+):
+    if domain is not None:
+        stmt = stmt.where(DNSCheck.domain == domain)
+    if created_after is not None:
+        stmt = stmt.where(DNSCheck.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(DNSCheck.created_at < created_before)
+    return stmt
+
+async def expand_stored_results(db: AsyncSession, checks: List[DNSCheck]) -> None:
+    """
+    Give checks stored as deltas, raw blobs or indexed rows their full
+    result list; the blob of a raw-stored or indexed check is only read and
+    decompressed here
+    """
+    for check in checks:
+        if check.storage != ResultStorage.FULL.value:
+            results = await result_storage.load_results(db, check.id, check.storage)
+            set_committed_value(check, "results", results)
+
 class DNSCheckCRUD:
-    async def create(self, db: AsyncSession, obj_in: DNSCheckCreate) -> DNSCheck:
-        db_obj = DNSCheck(domain=obj_in.domain)
+    async def create(
+        self,
+        db: AsyncSession,
+        obj_in: DNSCheckCreate,
+        status: CheckStatus = CheckStatus.COMPLETED,
+        commit: bool = True,
+        **values: Any
+    ) -> DNSCheck:
+        """
+        Insert a check. Server defaults (id, created_at) come back with the
+        INSERT, so with commit=False the row is flushed and no commit or
+        refresh round trip is made.
+        """
+        db_obj = DNSCheck(domain=obj_in.domain, profile=obj_in.profile, status=status.value, **values)
         db.add(db_obj)
+        if not commit:
+            await db.flush()
+            return db_obj
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
     
-    async def get(self, db: AsyncSession, id: int) -> Optional[DNSCheck]:
-        stmt = select(DNSCheck).options(selectinload(DNSCheck.results)).where(DNSCheck.id == id)
+    async def get(self, db: AsyncSession, id: int, with_results: bool = True) -> Optional[DNSCheck]:
+        """
+        With with_results=False, `results` is left empty and not queried.
+        Results of checks not stored as plain rows are rebuilt, so
+        `results` is always the full list.
+        """
+        loader = selectinload(DNSCheck.results) if with_results else noload(DNSCheck.results)
+        stmt = select(DNSCheck).options(loader).where(DNSCheck.id == id)
+        result = await db.execute(stmt)
+        check = result.scalar_one_or_none()
+        if check is not None and with_results:
+            await expand_stored_results(db, [check])
+        return check
+    
+    async def get_detail(self, db: AsyncSession, id: int, with_results: bool = True) -> Optional[dict]:
+        """
+        A check as plain data shaped like DNSCheckResponse, read as rows
+        without building ORM objects (results of checks stored as deltas or
+        raw blobs are rebuilt as usual). None when it does not exist.
+        """
+        row = (await db.execute(select(*DETAIL_COLUMNS, DNSCheck.storage).where(DNSCheck.id == id))).one_or_none()
+        if row is None:
+            return None
+        detail = row._asdict()
+        storage = detail.pop("storage")
+        detail["results"] = []
+        if not with_results:
+            return detail
+        if storage == ResultStorage.FULL.value:
+            rows = await db.execute(
+                select(*RESULT_COLUMNS).where(DNSResult.dns_check_id == id).order_by(DNSResult.position)
+            )
+            detail["results"] = [result._asdict() for result in rows.all()]
+        else:
+            results = await result_storage.load_results(db, id, storage)
+            detail["results"] = [result_values(result) for result in results]
+        return detail
+    
+    async def get_state(self, db: AsyncSession, id: int) -> Optional[Row]:
+        """
+        The columns that change over a check's life (status, progress,
+        completed_at, storage), without results; None when it does not exist
+        """
+        stmt = select(*STATE_COLUMNS).where(DNSCheck.id == id)
         result = await db.execute(stmt)
-        return result.scalar_one_or_none()
+        return result.one_or_none()
+    
+    async def get_latest_completed(
+        self,
+        db: AsyncSession,
+        domain: str,
+        profile: str,
+        since: datetime
+    ) -> Optional[DNSCheck]:
+        """Most recent check of domain/profile that completed at or after `since`"""
+        stmt = (
+            select(DNSCheck)
+            .options(selectinload(DNSCheck.results))
+            .where(
+                DNSCheck.domain == domain,
+                DNSCheck.profile == profile,
+                DNSCheck.status == CheckStatus.COMPLETED.value,
+                DNSCheck.completed_at >= since
+            )
+            .order_by(DNSCheck.completed_at.desc())
+            .limit(1)
+        )
+        result = await db.execute(stmt)
+        check = result.scalar_one_or_none()
+        if check is not None:
+            await expand_stored_results(db, [check])
+        return check
+    
+    async def create_many(
+        self,
+        db: AsyncSession,
+        domains: List[str],
+        status: CheckStatus = CheckStatus.QUEUED,
+        batch_id: Optional[int] = None,
+        profile: str = "default"
+    ) -> List[Tuple[int, str]]:
+        """Insert many checks with multi-row INSERTs; the caller commits"""
+        ids = await insert_returning_ids(
+            db,
+            DNSCheck,
+            [
+                {"domain": domain, "profile": profile, "status": status.value, "batch_id": batch_id}
+                for domain in domains
+            ],
+            settings.RESULTS_INSERT_CHUNK_SIZE
+        )
+        return list(zip(ids, domains))
+    
+    async def update_many_states(self, db: AsyncSession, values: List[dict]) -> None:
+        """Bulk UPDATE by primary key; each dict carries "id". The caller commits"""
+        if values:
+            await db.execute(update(DNSCheck), values)
+    
+    async def update_state(self, db: AsyncSession, id: int, **values: Any) -> None:
+        """Update job state columns without loading the check"""
+        stmt = update(DNSCheck).where(DNSCheck.id == id).values(**values)
+        await db.execute(stmt)
+        await db.commit()
     
     async def get_multi(
         self, 
@@ -32,36 +268,177 @@ class DNSCheckCRUD:
             .order_by(DNSCheck.created_at.desc())
         )
         result = await db.execute(stmt)
-        return list(result.scalars().all())
+        checks = list(result.scalars().all())
+        await expand_stored_results(db, checks)
+        return checks
     
     async def get_multi_with_count(
         self,
         db: AsyncSession,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None,
+        domain: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
     ) -> List[dict]:
+        """
+        Newest-first page of checks. With `after` (the (created_at, id) of the
+        last row already seen) the page is read with a keyset seek on
+        ix_dns_checks_created_at_id instead of OFFSET.
+        """
+        dialect_name = db.get_bind().dialect.name
+        created_at = keyset_created_at(dialect_name)
         stmt = (
-            select(
-                DNSCheck.id,
-                DNSCheck.domain,
-                DNSCheck.created_at,
-                func.count(DNSCheck.results).label("results_count")
+            select(*SUMMARY_COLUMNS)
+            .order_by(created_at.desc(), DNSCheck.id.desc())
+            .limit(limit)
+        )
+        stmt = apply_check_filters(stmt, domain, created_after, created_before)
+        if after is not None:
+            after_created_at, after_id = after
+            stmt = stmt.where(
+                tuple_(created_at, DNSCheck.id) < tuple_(keyset_created_at(dialect_name, after_created_at), after_id)
             )
-            .outerjoin(DNSCheck.results)
-            .group_by(DNSCheck.id, DNSCheck.domain, DNSCheck.created_at)
-            .offset(skip)
+        elif skip:
+            stmt = stmt.offset(skip)
+        result = await db.execute(stmt)
+        return [row._asdict() for row in result.all()]
+
+    async def get_domain_history(
+        self,
+        db: AsyncSession,
+        domain: str,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> List[dict]:
+        """
+        Oldest-first summaries of one domain's checks, read through
+        ix_dns_checks_domain_created_at. `after` is the (created_at, id) of the
+        last row already seen.
+        """
+        dialect_name = db.get_bind().dialect.name
+        created_at = keyset_created_at(dialect_name)
+        stmt = (
+            select(*SUMMARY_COLUMNS)
+            .order_by(created_at, DNSCheck.id)
             .limit(limit)
-            .order_by(DNSCheck.created_at.desc())
         )
+        stmt = apply_check_filters(stmt, domain, created_after, created_before)
+        if after is not None:
+            after_created_at, after_id = after
+            stmt = stmt.where(
+                tuple_(created_at, DNSCheck.id) > tuple_(keyset_created_at(dialect_name, after_created_at), after_id)
+            )
         result = await db.execute(stmt)
-        return [
-            {
-                "id": row.id,
-                "domain": row.domain,
-                "created_at": row.created_at,
-                "results_count": row.results_count
-            }
-            for row in result.all()
-        ]
+        return [row._asdict() for row in result.all()]
+    
+    async def get_domain_trend(
+        self,
+        db: AsyncSession,
+        domain: str,
+        interval: str,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> List[dict]:
+        """Per-day or per-week totals of a domain's completed checks, aggregated in SQL"""
+        bucket = period_start(db.get_bind().dialect.name, interval).label("period_start")
+        stmt = (
+            select(
+                bucket,
+                func.count().label("checks"),
+                func.sum(DNSCheck.warning_count).label("warning_count"),
+                func.sum(DNSCheck.error_count).label("error_count"),
+                func.sum(DNSCheck.critical_count).label("critical_count")
+            )
+            .where(DNSCheck.status == CheckStatus.COMPLETED.value)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        stmt = apply_check_filters(stmt, domain, created_after, created_before)
+        result = await db.execute(stmt)
+        return [row._asdict() for row in result.all()]
+
+    async def delete_finished_before(self, db: AsyncSession, cutoff: datetime, limit: int) -> int:
+        """
+        Delete up to `limit` completed or failed checks created before
+        `cutoff` and commit. Results go with them through ON DELETE CASCADE,
+        so no result rows are loaded. Delta-stored checks that are kept but
+        based on a deleted check are rewritten as full snapshots first, in
+        the same transaction. When a delta check was saved against one of
+        them meanwhile, the foreign key refuses the delete and the batch is
+        retried, finding the new dependent. Returns the number of checks
+        deleted.
+        """
+        for attempt in range(1, DELETE_ATTEMPTS + 1):
+            try:
+                return await self._delete_finished_batch(db, cutoff, limit)
+            except IntegrityError:
+                await db.rollback()
+                if attempt == DELETE_ATTEMPTS:
+                    raise
+        return 0
+
+    async def _delete_finished_batch(self, db: AsyncSession, cutoff: datetime, limit: int) -> int:
+        ids = (
+            select(DNSCheck.id)
+            .where(
+                DNSCheck.created_at < cutoff,
+                DNSCheck.status.in_([CheckStatus.COMPLETED.value, CheckStatus.FAILED.value])
+            )
+            .order_by(DNSCheck.id)
+            .limit(limit)
+        )
+        id_list = list((await db.execute(ids)).scalars())
+        if id_list:
+            dependents = await db.execute(
+                select(DNSCheck.id).where(
+                    DNSCheck.base_check_id.in_(id_list),
+                    DNSCheck.id.not_in(id_list)
+                )
+            )
+            for check_id in dependents.scalars().all():
+                await result_delta.materialize(db, check_id)
+            await db.execute(delete(DNSCheck).where(DNSCheck.id.in_(id_list)))
+        await db.commit()
+        return len(id_list)
+
+    async def get_export_watermark(
+        self,
+        db: AsyncSession,
+        after_id: int = 0,
+        domain: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> int:
+        """
+        Highest check id an incremental export can safely cover: the newest
+        completed check, but below any check still queued or running, so a
+        later export resuming from this id cannot skip checks that finish late.
+        Returns `after_id` when there is nothing new.
+        """
+        max_completed = apply_check_filters(
+            select(func.max(DNSCheck.id)).where(
+                DNSCheck.status == CheckStatus.COMPLETED.value,
+                DNSCheck.id > after_id
+            ),
+            domain, created_after, created_before
+        )
+        min_unfinished = apply_check_filters(
+            select(func.min(DNSCheck.id)).where(
+                DNSCheck.status.in_([CheckStatus.QUEUED.value, CheckStatus.RUNNING.value]),
+                DNSCheck.id > after_id
+            ),
+            domain, created_after, created_before
+        )
+        result = await db.execute(select(max_completed.scalar_subquery(), min_unfinished.scalar_subquery()))
+        newest, oldest_unfinished = result.one()
+        if newest is None:
+            return after_id
+        if oldest_unfinished is not None:
+            newest = min(newest, oldest_unfinished - 1)
+        return max(newest, after_id)
 
 dns_check_crud = DNSCheckCRUD()
\ No newline at end of file
@@ -1,29 +1,213 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import Select, and_, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.dns_result import DNSResult
+from app.core.config import settings
+from app.crud.bulk import chunks, insert_returning_ids
+from app.crud.dns_check import apply_check_filters
+from app.crud import result_storage
+from app.crud.result_delta import StoragePlan, full_plan
+from app.models.dns_check import ROW_STORAGES, CheckStatus, DNSCheck, ResultStorage
+from app.models.dns_result import RESULT_ADDED, RESULT_REMOVED, DNSResult, levels_at_or_above
+
+RESULT_COLUMNS = ("dns_check_id", "level", "module", "tag", "message", "change", "position")
 
 class DNSResultCRUD:
+    def result_rows(
+        self,
+        dns_check_id: int,
+        results_data: List[dict],
+        plan: Optional[StoragePlan] = None
+    ) -> List[dict]:
+        """
+        Rows to insert for one check: every result for full storage (without
+        messages when indexed), or the additions followed by the removals of
+        a delta plan, each with its position
+        """
+        plan = plan or full_plan(results_data)
+        if plan.storage == ResultStorage.RAW.value:
+            return []
+        change = RESULT_ADDED if plan.storage == ResultStorage.DELTA.value else None
+        indexed = plan.storage == ResultStorage.INDEXED.value
+        rows = [
+            {
+                "dns_check_id": dns_check_id,
+                "level": result_data["level"],
+                "module": result_data["module"],
+                "tag": result_data["tag"],
+                "message": None if indexed else result_data["message"],
+                "change": change,
+                "position": position
+            }
+            for position, (result_data, base_id) in enumerate(zip(results_data, plan.base_ids), start=1)
+            if base_id is None
+        ]
+        rows.extend(
+            {"dns_check_id": dns_check_id, **removed, "change": RESULT_REMOVED}
+            for removed in plan.removed
+        )
+        return rows
+    
     async def create_bulk(
         self, 
         db: AsyncSession, 
         dns_check_id: int,
-        results_data: List[dict]
+        results_data: List[dict],
+        commit: bool = True,
+        returning: bool = True,
+        plan: Optional[StoragePlan] = None
+    ) -> List[int]:
+        """
+        Insert all results of one check, or only its delta when `plan` says
+        so. With `returning`, returns the id of every result in the order of
+        `results_data`, including the base rows a delta reuses (raw storage
+        inserts nothing and numbers results 1..n, as they are read back).
+        """
+        plan = plan or full_plan(results_data)
+        ids = iter(await self.insert_rows(db, self.result_rows(dns_check_id, results_data, plan), returning=returning))
+        if commit:
+            await db.commit()
+        if not returning:
+            return []
+        if plan.storage == ResultStorage.RAW.value:
+            return list(range(1, len(results_data) + 1))
+        return [next(ids) if base_id is None else base_id for base_id in plan.base_ids]
+    
+    async def insert_rows(
+        self,
+        db: AsyncSession,
+        rows: List[dict],
+        returning: bool = True
+    ) -> List[int]:
+        """
+        Set-based insert of result rows (which carry their own dns_check_id).
+        
+        Rows go out as multi-row INSERT ... RETURNING statements of at most
+        RESULTS_INSERT_CHUNK_SIZE rows and are never refreshed one by one.
+        When ids are not needed and the database is Postgres via asyncpg,
+        large sets are streamed with COPY instead. The caller commits.
+        """
+        if not rows:
+            return []
+        
+        bind = db.get_bind()
+        if (
+            not returning
+            and bind.dialect.name == "postgresql"
+            and bind.dialect.driver == "asyncpg"
+            and len(rows) >= settings.RESULTS_COPY_THRESHOLD
+        ):
+            await self._copy_rows(db, rows)
+            return []
+        
+        if returning:
+            return await insert_returning_ids(db, DNSResult, rows, settings.RESULTS_INSERT_CHUNK_SIZE)
+        
+        for chunk in chunks(rows, settings.RESULTS_INSERT_CHUNK_SIZE):
+            await db.execute(insert(DNSResult), chunk)
+        return []
+    
+    async def _copy_rows(self, db: AsyncSession, rows: List[dict]) -> None:
+        """COPY rows into dns_results on the session's own asyncpg connection"""
+        conn = await db.connection()
+        raw_connection = await conn.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            DNSResult.__tablename__,
+            records=[tuple(row.get(column) for column in RESULT_COLUMNS) for row in rows],
+            columns=list(RESULT_COLUMNS)
+        )
+
+    async def get_multi_for_check(
+        self,
+        db: AsyncSession,
+        dns_check_id: int,
+        limit: int = 100,
+        after_position: Optional[int] = None,
+        levels: Optional[List[str]] = None,
+        module: Optional[str] = None,
+        tag: Optional[str] = None,
+        storage: str = ResultStorage.FULL.value
     ) -> List[DNSResult]:
-        db_objects = []
-        for result_data in results_data:
-            db_obj = DNSResult(
-                dns_check_id=dns_check_id,
-                level=result_data["level"],
-                module=result_data["module"],
-                tag=result_data["tag"],
-                message=result_data["message"]
-            )
-            db_objects.append(db_obj)
-            db.add(db_obj)
+        """
+        Page of one check's results in position order, filtered in SQL. The
+        check and level conditions are served by
+        ix_dns_results_dns_check_id_level; `after_position` is the position of
+        the last result already seen. Indexed checks take the messages of
+        the page from their raw blob; checks stored as deltas or raw blobs
+        are rebuilt first and filtered in memory.
+        """
+        if storage not in ROW_STORAGES:
+            results = await result_storage.load_results(db, dns_check_id, storage)
+            return [
+                result for result in results
+                if (not levels or result.level in levels)
+                and (module is None or result.module == module)
+                and (tag is None or result.tag == tag)
+                and (after_position is None or result.position > after_position)
+            ][:limit]
         
-        await db.commit()
-        for obj in db_objects:
-            await db.refresh(obj)
-        return db_objects
+        indexed = storage == ResultStorage.INDEXED.value
+        stmt = (
+            (select(*result_storage.INDEXED_COLUMNS) if indexed else select(DNSResult))
+            .where(DNSResult.dns_check_id == dns_check_id)
+            .order_by(DNSResult.position)
+            .limit(limit)
+        )
+        if levels:
+            stmt = stmt.where(DNSResult.level.in_(levels))
+        if module is not None:
+            stmt = stmt.where(DNSResult.module == module)
+        if tag is not None:
+            stmt = stmt.where(DNSResult.tag == tag)
+        if after_position is not None:
+            stmt = stmt.where(DNSResult.position > after_position)
+        result = await db.execute(stmt)
+        if indexed:
+            return await result_storage.attach_messages(db, dns_check_id, result.all())
+        return list(result.scalars().all())
+
+    def export_query(
+        self,
+        watermark: int,
+        after_id: int = 0,
+        domain: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        min_level: Optional[str] = None
+    ) -> Select:
+        """
+        Flat (check, result) rows of completed checks in (after_id, watermark].
+        A check not stored as plain rows comes back as a single row with NULL
+        result columns and its `storage`, for the caller to rebuild.
+        """
+        on_clause = and_(
+            DNSResult.dns_check_id == DNSCheck.id,
+            DNSCheck.storage == ResultStorage.FULL.value
+        )
+        if min_level is not None:
+            on_clause = and_(on_clause, DNSResult.level.in_(levels_at_or_above(min_level)))
+        stmt = (
+            select(
+                DNSCheck.id.label("check_id"),
+                DNSCheck.domain,
+                DNSCheck.profile,
+                DNSCheck.created_at,
+                DNSResult.id.label("result_id"),
+                DNSResult.level,
+                DNSResult.module,
+                DNSResult.tag,
+                DNSResult.message,
+                DNSCheck.storage
+            )
+            .outerjoin(DNSResult, on_clause)
+            .where(
+                DNSCheck.status == CheckStatus.COMPLETED.value,
+                DNSCheck.id > after_id,
+                DNSCheck.id <= watermark,
+                or_(DNSResult.id.is_not(None), DNSCheck.storage != ResultStorage.FULL.value)
+            )
+            .order_by(DNSCheck.id, DNSResult.position)
+        )
+        return apply_check_filters(stmt, domain, created_after, created_before)
 
-dns_result_crud = DNSResultCRUD()
\ No newline at end of file
+dns_result_crud = DNSResultCRUD()
@@ -0,0 +1,160 @@
+import random
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+from sqlalchemy import delete, select, true, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.datetimes import as_utc
+from app.crud.bulk import chunks
+from app.models.monitored_domain import MonitoredDomain
+
+class DueRun(NamedTuple):
+    monitored_id: int
+    domain: str
+    profile: str
+
+def first_run_at(now: datetime, interval_seconds: int) -> datetime:
+    """Somewhere in the first interval, so domains added together do not come due together"""
+    return now + timedelta(seconds=random.uniform(0, interval_seconds))
+
+def following_run_at(scheduled: datetime, now: datetime, interval_seconds: int) -> datetime:
+    """
+    One interval after the run that was due, give or take MONITOR_JITTER of
+    it. Runs that fell more than an interval behind restart from now rather
+    than catching up in a burst.
+    """
+    base = scheduled + timedelta(seconds=interval_seconds)
+    if base <= now:
+        base = now + timedelta(seconds=interval_seconds)
+    jitter = settings.MONITOR_JITTER * interval_seconds
+    return max(now, base + timedelta(seconds=random.uniform(-jitter, jitter)))
+
+class MonitoredDomainCRUD:
+    async def create(
+        self,
+        db: AsyncSession,
+        domain: str,
+        profile: str,
+        interval_seconds: int,
+        now: datetime
+    ) -> MonitoredDomain:
+        """Raises IntegrityError when the domain is already monitored with this profile"""
+        db_obj = MonitoredDomain(
+            domain=domain,
+            profile=profile,
+            interval_seconds=interval_seconds,
+            next_run_at=first_run_at(now, interval_seconds)
+        )
+        db.add(db_obj)
+        await db.commit()
+        return db_obj
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        domains: List[str],
+        profile: str,
+        interval_seconds: int,
+        now: datetime
+    ) -> int:
+        """Add domains not monitored with this profile yet; returns how many were added"""
+        dialect = db.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(MonitoredDomain).on_conflict_do_nothing(index_elements=["domain", "profile"])
+        added = 0
+        for chunk in chunks(domains, settings.RESULTS_INSERT_CHUNK_SIZE):
+            rows = [
+                {
+                    "domain": domain,
+                    "profile": profile,
+                    "interval_seconds": interval_seconds,
+                    "enabled": True,
+                    "next_run_at": first_run_at(now, interval_seconds),
+                    "created_at": now
+                }
+                for domain in chunk
+            ]
+            result = await db.execute(stmt.values(rows))
+            added += result.rowcount
+        await db.commit()
+        return added
+
+    async def get(self, db: AsyncSession, id: int) -> Optional[MonitoredDomain]:
+        return await db.get(MonitoredDomain, id)
+
+    async def get_multi(self, db: AsyncSession, limit: int, after_id: Optional[int] = None) -> List[MonitoredDomain]:
+        stmt = select(MonitoredDomain).order_by(MonitoredDomain.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(MonitoredDomain.id > after_id)
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def update(self, db: AsyncSession, db_obj: MonitoredDomain, now: datetime, **values) -> MonitoredDomain:
+        """A new interval takes effect from now: the next run is rescheduled within it"""
+        interval_changed = (
+            "interval_seconds" in values and values["interval_seconds"] != db_obj.interval_seconds
+        )
+        for key, value in values.items():
+            setattr(db_obj, key, value)
+        if interval_changed:
+            db_obj.next_run_at = first_run_at(now, db_obj.interval_seconds)
+        await db.commit()
+        return db_obj
+
+    async def delete(self, db: AsyncSession, id: int) -> bool:
+        result = await db.execute(delete(MonitoredDomain).where(MonitoredDomain.id == id))
+        await db.commit()
+        return result.rowcount > 0
+
+    async def claim_due(self, db: AsyncSession, now: datetime, limit: int) -> List[DueRun]:
+        """
+        Claim up to `limit` enabled domains whose next run is due by moving
+        next_run_at past now, and commit. On Postgres the rows are read with
+        FOR UPDATE SKIP LOCKED, so concurrent schedulers pass over each
+        other's rows instead of waiting on them. SQLite has no row locks:
+        each row is claimed with an UPDATE conditional on the next_run_at
+        that was read, and rows another scheduler moved first are dropped.
+        """
+        locking = db.get_bind().dialect.name == "postgresql"
+        stmt = (
+            select(
+                MonitoredDomain.id,
+                MonitoredDomain.domain,
+                MonitoredDomain.profile,
+                MonitoredDomain.interval_seconds,
+                MonitoredDomain.next_run_at
+            )
+            .where(MonitoredDomain.enabled == true(), MonitoredDomain.next_run_at <= now)
+            .order_by(MonitoredDomain.next_run_at)
+            .limit(limit)
+        )
+        if locking:
+            stmt = stmt.with_for_update(skip_locked=True)
+        rows = (await db.execute(stmt)).all()
+
+        claimed: List[DueRun] = []
+        for row in rows:
+            claim = (
+                update(MonitoredDomain)
+                .where(MonitoredDomain.id == row.id)
+                .values(
+                    next_run_at=following_run_at(as_utc(row.next_run_at), now, row.interval_seconds),
+                    last_run_at=now
+                )
+            )
+            if not locking:
+                claim = claim.where(MonitoredDomain.next_run_at == row.next_run_at)
+            result = await db.execute(claim)
+            if result.rowcount:
+                claimed.append(DueRun(row.id, row.domain, row.profile))
+        await db.commit()
+        return claimed
+
+    async def record_check(self, db: AsyncSession, id: int, check_id: int) -> None:
+        await db.execute(
+            update(MonitoredDomain).where(MonitoredDomain.id == id).values(last_check_id=check_id)
+        )
+        await db.commit()
+
+monitored_domain_crud = MonitoredDomainCRUD()
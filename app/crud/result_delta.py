@@ -0,0 +1,232 @@
+"""
+Delta storage of check results (RESULTS_STORAGE_MODE=delta).
+
+A delta-stored check keeps only the results added (RESULT_ADDED) and removed
+(RESULT_REMOVED) relative to base_check_id, the previous completed check of
+the same domain and profile. Following base_check_id back always ends at a
+full snapshot, and every RESULTS_SNAPSHOT_INTERVAL-th check of a chain is
+stored in full again, so rebuilding a result list reads a bounded number of
+checks. Results are compared as (level, module, tag, message); duplicates are
+kept as a multiset.
+
+Results keep their place in Zonemaster order (DNSResult.position). A delta
+only reuses base results in their base order, so added rows carry their
+place in the new check and removed rows the place they had in the base, and
+the reused results fill the remaining places in order.
+"""
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from sqlalchemy import delete, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.crud.bulk import chunks
+from app.models.dns_check import CheckStatus, DNSCheck, ResultStorage
+from app.models.dns_result import RESULT_REMOVED, DNSResult
+
+ResultKey = Tuple[str, str, str, str]
+
+class StoragePlan(NamedTuple):
+    """How to store the results of one check"""
+    storage: str
+    base_check_id: Optional[int]
+    # Per result: id of the base row it reuses, or None when it is inserted
+    base_ids: List[Optional[int]]
+    # Base results missing from this check, stored as RESULT_REMOVED rows
+    # with their position in the base
+    removed: List[dict]
+
+    def check_values(self) -> dict:
+        return {"storage": self.storage, "base_check_id": self.base_check_id}
+
+def full_plan(results_data: Sequence[dict]) -> StoragePlan:
+    return StoragePlan(ResultStorage.FULL.value, None, [None] * len(results_data), [])
+
+def result_key(result: Union[dict, DNSResult]) -> ResultKey:
+    if isinstance(result, dict):
+        return (result["level"], result["module"], result["tag"], result["message"])
+    return (result.level, result.module, result.tag, result.message)
+
+def apply_legacy_changes(live: List, rows: Sequence) -> List:
+    """
+    Apply a delta written without positions: a removal drops the matching
+    result with the highest id, and the list is kept in id order
+    """
+    entries: Dict[ResultKey, List] = defaultdict(list)
+    for entry in live:
+        entries[result_key(entry)].append(entry)
+    for row in rows:
+        matching = entries[result_key(row)]
+        if row.change == RESULT_REMOVED:
+            if matching:
+                matching.remove(max(matching, key=lambda entry: entry.id))
+        else:
+            matching.append(row)
+    return sorted((entry for matching in entries.values() for entry in matching), key=lambda entry: entry.id)
+
+def apply_changes(check_id: int, levels: Sequence[Sequence]) -> List[DNSResult]:
+    """
+    Fold the rows of a chain, snapshot first and then each delta in order,
+    into the full result list of `check_id` in position order, as unsaved
+    DNSResult objects carrying their position in that check
+    """
+    live: List = []
+    for rows in levels:
+        if any(row.position is None for row in rows):
+            live = apply_legacy_changes(live, rows)
+            continue
+        removed = {row.position for row in rows if row.change == RESULT_REMOVED}
+        added = {row.position: row for row in rows if row.change != RESULT_REMOVED}
+        kept = iter([entry for position, entry in enumerate(live, start=1) if position not in removed])
+        count = len(live) - len(removed) + len(added)
+        live = [added[position] if position in added else next(kept) for position in range(1, count + 1)]
+    return [
+        DNSResult(
+            id=entry.id,
+            dns_check_id=check_id,
+            position=position,
+            level=entry.level,
+            module=entry.module,
+            tag=entry.tag,
+            message=entry.message
+        )
+        for position, entry in enumerate(live, start=1)
+    ]
+
+async def load_results(db: AsyncSession, check_id: int) -> Tuple[List[DNSResult], int]:
+    """
+    Full result list of a check, in position order, with one recursive
+    query over its base_check_id chain. Also returns the number of deltas
+    the list was built from (0 for a full snapshot).
+    """
+    chain = (
+        select(DNSCheck.id, DNSCheck.base_check_id, literal(0).label("depth"))
+        .where(DNSCheck.id == check_id)
+        .cte("delta_chain", recursive=True)
+    )
+    chain = chain.union_all(
+        select(DNSCheck.id, DNSCheck.base_check_id, chain.c.depth + 1)
+        .where(DNSCheck.id == chain.c.base_check_id)
+    )
+    stmt = (
+        select(
+            chain.c.depth,
+            DNSResult.id,
+            DNSResult.level,
+            DNSResult.module,
+            DNSResult.tag,
+            DNSResult.message,
+            DNSResult.change,
+            DNSResult.position
+        )
+        .select_from(chain)
+        .outerjoin(DNSResult, DNSResult.dns_check_id == chain.c.id)
+        .order_by(chain.c.depth.desc(), DNSResult.id)
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return [], 0
+    depth = rows[0].depth
+    levels = [
+        [row for row in level_rows if row.id is not None]
+        for _, level_rows in groupby(rows, key=lambda row: row.depth)
+    ]
+    return apply_changes(check_id, levels), depth
+
+async def plan_storage(
+    db: AsyncSession,
+    domain: str,
+    profile: str,
+    results_data: Sequence[dict],
+    exclude_id: Optional[int] = None
+) -> StoragePlan:
+    """
+    Diff new results against the previous completed check of domain/profile
+    (other than `exclude_id`, the check being saved, checks whose messages
+    are only in the raw blob, and checks past RETENTION_DAYS).
+    Falls back to a full snapshot when delta storage is off, there is no
+    previous check, the chain has reached RESULTS_SNAPSHOT_INTERVAL, or the
+    delta would be no smaller.
+    """
+    if settings.RESULTS_STORAGE_MODE != ResultStorage.DELTA.value or settings.RESULTS_SNAPSHOT_INTERVAL <= 1:
+        return full_plan(results_data)
+
+    stmt = (
+        select(DNSCheck.id)
+        .where(
+            DNSCheck.domain == domain,
+            DNSCheck.profile == profile,
+            DNSCheck.status == CheckStatus.COMPLETED.value,
+            DNSCheck.storage.in_((ResultStorage.FULL.value, ResultStorage.DELTA.value))
+        )
+        .order_by(DNSCheck.id.desc())
+        .limit(1)
+    )
+    if exclude_id is not None:
+        stmt = stmt.where(DNSCheck.id != exclude_id)
+    if settings.RETENTION_DAYS > 0:
+        # Retention is about to delete older checks
+        stmt = stmt.where(DNSCheck.created_at >= datetime.now(timezone.utc) - timedelta(days=settings.RETENTION_DAYS))
+    base_check_id = (await db.execute(stmt)).scalar_one_or_none()
+    if base_check_id is None:
+        return full_plan(results_data)
+    base_results, depth = await load_results(db, base_check_id)
+    if depth + 1 >= settings.RESULTS_SNAPSHOT_INTERVAL:
+        return full_plan(results_data)
+
+    # Each result reuses the earliest matching base result after the one
+    # reused last, so reused results keep their base order; results that
+    # moved are removed and added again
+    reusable: Dict[ResultKey, Deque[int]] = defaultdict(deque)
+    for index, result in enumerate(base_results):
+        reusable[result_key(result)].append(index)
+    reused = [False] * len(base_results)
+    base_ids: List[Optional[int]] = []
+    last = -1
+    for result in results_data:
+        indexes = reusable[result_key(result)]
+        while indexes and indexes[0] < last:
+            indexes.popleft()
+        if indexes:
+            last = indexes.popleft()
+            reused[last] = True
+            base_ids.append(base_results[last].id)
+        else:
+            base_ids.append(None)
+    removed = [
+        {**dict(zip(("level", "module", "tag", "message"), result_key(result))), "position": result.position}
+        for result, kept in zip(base_results, reused)
+        if not kept
+    ]
+
+    if base_ids.count(None) + len(removed) >= len(results_data):
+        return full_plan(results_data)
+    return StoragePlan(ResultStorage.DELTA.value, base_check_id, base_ids, removed)
+
+async def materialize(db: AsyncSession, check_id: int) -> None:
+    """
+    Rewrite a delta-stored check as a full snapshot, e.g. before its base is
+    deleted. Result ids change; positions do not. The caller commits.
+    """
+    results, _ = await load_results(db, check_id)
+    rows = [
+        {
+            "dns_check_id": check_id,
+            "level": result.level,
+            "module": result.module,
+            "tag": result.tag,
+            "message": result.message,
+            "change": None,
+            "position": result.position
+        }
+        for result in results
+    ]
+    await db.execute(delete(DNSResult).where(DNSResult.dns_check_id == check_id))
+    for chunk in chunks(rows, settings.RESULTS_INSERT_CHUNK_SIZE):
+        await db.execute(insert(DNSResult), chunk)
+    await db.execute(
+        update(DNSCheck)
+        .where(DNSCheck.id == check_id)
+        .values(storage=ResultStorage.FULL.value, base_check_id=None)
+    )
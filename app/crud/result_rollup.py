@@ -0,0 +1,146 @@
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, func, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import result_storage
+from app.crud.bulk import chunks
+from app.core.config import settings
+from app.core.datetimes import as_utc
+from app.models.dns_check import ROW_STORAGES, CheckStatus, DNSCheck
+from app.models.dns_result import DNSResult
+from app.models.result_rollup import ROLLUP_PERIODS, ResultRollup
+
+ROLLUP_DIMENSIONS = ("level", "module", "tag")
+
+def bucket_start(moment: datetime, period: str) -> datetime:
+    """Start of the UTC hour or day containing `moment`"""
+    moment = as_utc(moment).replace(minute=0, second=0, microsecond=0)
+    if period == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+def hour_start(dialect_name: str):
+    """SQL expression for the UTC hour of a check's completed_at"""
+    if dialect_name == "sqlite":
+        return func.strftime(literal_column("'%Y-%m-%d %H:00:00'"), DNSCheck.completed_at)
+    return func.date_trunc(literal_column("'hour'"), func.timezone(literal_column("'UTC'"), DNSCheck.completed_at))
+
+class ResultRollupCRUD:
+    def _upsert(self, db: AsyncSession):
+        dialect = db.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(ResultRollup)
+        return stmt.on_conflict_do_update(
+            index_elements=["period", "bucket_start", *ROLLUP_DIMENSIONS],
+            set_={"count": ResultRollup.count + stmt.excluded.count}
+        )
+    
+    async def _add_counts(self, db: AsyncSession, counts: Counter) -> None:
+        # Sorted so concurrent writers lock rows in the same order
+        rows = [
+            {"period": period, "bucket_start": start, "level": level, "module": module, "tag": tag, "count": count}
+            for (period, start, level, module, tag), count in sorted(counts.items())
+        ]
+        for chunk in chunks(rows, settings.RESULTS_INSERT_CHUNK_SIZE):
+            await db.execute(self._upsert(db), chunk)
+    
+    async def add_results(
+        self,
+        db: AsyncSession,
+        checks: Iterable[Tuple[datetime, Sequence[dict]]]
+    ) -> None:
+        """
+        Count the results of newly completed checks, given as
+        (completed_at, results) pairs, into every rollup period with one
+        upsert per chunk of keys. Runs in the caller's transaction.
+        """
+        counts: Counter = Counter()
+        for completed_at, results in checks:
+            for period in ROLLUP_PERIODS:
+                start = bucket_start(completed_at, period)
+                for result in results:
+                    counts[(period, start, result["level"], result["module"], result["tag"])] += 1
+        if counts:
+            await self._add_counts(db, counts)
+    
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        Recompute all rollups from dns_results: one aggregate query per hour
+        bucket and key over checks with a row per result, rolled up to days in
+        Python; checks stored as deltas or raw blobs are rebuilt and counted
+        one by one. Commits; returns the number of rollup rows written.
+        Checks completing while it runs may be missed or counted twice, so
+        run it again if writes were not paused.
+        """
+        completed = (DNSCheck.status == CheckStatus.COMPLETED.value, DNSCheck.completed_at.is_not(None))
+        hour = hour_start(db.get_bind().dialect.name).label("hour")
+        stmt = (
+            select(hour, DNSResult.level, DNSResult.module, DNSResult.tag, func.count().label("count"))
+            .join(DNSCheck, DNSCheck.id == DNSResult.dns_check_id)
+            .where(*completed, DNSCheck.storage.in_(ROW_STORAGES))
+            .group_by(hour, DNSResult.level, DNSResult.module, DNSResult.tag)
+        )
+        counts: Counter = Counter()
+        for row in (await db.execute(stmt)).all():
+            started = datetime.fromisoformat(row.hour) if isinstance(row.hour, str) else row.hour
+            for period in ROLLUP_PERIODS:
+                counts[(period, bucket_start(started, period), row.level, row.module, row.tag)] += row.count
+        
+        rebuilt_checks = await db.execute(
+            select(DNSCheck.id, DNSCheck.storage, DNSCheck.completed_at)
+            .where(*completed, DNSCheck.storage.not_in(ROW_STORAGES))
+        )
+        for check_id, storage, completed_at in rebuilt_checks.all():
+            results = await result_storage.load_results(db, check_id, storage)
+            for period in ROLLUP_PERIODS:
+                start = bucket_start(completed_at, period)
+                for result in results:
+                    counts[(period, start, result.level, result.module, result.tag)] += 1
+        
+        await db.execute(delete(ResultRollup))
+        await self._add_counts(db, counts)
+        await db.commit()
+        return len(counts)
+    
+    async def delete_hourly_before(self, db: AsyncSession, cutoff: datetime) -> int:
+        """Drop hourly buckets older than `cutoff` (daily ones are kept); the caller commits"""
+        result = await db.execute(
+            delete(ResultRollup).where(
+                ResultRollup.period == "hour",
+                ResultRollup.bucket_start < bucket_start(cutoff, "hour")
+            )
+        )
+        return result.rowcount
+    
+    async def get_stats(
+        self,
+        db: AsyncSession,
+        period: str,
+        since: datetime,
+        until: datetime,
+        group_by: List[str],
+        level: Optional[str] = None,
+        module: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> List[dict]:
+        """Result counts per bucket in [since, until), grouped by the given dimensions"""
+        dimensions = [getattr(ResultRollup, name) for name in group_by]
+        stmt = (
+            select(ResultRollup.bucket_start, *dimensions, func.sum(ResultRollup.count).label("count"))
+            .where(
+                ResultRollup.period == period,
+                ResultRollup.bucket_start >= bucket_start(since, period),
+                ResultRollup.bucket_start < as_utc(until)
+            )
+            .group_by(ResultRollup.bucket_start, *dimensions)
+            .order_by(ResultRollup.bucket_start, *dimensions)
+        )
+        for name, value in (("level", level), ("module", module), ("tag", tag)):
+            if value is not None:
+                stmt = stmt.where(getattr(ResultRollup, name) == value)
+        result = await db.execute(stmt)
+        return [row._asdict() for row in result.all()]
+
+result_rollup_crud = ResultRollupCRUD()
@@ -0,0 +1,129 @@
+"""
+Where a check's results live, by DNSCheck.storage: dns_results rows (full),
+rows relative to a base check (delta, see result_delta), only the
+compressed raw Zonemaster payload in dns_checks.raw_results (raw), or the
+payload plus a row per result with the fields filters need (level, module,
+tag) and its position, the index of the result in the payload (indexed).
+The raw blob can also be kept next to the rows with RESULTS_KEEP_RAW, so
+historical checks can be parsed again later.
+"""
+import json
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import compression
+from app.core.config import settings
+from app.crud import result_delta
+from app.crud.result_delta import StoragePlan
+from app.models.dns_check import DNSCheck, ResultStorage
+from app.models.dns_result import DNSResult
+
+def parse_zonemaster_results(raw_results: Sequence[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Parse raw Zonemaster results into our format"""
+    parsed_results = []
+
+    for result in raw_results:
+        # Extract fields from Zonemaster result format
+        # This is a simplified parser - real implementation would need
+        # to handle the actual Zonemaster result structure
+        parsed_result = {
+            "level": result.get("level", "INFO"),
+            "module": result.get("module", "UNKNOWN"),
+            "tag": result.get("tag", "UNKNOWN"),
+            "message": result.get("message", str(result))
+        }
+        parsed_results.append(parsed_result)
+
+    return parsed_results
+
+def keeps_raw() -> bool:
+    return settings.RESULTS_KEEP_RAW or settings.RESULTS_STORAGE_MODE in (
+        ResultStorage.RAW.value,
+        ResultStorage.INDEXED.value
+    )
+
+def encode_raw(raw_results: Optional[Sequence[Dict[str, Any]]]) -> dict:
+    """
+    raw_results / raw_codec column values for a finished check: empty when
+    raw payloads are not kept, NULLs when there is no payload (failed checks)
+    """
+    if not keeps_raw():
+        return {}
+    if raw_results is None:
+        return {"raw_results": None, "raw_codec": None}
+    codec = compression.resolve_codec(settings.RESULTS_RAW_CODEC)
+    data = json.dumps(list(raw_results), separators=(",", ":")).encode()
+    return {
+        "raw_results": compression.compress(data, codec, settings.RESULTS_RAW_LEVEL),
+        "raw_codec": codec
+    }
+
+def decode_raw(blob: bytes, codec: str) -> List[Dict[str, Any]]:
+    return json.loads(compression.decompress(blob, codec))
+
+async def load_raw(db: AsyncSession, check_id: int) -> Optional[List[Dict[str, Any]]]:
+    """The raw Zonemaster results kept for a check, or None"""
+    result = await db.execute(
+        select(DNSCheck.raw_results, DNSCheck.raw_codec).where(DNSCheck.id == check_id)
+    )
+    row = result.one_or_none()
+    if row is None or row.raw_results is None:
+        return None
+    return decode_raw(row.raw_results, row.raw_codec)
+
+# Columns of an indexed result row; the message comes from the blob
+INDEXED_COLUMNS = (DNSResult.id, DNSResult.position, DNSResult.level, DNSResult.module, DNSResult.tag)
+
+async def attach_messages(db: AsyncSession, check_id: int, rows: Sequence[Row]) -> List[DNSResult]:
+    """
+    Indexed rows (INDEXED_COLUMNS) of a check as unsaved DNSResult objects,
+    with the messages parsed from its raw blob, which is only read when
+    there are rows
+    """
+    if not rows:
+        return []
+    parsed = parse_zonemaster_results(await load_raw(db, check_id) or [])
+    return [
+        DNSResult(
+            id=row.id,
+            dns_check_id=check_id,
+            position=row.position,
+            level=row.level,
+            module=row.module,
+            tag=row.tag,
+            message=parsed[row.position - 1]["message"]
+        )
+        for row in rows
+    ]
+
+async def load_results(db: AsyncSession, check_id: int, storage: str) -> List[DNSResult]:
+    """
+    Full result list of a check that is not stored as plain rows. Results of
+    raw-stored checks are parsed from the blob as unsaved DNSResult objects
+    whose ids and positions number them 1..n in payload order.
+    """
+    if storage == ResultStorage.INDEXED.value:
+        rows = await db.execute(
+            select(*INDEXED_COLUMNS).where(DNSResult.dns_check_id == check_id).order_by(DNSResult.position)
+        )
+        return await attach_messages(db, check_id, rows.all())
+    if storage == ResultStorage.RAW.value:
+        raw_results = await load_raw(db, check_id) or []
+        return [
+            DNSResult(id=number, dns_check_id=check_id, position=number, **result)
+            for number, result in enumerate(parse_zonemaster_results(raw_results), start=1)
+        ]
+    results, _ = await result_delta.load_results(db, check_id)
+    return results
+
+async def plan_storage(
+    db: AsyncSession,
+    domain: str,
+    profile: str,
+    results_data: Sequence[dict],
+    exclude_id: Optional[int] = None
+) -> StoragePlan:
+    """Storage of a newly completed check under RESULTS_STORAGE_MODE"""
+    if settings.RESULTS_STORAGE_MODE in (ResultStorage.RAW.value, ResultStorage.INDEXED.value):
+        return StoragePlan(settings.RESULTS_STORAGE_MODE, None, [None] * len(results_data), [])
+    return await result_delta.plan_storage(db, domain, profile, results_data, exclude_id)
@@ -1,4 +1,4 @@
 from .base import Base
-from .session import get_db, init_db
+from .session import enable_sqlite_foreign_keys, get_db, get_session_factory, init_db, instrument_engine
 
-__all__ = ["Base", "get_db", "init_db"]
\ No newline at end of file
+__all__ = ["Base", "enable_sqlite_foreign_keys", "get_db", "get_session_factory", "init_db", "instrument_engine"]
\ No newline at end of file
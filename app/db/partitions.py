@@ -0,0 +1,116 @@
+"""
+Monthly range partitioning of dns_results on Postgres.
+
+Partitions are named dns_results_pYYYYMM and cover one UTC month of
+dns_results.created_at, so expired results are removed by dropping whole
+partitions instead of deleting rows. dns_checks stays a plain table: the
+ON DELETE CASCADE foreign key from dns_results needs a unique key on
+dns_checks.id alone, which a partitioned dns_checks cannot have.
+"""
+import re
+from datetime import datetime, timezone
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PARENT = "dns_results"
+PARTITION_NAME = re.compile(r"^dns_results_p(\d{4})(\d{2})$")
+
+def month_start(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+def add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT}_p{start.year:04d}{start.month:02d}"
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    result = await db.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))"),
+        {"name": PARENT}
+    )
+    return bool(result.scalar())
+
+async def ensure_partitions(db: AsyncSession, start: datetime, end: datetime) -> List[str]:
+    """Create the monthly partitions covering [start, end); returns all their names"""
+    names = []
+    month = month_start(start)
+    while month < end:
+        upper = add_months(month, 1)
+        name = partition_name(month)
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        names.append(name)
+        month = upper
+    return names
+
+async def drop_partitions_before(db: AsyncSession, cutoff: datetime) -> List[str]:
+    """Drop the partitions whose whole month ends at or before `cutoff`"""
+    result = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:name)"
+        ),
+        {"name": PARENT}
+    )
+    dropped = []
+    for name in sorted(result.scalars()):
+        match = PARTITION_NAME.match(name)
+        if not match:
+            continue
+        start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+        if add_months(start, 1) <= cutoff:
+            await db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
+
+async def convert_to_partitioned(db: AsyncSession, months_ahead: int) -> List[str]:
+    """
+    Rebuild dns_results as a table partitioned by month of created_at and
+    copy the existing rows over, in the caller's transaction. Takes an
+    exclusive lock on dns_results for the duration of the copy.
+    """
+    statements = [
+        f"ALTER TABLE {PARENT} RENAME TO {PARENT}_unpartitioned",
+        f"ALTER TABLE {PARENT}_unpartitioned RENAME CONSTRAINT {PARENT}_pkey TO {PARENT}_unpartitioned_pkey",
+        f"ALTER TABLE {PARENT}_unpartitioned RENAME CONSTRAINT {PARENT}_dns_check_id_fkey "
+        f"TO {PARENT}_unpartitioned_dns_check_id_fkey",
+        "ALTER INDEX IF EXISTS ix_dns_results_dns_check_id_level "
+        "RENAME TO ix_dns_results_unpartitioned_dns_check_id_level",
+        "ALTER INDEX IF EXISTS ix_dns_results_id RENAME TO ix_dns_results_unpartitioned_id",
+        f"CREATE TABLE {PARENT} (LIKE {PARENT}_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)",
+        f"ALTER TABLE {PARENT} ADD CONSTRAINT {PARENT}_pkey PRIMARY KEY (id, created_at)",
+        f"ALTER TABLE {PARENT} ADD CONSTRAINT {PARENT}_dns_check_id_fkey "
+        f"FOREIGN KEY (dns_check_id) REFERENCES dns_checks (id) ON DELETE CASCADE",
+        f"CREATE INDEX ix_dns_results_dns_check_id_level ON {PARENT} (dns_check_id, level)",
+    ]
+    for statement in statements:
+        await db.execute(text(statement))
+
+    # The id sequence belongs to the old table and would be dropped with it
+    sequence = (await db.execute(
+        text("SELECT pg_get_serial_sequence(:table, 'id')"),
+        {"table": f"{PARENT}_unpartitioned"}
+    )).scalar()
+    if sequence:
+        await db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT}.id"))
+
+    oldest = (await db.execute(text(f"SELECT min(created_at) FROM {PARENT}_unpartitioned"))).scalar()
+    now = datetime.now(timezone.utc)
+    names = await ensure_partitions(
+        db,
+        oldest or now,
+        add_months(month_start(now), months_ahead + 1)
+    )
+    await db.execute(text(f"INSERT INTO {PARENT} SELECT * FROM {PARENT}_unpartitioned"))
+    await db.execute(text(f"DROP TABLE {PARENT}_unpartitioned"))
+    return names
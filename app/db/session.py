@@ -1,16 +1,60 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import time
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from app.core import metrics, profiling
 from app.core.config import settings
 from .base import Base
 
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def enable_sqlite_foreign_keys(engine: AsyncEngine) -> None:
+    """SQLite ignores ON DELETE CASCADE unless foreign keys are enabled per connection"""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _enable_foreign_keys)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    metrics.observe_query(seconds)
+    profiling.record("db", seconds)
+
+def _handle_error(context):
+    # A failed statement gets no after_cursor_execute
+    if context.connection is not None and context.execution_context is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            seconds = time.perf_counter() - started.pop()
+            metrics.observe_query(seconds)
+            profiling.record("db", seconds)
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement for /metrics and Server-Timing, and expose the engine's pool in /metrics"""
+    if not settings.METRICS_ENABLED and not settings.PROFILING_ENABLED:
+        return
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+    metrics.track_pool(engine.sync_engine.pool)
+
 def create_async_db_engine():
-    return create_async_engine(
+    engine = create_async_engine(
         settings.DATABASE_URL,
         echo=settings.DEBUG,
         pool_pre_ping=True,
     )
+    enable_sqlite_foreign_keys(engine)
+    instrument_engine(engine)
+    return engine
 
-def create_async_session_factory():
-    engine = create_async_db_engine()
+def create_async_session_factory(engine: Optional[AsyncEngine] = None):
+    if engine is None:
+        engine = create_async_db_engine()
     return async_sessionmaker(
         engine,
         class_=AsyncSession,
@@ -24,7 +68,13 @@ AsyncSessionLocal = None
 def init_db():
     global async_engine, AsyncSessionLocal
     async_engine = create_async_db_engine()
-    AsyncSessionLocal = create_async_session_factory()
+    AsyncSessionLocal = create_async_session_factory(async_engine)
+
+def get_session_factory() -> async_sessionmaker:
+    """Session factory for work that outlives the request (background jobs)"""
+    if AsyncSessionLocal is None:
+        init_db()
+    return AsyncSessionLocal
 
 async def get_db() -> AsyncSession:
     if AsyncSessionLocal is None:
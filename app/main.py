@@ -4,16 +4,28 @@ zonemaster-api - Backend de Serviço de Verificação de Saúde de DNS
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.api import metrics
+from app.api.profiling import ProfilingMiddleware
 from app.api.v1.api import api_router
 from app.core.config import settings
 from app.db import init_db
+from app.services.monitoring import monitoring_scheduler
+from app.services.retention import retention_service
+from app.services.zonemaster_service import zonemaster_service
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     init_db()
+    await zonemaster_service.startup()
+    await retention_service.startup()
+    if settings.MONITOR_ENABLED:
+        await monitoring_scheduler.startup()
     yield
     # Shutdown
+    await monitoring_scheduler.shutdown()
+    await retention_service.shutdown()
+    await zonemaster_service.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -34,7 +46,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so latency covers the whole stack
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
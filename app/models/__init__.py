@@ -1,4 +1,33 @@
-from .dns_check import DNSCheck
-from .dns_result import DNSResult
+from .check_batch import CheckBatch
+from .check_job import CheckJob, CheckPriority, JobStatus
+from .dns_check import ROW_STORAGES, CheckStatus, DNSCheck, ResultStorage
+from .dns_result import (
+    COUNTED_LEVELS,
+    RESULT_ADDED,
+    RESULT_LEVELS,
+    RESULT_REMOVED,
+    DNSResult,
+    levels_at_or_above
+)
+from .monitored_domain import MonitoredDomain
+from .result_rollup import ROLLUP_PERIODS, ResultRollup
 
-__all__ = ["DNSCheck", "DNSResult"]
\ No newline at end of file
+__all__ = [
+    "CheckBatch",
+    "CheckJob",
+    "CheckPriority",
+    "CheckStatus",
+    "COUNTED_LEVELS",
+    "DNSCheck",
+    "DNSResult",
+    "JobStatus",
+    "MonitoredDomain",
+    "RESULT_ADDED",
+    "RESULT_LEVELS",
+    "RESULT_REMOVED",
+    "ResultRollup",
+    "ResultStorage",
+    "ROLLUP_PERIODS",
+    "ROW_STORAGES",
+    "levels_at_or_above"
+]
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import List, TYPE_CHECKING
+from sqlalchemy import DateTime, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.db.base import Base
+
+if TYPE_CHECKING:
+    from .dns_check import DNSCheck
+
+class CheckBatch(Base):
+    __tablename__ = "check_batches"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.current_timestamp(),
+        nullable=False
+    )
+    
+    # Relationship
+    checks: Mapped[List["DNSCheck"]] = relationship(
+        "DNSCheck",
+        back_populates="batch"
+    )
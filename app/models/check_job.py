@@ -0,0 +1,73 @@
+import enum
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+class CheckPriority(str, enum.Enum):
+    """Scheduling lane of a check, most urgent first"""
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    BACKGROUND = "background"
+
+class CheckJob(Base):
+    """
+    A queued check for the worker processes (CHECK_QUEUE=worker).
+
+    available_at is when the job may be claimed: for a queued job the
+    earliest (re)try, for a leased one the end of the lease, which the
+    worker's heartbeat keeps pushing forward. A leased job whose lease ran
+    out is claimed again, and resumes the Zonemaster test recorded in
+    test_id/backend_url if there is one. Workers claim each priority lane
+    separately, so interactive jobs are not stuck behind a batch backlog.
+    """
+    __tablename__ = "check_jobs"
+    __table_args__ = (
+        # Claimable jobs of a lane, oldest first
+        Index("ix_check_jobs_priority_status_available_at", "priority", "status", "available_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    check_id: Mapped[int] = mapped_column(
+        ForeignKey("dns_checks.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True
+    )
+    domain: Mapped[str] = mapped_column(String(255), nullable=False)
+    profile: Mapped[str] = mapped_column(String(64), nullable=False, default="default", server_default="default")
+    priority: Mapped[str] = mapped_column(
+        String(16),
+        nullable=False,
+        default=CheckPriority.INTERACTIVE.value,
+        server_default=CheckPriority.INTERACTIVE.value
+    )
+    status: Mapped[str] = mapped_column(
+        String(10),
+        nullable=False,
+        default=JobStatus.QUEUED.value,
+        server_default=JobStatus.QUEUED.value
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.current_timestamp(),
+        nullable=False
+    )
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    test_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    backend_url: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.current_timestamp(),
+        nullable=False
+    )
@@ -1,26 +1,116 @@
-from datetime import datetime
-from typing import List, TYPE_CHECKING
-from sqlalchemy import DateTime, String, func
+import enum
+from datetime import datetime, timezone
+from typing import List, Optional, TYPE_CHECKING
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, LargeBinary, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
 if TYPE_CHECKING:
+    from .check_batch import CheckBatch
     from .dns_result import DNSResult
 
+class CheckStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ResultStorage(str, enum.Enum):
+    # Every result row belongs to the check
+    FULL = "full"
+    # Rows are the additions and removals against base_check_id
+    DELTA = "delta"
+    # No rows; results are parsed from raw_results when read
+    RAW = "raw"
+    # A row per result without its message, which is read from raw_results
+    INDEXED = "indexed"
+
+# Storage modes with a dns_results row per result to filter on
+ROW_STORAGES = (ResultStorage.FULL.value, ResultStorage.INDEXED.value)
+
 class DNSCheck(Base):
     __tablename__ = "dns_checks"
+    __table_args__ = (
+        # Keyset pagination of the listing: ORDER BY created_at DESC, id DESC
+        Index("ix_dns_checks_created_at_id", "created_at", "id"),
+        # Per-domain lookups and the domain history, in time order
+        Index("ix_dns_checks_domain_created_at", "domain", "created_at"),
+    )
+    # Fetch server defaults with the INSERT (RETURNING) instead of a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    domain: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    domain: Mapped[str] = mapped_column(String(255), nullable=False)
+    profile: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        default="default",
+        server_default="default"
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        # Set client-side with microseconds so (created_at, id) keyset cursors
+        # compare exactly; SQLite's current_timestamp only has seconds
+        default=lambda: datetime.now(timezone.utc),
         server_default=func.current_timestamp(),
         nullable=False
     )
     
-    # Relationship
+    # Job state
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default=CheckStatus.COMPLETED.value,
+        server_default=CheckStatus.COMPLETED.value
+    )
+    progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    test_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    batch_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("check_batches.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True
+    )
+    
+    # How the results are stored; counters always describe the full result list
+    storage: Mapped[str] = mapped_column(
+        String(8),
+        nullable=False,
+        default=ResultStorage.FULL.value,
+        server_default=ResultStorage.FULL.value
+    )
+    # No ON DELETE action on purpose: deleting a base that delta checks still
+    # depend on fails (checked per statement, so a base and its deltas can go
+    # together); retention rewrites the dependents in full first
+    base_check_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("dns_checks.id"),
+        nullable=True,
+        index=True
+    )
+    # Compressed JSON of the raw Zonemaster results (RESULTS_KEEP_RAW or raw
+    # storage). Deferred: only read when the full results are requested
+    raw_results: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    raw_codec: Mapped[Optional[str]] = mapped_column(String(8), nullable=True)
+    
+    # Result counters, written once when the results are saved
+    results_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    info_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    notice_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    warning_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    error_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    critical_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Relationships
+    batch: Mapped[Optional["CheckBatch"]] = relationship(
+        "CheckBatch",
+        back_populates="checks"
+    )
     results: Mapped[List["DNSResult"]] = relationship(
         "DNSResult",
         back_populates="dns_check",
-        cascade="all, delete-orphan"
-    )
\ No newline at end of file
+        order_by="DNSResult.position",
+        cascade="all, delete-orphan",
+        # Leave deleting results to ON DELETE CASCADE instead of loading them
+        passive_deletes=True
+    )
@@ -1,24 +1,57 @@
-from typing import TYPE_CHECKING
-from sqlalchemy import ForeignKey, String, Text
+from datetime import datetime
+from typing import List, Optional, TYPE_CHECKING
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
 if TYPE_CHECKING:
     from .dns_check import DNSCheck
 
+# Zonemaster message levels, least to most severe
+RESULT_LEVELS = ("DEBUG", "INFO", "NOTICE", "WARNING", "ERROR", "CRITICAL")
+# Levels with a denormalized <level>_count column on dns_checks
+COUNTED_LEVELS = ("INFO", "NOTICE", "WARNING", "ERROR", "CRITICAL")
+
+# Values of DNSResult.change for the rows of a delta-stored check
+RESULT_ADDED = "+"
+RESULT_REMOVED = "-"
+
+def levels_at_or_above(level: str) -> List[str]:
+    """Levels at least as severe as `level`; raises ValueError for unknown levels"""
+    return list(RESULT_LEVELS[RESULT_LEVELS.index(level.upper()):])
+
 class DNSResult(Base):
     __tablename__ = "dns_results"
+    __table_args__ = (
+        # Serves the FK lookups (results of a check, cascades) and the
+        # per-check level filters of GET /checks/{id}/results
+        Index("ix_dns_results_dns_check_id_level", "dns_check_id", "level"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     dns_check_id: Mapped[int] = mapped_column(
         ForeignKey("dns_checks.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True
+        nullable=False
+    )
+    level: Mapped[str] = mapped_column(String(50), nullable=False)
+    module: Mapped[str] = mapped_column(String(100), nullable=False)
+    tag: Mapped[str] = mapped_column(String(100), nullable=False)
+    # NULL in indexed storage, where it is read from the raw blob
+    message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # NULL for full results; RESULT_ADDED / RESULT_REMOVED in delta storage
+    change: Mapped[Optional[str]] = mapped_column(String(1), nullable=True)
+    # 1-based place in the check's results, in Zonemaster order; stable
+    # across storage modes, unlike ids, and the index into the raw payload
+    # of an indexed check. A RESULT_REMOVED row holds the place
+    # of the removed result in the base check. NULL only in delta rows
+    # written before positions existed
+    position: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Insert time; the monthly partition key when dns_results is partitioned
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.current_timestamp(),
+        nullable=False
     )
-    level: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
-    module: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
-    tag: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
-    message: Mapped[str] = mapped_column(Text, nullable=False)
     
     # Relationship
     dns_check: Mapped["DNSCheck"] = relationship(
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint, func, true
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class MonitoredDomain(Base):
+    """
+    A domain re-checked every `interval_seconds` by the monitoring scheduler.
+    next_run_at is when the next check is due; claiming a run moves it one
+    interval (with jitter) ahead, so replicas never claim the same run.
+    """
+    __tablename__ = "monitored_domains"
+    __table_args__ = (
+        UniqueConstraint("domain", "profile", name="uq_monitored_domains_domain_profile"),
+        # Due rows, in due order
+        Index("ix_monitored_domains_enabled_next_run_at", "enabled", "next_run_at"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    domain: Mapped[str] = mapped_column(String(255), nullable=False)
+    profile: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        default="default",
+        server_default="default"
+    )
+    interval_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default=true())
+    next_run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_check_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("dns_checks.id", ondelete="SET NULL"),
+        nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.current_timestamp(),
+        nullable=False
+    )
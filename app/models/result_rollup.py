@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+# Bucket sizes kept in result_rollups; each result is counted once per period
+ROLLUP_PERIODS = ("hour", "day")
+
+class ResultRollup(Base):
+    """
+    Number of results per (period, bucket, level, module, tag), bucketed by
+    the completion time of their check (UTC). Maintained incrementally when
+    results are saved; rebuilt from dns_results by app.commands.rebuild_stats.
+    """
+    __tablename__ = "result_rollups"
+
+    period: Mapped[str] = mapped_column(String(8), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    level: Mapped[str] = mapped_column(String(50), primary_key=True)
+    module: Mapped[str] = mapped_column(String(100), primary_key=True)
+    tag: Mapped[str] = mapped_column(String(100), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
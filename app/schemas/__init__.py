@@ -1,13 +1,44 @@
 from .dns_check import (
     DNSCheckCreate,
     DNSCheckResponse,
+    DNSCheckJobResponse,
     DNSCheckListResponse,
     DNSResultResponse
 )
+from .check_batch import (
+    DNSCheckBatchCreate,
+    DNSCheckBatchItem,
+    DNSCheckBatchResponse
+)
+from .domain_history import (
+    DomainHistoryResponse,
+    DomainTrendBucket
+)
+from .monitored_domain import (
+    MonitoredDomainBulkCreate,
+    MonitoredDomainBulkResponse,
+    MonitoredDomainCreate,
+    MonitoredDomainResponse,
+    MonitoredDomainUpdate
+)
+from .stats import StatsBucket, StatsResponse
 
 __all__ = [
     "DNSCheckCreate",
     "DNSCheckResponse", 
+    "DNSCheckJobResponse",
     "DNSCheckListResponse",
-    "DNSResultResponse"
-]
\ No newline at end of file
+    "DNSResultResponse",
+    "DNSCheckBatchCreate",
+    "DNSCheckBatchItem",
+    "DNSCheckBatchResponse",
+    "DomainHistoryResponse",
+    "DomainTrendBucket",
+    "MonitoredDomainBulkCreate",
+    "MonitoredDomainBulkResponse",
+    "MonitoredDomainCreate",
+    "MonitoredDomainResponse",
+    "MonitoredDomainUpdate",
+    "StatsBucket",
+    "StatsResponse"
+]
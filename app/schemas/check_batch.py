@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict
+
+class DNSCheckBatchCreate(BaseModel):
+    domains: List[str] = Field(..., min_length=1, description="Domains to check")
+
+class DNSCheckBatchItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    domain: str
+    status: str
+    error: Optional[str] = None
+
+class DNSCheckBatchResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    created_at: datetime
+    status: str
+    total: int
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    progress: int = Field(default=0, ge=0, le=100, description="Finished checks in percent")
+    checks: List[DNSCheckBatchItem] = []
@@ -1,6 +1,11 @@
 from datetime import datetime
-from typing import List
-from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+
+def normalize_domain(domain: str) -> str:
+    """Lower-case and drop the trailing dot so equal zones compare equal"""
+    domain = domain.strip().lower()
+    return domain if domain == "." else domain.rstrip(".")
 
 class DNSResultResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -13,19 +18,54 @@ class DNSResultResponse(BaseModel):
 
 class DNSCheckCreate(BaseModel):
     domain: str = Field(..., min_length=1, max_length=255, description="Domain to check")
+    profile: str = Field(default="default", min_length=1, max_length=64, description="Zonemaster profile")
+    
+    @field_validator("domain")
+    @classmethod
+    def _normalize_domain(cls, value: str) -> str:
+        value = normalize_domain(value)
+        if not value:
+            raise ValueError("domain must not be blank")
+        return value
 
 class DNSCheckResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
     id: int
     domain: str
+    profile: str = "default"
     created_at: datetime
+    status: str = "completed"
+    progress: int = Field(default=100, ge=0, le=100, description="Zonemaster test progress in percent")
+    error: Optional[str] = None
+    completed_at: Optional[datetime] = None
+    results_count: int = 0
+    info_count: int = 0
+    notice_count: int = 0
+    warning_count: int = 0
+    error_count: int = 0
+    critical_count: int = 0
     results: List[DNSResultResponse] = []
 
+class DNSCheckJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    domain: str
+    created_at: datetime
+    status: str
+    progress: int = Field(default=0, ge=0, le=100, description="Zonemaster test progress in percent")
+
 class DNSCheckListResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
     id: int
     domain: str
     created_at: datetime
-    results_count: int = Field(default=0, description="Number of results for this check")
\ No newline at end of file
+    status: str = "completed"
+    results_count: int = Field(default=0, description="Number of results for this check")
+    info_count: int = 0
+    notice_count: int = 0
+    warning_count: int = 0
+    error_count: int = 0
+    critical_count: int = 0
\ No newline at end of file
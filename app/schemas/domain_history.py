@@ -0,0 +1,18 @@
+from datetime import date
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from .dns_check import DNSCheckListResponse
+
+class DomainTrendBucket(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    period_start: date = Field(..., description="First day of the day/week bucket (weeks start on Monday, UTC)")
+    checks: int = 0
+    warning_count: int = 0
+    error_count: int = 0
+    critical_count: int = 0
+
+class DomainHistoryResponse(BaseModel):
+    domain: str
+    checks: List[DNSCheckListResponse] = []
+    trend: Optional[List[DomainTrendBucket]] = None
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+from app.schemas.dns_check import normalize_domain
+
+# Shortest re-check interval accepted, in seconds
+MIN_INTERVAL_SECONDS = 60
+
+class MonitoredDomainCreate(BaseModel):
+    domain: str = Field(..., min_length=1, max_length=255, description="Domain to re-check")
+    profile: str = Field(default="default", min_length=1, max_length=64, description="Zonemaster profile")
+    interval_seconds: int = Field(..., ge=MIN_INTERVAL_SECONDS, description="Seconds between checks")
+    
+    @field_validator("domain")
+    @classmethod
+    def _normalize_domain(cls, value: str) -> str:
+        value = normalize_domain(value)
+        if not value:
+            raise ValueError("domain must not be blank")
+        return value
+
+class MonitoredDomainBulkCreate(BaseModel):
+    domains: List[str] = Field(..., min_length=1, description="Domains to re-check")
+    profile: str = Field(default="default", min_length=1, max_length=64, description="Zonemaster profile")
+    interval_seconds: int = Field(..., ge=MIN_INTERVAL_SECONDS, description="Seconds between checks")
+
+class MonitoredDomainBulkResponse(BaseModel):
+    added: int
+    skipped: int = Field(description="Domains already monitored with this profile")
+
+class MonitoredDomainUpdate(BaseModel):
+    interval_seconds: Optional[int] = Field(None, ge=MIN_INTERVAL_SECONDS, description="Seconds between checks")
+    enabled: Optional[bool] = None
+
+class MonitoredDomainResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    domain: str
+    profile: str
+    interval_seconds: int
+    enabled: bool
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    last_check_id: Optional[int] = None
+    created_at: datetime
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+class StatsBucket(BaseModel):
+    bucket_start: datetime
+    level: Optional[str] = None
+    module: Optional[str] = None
+    tag: Optional[str] = None
+    count: int
+
+class StatsResponse(BaseModel):
+    period: str
+    since: datetime
+    until: datetime
+    group_by: List[str]
+    buckets: List[StatsBucket] = []
@@ -1,3 +1,4 @@
+from .retention import retention_service
 from .zonemaster_service import zonemaster_service
 
-__all__ = ["zonemaster_service"]
\ No newline at end of file
+__all__ = ["retention_service", "zonemaster_service"]
\ No newline at end of file
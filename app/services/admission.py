@@ -0,0 +1,274 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+from app.core import metrics
+from app.models.check_job import CheckPriority
+
+class AdmissionRejected(Exception):
+    """Raised when work cannot be admitted; `retry_after` is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class Lane:
+    """One priority class: its weight, its cap on slots and its waiters"""
+
+    def __init__(self, name: str, weight: float, max_concurrent: int):
+        self.name = name
+        self.weight = weight
+        self.max_concurrent = max_concurrent
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Slots granted so far divided by weight; the lowest goes next
+        self.virtual_time = 0.0
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "weight": self.weight,
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.wait_total / self.admitted * 1000, 1) if self.admitted else None,
+            "max_wait_ms": round(self.wait_max * 1000, 1)
+        }
+
+class AdmissionController:
+    """
+    Global limit on Zonemaster tests in flight, with a bounded wait queue,
+    shared by priority lanes (CheckPriority).
+
+    When slots are contended they go to the waiting lanes in proportion to
+    their weights (the lane with the least slots granted per unit of weight
+    goes next, FIFO within a lane), and a lane never holds more than its own
+    `max_concurrent`. The other lanes together never hold more than
+    `max_concurrent - interactive_reserved`, which keeps that many slots
+    for interactive checks however large the backlog behind them. A lane
+    that was idle rejoins at the current virtual time rather than with
+    credit saved up.
+
+    Interactive callers wait at most `queue_timeout` seconds, and only while
+    fewer than `max_queued` others are waiting in their lane; otherwise they
+    are rejected with a Retry-After estimate. Background work (jobs,
+    batches) waits without bound but is still counted in the queue depth.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queued: int,
+        queue_timeout: float,
+        lanes: Optional[Dict[str, Tuple[float, int]]] = None,
+        interactive_reserved: int = 0
+    ):
+        if not 0 <= interactive_reserved < max_concurrent:
+            raise ValueError(
+                f"Reserved interactive slots ({interactive_reserved}) must be at least 0 "
+                f"and below the slot limit ({max_concurrent})"
+            )
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        if lanes is None:
+            lanes = {priority.value: (1, 0) for priority in CheckPriority}
+        if any(weight <= 0 for weight, _ in lanes.values()):
+            raise ValueError("Priority lane weights must be positive")
+        # Slots the non-interactive lanes share
+        self.shared_limit = max_concurrent - interactive_reserved
+        # (weight, max_concurrent); a limit of 0 means all the lane may use
+        self.lanes = {}
+        for name, (weight, limit) in lanes.items():
+            cap = max_concurrent if name == CheckPriority.INTERACTIVE.value else self.shared_limit
+            self.lanes[name] = Lane(name, weight, min(limit, cap) if limit > 0 else cap)
+        self.in_flight = 0
+        self.shared_in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.released = 0
+
+    def retry_after(self, lane: Optional[Lane] = None) -> int:
+        """Seconds until a slot is likely free, from the average time slots are held"""
+        average_hold = self.hold_total / self.released if self.released else 1.0
+        if lane is None:
+            return max(1, math.ceil(average_hold * (self.queued + 1) / self.max_concurrent))
+        return max(1, math.ceil(average_hold * (lane.queued + 1) / lane.max_concurrent))
+
+    def share(self, lane: Optional[str] = None) -> float:
+        """Fraction of the slots `lane`, or the non-interactive lanes together, may hold at most"""
+        if lane is None:
+            return self.shared_limit / self.max_concurrent
+        return self.lanes[lane].max_concurrent / self.max_concurrent
+
+    def _lane_open(self, lane: Lane) -> bool:
+        """Whether `lane` is under its own limit and, unless interactive, under the shared one"""
+        if lane.in_flight >= lane.max_concurrent:
+            return False
+        return lane.name == CheckPriority.INTERACTIVE.value or self.shared_in_flight < self.shared_limit
+
+    def _has_room(self, lane: Lane) -> bool:
+        return self.in_flight < self.max_concurrent and self._lane_open(lane)
+
+    def _grant(self, lane: Lane) -> None:
+        self.in_flight += 1
+        lane.in_flight += 1
+        if lane.name != CheckPriority.INTERACTIVE.value:
+            self.shared_in_flight += 1
+        lane.virtual_time += 1 / lane.weight
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, lane by weighted fair order"""
+        while self.in_flight < self.max_concurrent:
+            ready = [lane for lane in self.lanes.values() if lane.waiters and self._lane_open(lane)]
+            if not ready:
+                return
+            # Ties go to the lane listed first (the most urgent)
+            lane = min(ready, key=lambda lane: lane.virtual_time)
+            waiter = lane.waiters.popleft()
+            if waiter.done():
+                # Timed out or cancelled while queued
+                continue
+            self._grant(lane)
+            waiter.set_result(None)
+
+    def _release(self, lane: Lane) -> None:
+        self.in_flight -= 1
+        lane.in_flight -= 1
+        if lane.name != CheckPriority.INTERACTIVE.value:
+            self.shared_in_flight -= 1
+        self._dispatch()
+
+    def _activate(self, lane: Lane) -> None:
+        """Bring a lane that had nothing queued or running up to the busy lanes' virtual time"""
+        if lane.waiters or lane.in_flight:
+            return
+        busy = [other.virtual_time for other in self.lanes.values() if other.waiters or other.in_flight]
+        if busy:
+            lane.virtual_time = max(lane.virtual_time, min(busy))
+
+    @asynccontextmanager
+    async def slot(self, lane: str = CheckPriority.INTERACTIVE.value, bounded: bool = True) -> AsyncIterator[None]:
+        queue = self.lanes[lane]
+        started = time.monotonic()
+        if self._has_room(queue) and not queue.waiters:
+            self._activate(queue)
+            self._grant(queue)
+        else:
+            if bounded and queue.queued >= self.max_queued:
+                self.rejected += 1
+                queue.rejected += 1
+                raise AdmissionRejected(f"Zonemaster {lane} queue is full", self.retry_after(queue))
+            
+            self._activate(queue)
+            waiter = asyncio.get_running_loop().create_future()
+            queue.waiters.append(waiter)
+            self.queued += 1
+            queue.queued += 1
+            self._dispatch()
+            try:
+                await asyncio.wait_for(waiter, self.queue_timeout if bounded else None)
+            except asyncio.TimeoutError:
+                if waiter.cancelled() or not waiter.done():
+                    self.timed_out += 1
+                    queue.timed_out += 1
+                    raise AdmissionRejected(
+                        f"No Zonemaster slot freed up within {self.queue_timeout:g}s",
+                        self.retry_after(queue)
+                    )
+                # Granted in the same loop iteration the timeout fired: the slot is ours
+            except BaseException:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted just as the caller gave up
+                    self._release(queue)
+                raise
+            finally:
+                self.queued -= 1
+                queue.queued -= 1
+
+        admitted_at = time.monotonic()
+        waited = admitted_at - started
+        metrics.admission_wait.observe(waited, lane)
+        self.admitted += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        queue.admitted += 1
+        queue.wait_total += waited
+        queue.wait_max = max(queue.wait_max, waited)
+        try:
+            yield
+        finally:
+            self.released += 1
+            self.hold_total += time.monotonic() - admitted_at
+            self._release(queue)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "interactive_reserved": self.max_concurrent - self.shared_limit,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.wait_total / self.admitted * 1000, 1) if self.admitted else None,
+            "max_wait_ms": round(self.wait_max * 1000, 1),
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()}
+        }
+
+class RateLimiter:
+    """
+    Token buckets per client key: `rate_per_minute` tokens refill
+    continuously up to `burst`. The least recently seen clients are dropped
+    beyond `max_clients` (a dropped client simply starts with a full bucket).
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, key: str, cost: float = 1.0) -> None:
+        """Take `cost` tokens for `key` or raise AdmissionRejected"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens < cost:
+            self._buckets[key] = (tokens, now)
+            self.limited += 1
+            raise AdmissionRejected(
+                "Rate limit exceeded",
+                max(1, math.ceil((cost - tokens) / self.rate))
+            )
+        self._buckets[key] = (tokens - cost, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "clients": len(self._buckets),
+            "limited": self.limited
+        }
@@ -0,0 +1,175 @@
+import enum
+import itertools
+import time
+from contextlib import contextmanager
+from typing import Collection, Iterator, List, NamedTuple, Optional
+
+class CircuitState(str, enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class NoBackendAvailable(Exception):
+    """Every Zonemaster backend is unhealthy or has its circuit open"""
+
+class ZonemasterBackend:
+    """
+    One Zonemaster JSON-RPC endpoint with its circuit breaker and counters.
+
+    The circuit opens after `failure_threshold` consecutive failures
+    (transport errors, timeouts, 5xx). Once `reset_timeout` seconds have
+    passed a single probe request is let through (half-open): success closes
+    the circuit, failure opens it again.
+    """
+
+    def __init__(self, url: str, failure_threshold: int, reset_timeout: float):
+        self.url = url
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        # Numbers the probes, so only the lease that is the current probe ends it
+        self.probes = 0
+        self.healthy = True
+        self.last_error: Optional[str] = None
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def available(self, now: float) -> bool:
+        """Whether a new test may be routed here, moving OPEN to HALF_OPEN when due"""
+        if not self.healthy:
+            return False
+        if self.state == CircuitState.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = CircuitState.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == CircuitState.HALF_OPEN:
+            return not self.probe_in_flight
+        return self.state == CircuitState.CLOSED
+
+    def _open(self, now: float) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = now
+        self.probe_in_flight = False
+
+    def _close(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_request(self, latency: float, error: Optional[str] = None) -> None:
+        """Count a request that reached the backend (error: JSON-RPC/4xx error, not a failure)"""
+        self.requests += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        if error is not None:
+            self.errors += 1
+            self.last_error = error
+        if self.state != CircuitState.CLOSED or self.consecutive_failures:
+            self._close()
+
+    def record_failure(self, latency: float, error: str, timeout: bool = False) -> None:
+        """Count a request the backend failed to serve and feed the circuit breaker"""
+        self.requests += 1
+        self.errors += 1
+        self.timeouts += int(timeout)
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.last_error = error
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open(time.monotonic())
+
+    def record_health(self, healthy: bool, error: Optional[str] = None) -> None:
+        """Outcome of a background probe; a passing probe also closes a due circuit"""
+        self.healthy = healthy
+        if not healthy:
+            self.last_error = error
+        elif self.state != CircuitState.CLOSED and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._close()
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "circuit": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_latency_ms": round(self.latency_total / self.requests * 1000, 1) if self.requests else None,
+            "max_latency_ms": round(self.latency_max * 1000, 1),
+            "last_error": self.last_error
+        }
+
+class BackendLease(NamedTuple):
+    """A backend handed out by the pool; `probe` numbers the half-open probe it carries, if any"""
+    backend: ZonemasterBackend
+    probe: Optional[int] = None
+
+class BackendPool:
+    """Routes each test to the available backend with the fewest outstanding tests"""
+
+    def __init__(self, urls: List[str], failure_threshold: int, reset_timeout: float):
+        if not urls:
+            raise ValueError("At least one Zonemaster backend URL is required")
+        self.backends = [ZonemasterBackend(url, failure_threshold, reset_timeout) for url in urls]
+        # Rotates the starting point so ties are spread round-robin
+        self._turn = itertools.count()
+
+    def acquire(self, exclude: Collection[ZonemasterBackend] = ()) -> BackendLease:
+        """Lease the least loaded available backend; the caller must release the lease"""
+        now = time.monotonic()
+        start = next(self._turn) % len(self.backends)
+        rotated = self.backends[start:] + self.backends[:start]
+        candidates = [
+            backend for backend in rotated
+            if backend not in exclude and backend.available(now)
+        ]
+        if not candidates:
+            raise NoBackendAvailable("No Zonemaster backend available")
+        backend = min(candidates, key=lambda b: b.outstanding)
+        probe = None
+        if backend.state == CircuitState.HALF_OPEN:
+            backend.probe_in_flight = True
+            backend.probes += 1
+            probe = backend.probes
+        backend.outstanding += 1
+        return BackendLease(backend, probe)
+
+    def acquire_url(self, url: str) -> BackendLease:
+        """
+        Lease the backend at `url` whatever its circuit state, to follow a
+        test started there earlier; the caller must release the lease
+        """
+        for backend in self.backends:
+            if backend.url == url:
+                backend.outstanding += 1
+                return BackendLease(backend)
+        raise NoBackendAvailable(f"Zonemaster backend {url} is not configured")
+
+    def release(self, lease: BackendLease) -> None:
+        backend = lease.backend
+        backend.outstanding -= 1
+        # A probe that ended without a recorded outcome must not block the
+        # backend; other leases (tests started before the circuit opened)
+        # leave a probe sent since then in flight
+        if lease.probe is not None and lease.probe == backend.probes:
+            backend.probe_in_flight = False
+
+    @contextmanager
+    def lease(self, exclude: Collection[ZonemasterBackend] = ()) -> Iterator[ZonemasterBackend]:
+        lease = self.acquire(exclude)
+        try:
+            yield lease.backend
+        finally:
+            self.release(lease)
+
+    def stats(self) -> List[dict]:
+        return [backend.stats() for backend in self.backends]
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.schemas.dns_check import DNSCheckResponse
+
+CacheKey = Tuple[str, str]
+
+class CheckResultCache:
+    """
+    In-process LRU/TTL cache of completed checks keyed by (domain, profile),
+    with single-flight coalescing of concurrent runs for the same key.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, DNSCheckResponse]]" = OrderedDict()
+        self._in_flight: Dict[CacheKey, asyncio.Future] = {}
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _completed_at(check: DNSCheckResponse) -> float:
+        completed_at = check.completed_at or check.created_at
+        if completed_at.tzinfo is None:
+            completed_at = completed_at.replace(tzinfo=timezone.utc)
+        return completed_at.timestamp()
+
+    def get(self, key: CacheKey, max_age: int) -> Optional[DNSCheckResponse]:
+        """Return a cached check completed at most max_age seconds ago"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        completed_at, check = entry
+        age = time.time() - completed_at
+        if age > self.ttl:
+            del self._entries[key]
+            return None
+        if age > max_age:
+            return None
+        self._entries.move_to_end(key)
+        return check
+
+    def put(self, key: CacheKey, check: DNSCheckResponse) -> None:
+        completed_at = self._completed_at(check)
+        current = self._entries.get(key)
+        if current is not None and current[0] > completed_at:
+            return
+        self._entries[key] = (completed_at, check)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def single_flight(
+        self,
+        key: CacheKey,
+        run: Callable[[], Awaitable[DNSCheckResponse]]
+    ) -> DNSCheckResponse:
+        """
+        Run `run` unless a run for the same key is already in flight, in which
+        case wait for that one and share its outcome.
+        """
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled (e.g. its client went away); retry
+                # as leader unless this waiter itself is being cancelled.
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            check = await run()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so waiter-less failures are not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(check)
+            return check
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._entries),
+            "in_flight": len(self._in_flight)
+        }
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.crud.check_job import ClaimedJob, check_job_crud
+from app.crud.dns_check import dns_check_crud
+from app.models.check_job import CheckPriority
+from app.models.dns_check import CheckStatus
+from app.services.zonemaster_service import zonemaster_service
+
+logger = logging.getLogger(__name__)
+
+FINISHED = (CheckStatus.COMPLETED.value, CheckStatus.FAILED.value)
+
+class CheckWorker:
+    """
+    Runs the checks queued in check_jobs (CHECK_QUEUE=worker).
+
+    Jobs are claimed WORKER_CLAIM_BATCH at a time while fewer than
+    WORKER_CONCURRENCY are in flight, interactive ones first, and batch and
+    background jobs only up to their lanes' share of the slots, together
+    leaving the reserved interactive share free. A claimed job is leased
+    for WORKER_LEASE_SECONDS and a heartbeat renews the leases every third
+    of that, so a job whose worker died is claimed again once its lease
+    runs out. Each job records the Zonemaster test it started, and the next
+    attempt resumes polling that test instead of starting another. A failed
+    attempt is retried after WORKER_RETRY_DELAY, doubled for each further
+    attempt, until the check is marked failed after WORKER_MAX_ATTEMPTS.
+    On stop, running jobs are handed back with their tests for another
+    worker to resume.
+    """
+
+    def __init__(self, owner: Optional[str] = None):
+        self.owner = owner or f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = settings.WORKER_CONCURRENCY
+        self.claim_batch = settings.WORKER_CLAIM_BATCH
+        self.poll_interval = settings.WORKER_POLL_INTERVAL
+        self.lease_seconds = settings.WORKER_LEASE_SECONDS
+        self.max_attempts = settings.WORKER_MAX_ATTEMPTS
+        self.retry_delay = settings.WORKER_RETRY_DELAY
+        # Most urgent lane first; batch and background get the share of
+        # slots their admission lanes have, so some are left for interactive jobs
+        self.lane_limits = {
+            priority.value: max(1, int(self.concurrency * zonemaster_service.admission.share(priority.value)))
+            for priority in CheckPriority
+        }
+        self.shared_limit = max(1, int(self.concurrency * zonemaster_service.admission.share()))
+        self._jobs: Dict[int, asyncio.Task] = {}
+        self._lane_jobs: Dict[str, int] = {priority.value: 0 for priority in CheckPriority}
+        self._stopping = asyncio.Event()
+        self.claimed = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def stats(self) -> dict:
+        return {
+            "owner": self.owner,
+            "in_flight": len(self._jobs),
+            "lanes": dict(self._lane_jobs),
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed
+        }
+
+    async def run(self, session_factory: async_sessionmaker) -> None:
+        """Claim and run jobs until stop() is called"""
+        heartbeat = asyncio.create_task(self._heartbeat_loop(session_factory))
+        try:
+            while not self._stopping.is_set():
+                try:
+                    claimed = await self.claim_once(session_factory)
+                except Exception:
+                    logger.exception("Claiming check jobs failed")
+                    claimed = 0
+                # Straight back for more while a full batch came back and slots are free
+                if claimed < self.claim_batch or len(self._jobs) >= self.concurrency:
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            await self._release_all(session_factory)
+
+    async def claim_once(self, session_factory: async_sessionmaker) -> int:
+        """Claim jobs for the free slots, lane by lane, and start them; returns how many were claimed"""
+        claimed = 0
+        async with session_factory() as db:
+            for lane, lane_limit in self.lane_limits.items():
+                limit = min(
+                    self.claim_batch - claimed,
+                    self.concurrency - len(self._jobs),
+                    lane_limit - self._lane_jobs[lane]
+                )
+                if lane != CheckPriority.INTERACTIVE.value:
+                    interactive = self._lane_jobs[CheckPriority.INTERACTIVE.value]
+                    limit = min(limit, self.shared_limit - (len(self._jobs) - interactive))
+                if limit <= 0:
+                    continue
+                jobs = await check_job_crud.claim(
+                    db,
+                    self.owner,
+                    datetime.now(timezone.utc),
+                    limit,
+                    self.lease_seconds,
+                    lane
+                )
+                for job in jobs:
+                    self._start(session_factory, job)
+                claimed += len(jobs)
+        self.claimed += claimed
+        return claimed
+
+    def _start(self, session_factory: async_sessionmaker, job: ClaimedJob) -> None:
+        task = asyncio.create_task(self._process(session_factory, job))
+        self._jobs[job.id] = task
+        self._lane_jobs[job.priority] += 1
+
+        def done(_: asyncio.Task) -> None:
+            self._jobs.pop(job.id, None)
+            self._lane_jobs[job.priority] -= 1
+
+        task.add_done_callback(done)
+
+    async def wait_idle(self) -> None:
+        """Wait for the jobs started so far"""
+        while self._jobs:
+            await asyncio.gather(*list(self._jobs.values()), return_exceptions=True)
+
+    async def _heartbeat_loop(self, session_factory: async_sessionmaker) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.heartbeat(session_factory)
+            except Exception:
+                logger.exception("Check job heartbeat failed")
+
+    async def heartbeat(self, session_factory: async_sessionmaker) -> None:
+        """Renew the leases of running jobs, and stop those whose lease was lost"""
+        ids = list(self._jobs)
+        async with session_factory() as db:
+            held = await check_job_crud.heartbeat(db, self.owner, ids, datetime.now(timezone.utc), self.lease_seconds)
+        for id in ids:
+            task = self._jobs.get(id)
+            if id not in held and task is not None:
+                # Another worker has taken it over
+                logger.warning("Lost the lease on check job %d", id)
+                task.cancel()
+
+    async def _process(self, session_factory: async_sessionmaker, job: ClaimedJob) -> None:
+        try:
+            async with session_factory() as db:
+                state = await dns_check_crud.get_state(db, job.check_id)
+                if state is None or state.status in FINISHED:
+                    # Finished by an attempt that lost its lease just before completing
+                    await check_job_crud.complete(db, job.id, self.owner)
+                    return
+                if job.attempts > self.max_attempts:
+                    # Leases ran out on every attempt (workers died mid-check)
+                    await self._give_up(db, job, f"Gave up after {self.max_attempts} attempts")
+                    return
+
+                async def on_started(test_id: str, backend_url: str) -> None:
+                    await check_job_crud.record_test(db, job.id, self.owner, test_id, backend_url)
+
+                resume = (job.test_id, job.backend_url) if job.test_id and job.backend_url else None
+                try:
+                    await zonemaster_service.execute_check(
+                        db,
+                        job.check_id,
+                        job.domain,
+                        job.profile,
+                        job.priority,
+                        resume=resume,
+                        on_started=on_started
+                    )
+                except Exception as e:
+                    if job.attempts >= self.max_attempts:
+                        await self._give_up(db, job, str(e))
+                    else:
+                        await self._retry(db, job, str(e))
+                    return
+                await check_job_crud.complete(db, job.id, self.owner)
+                self.completed += 1
+        except Exception:
+            # Left leased; retried once the lease runs out
+            logger.exception("Check job %d failed", job.id)
+
+    async def _retry(self, db: AsyncSession, job: ClaimedJob, error: str) -> None:
+        delay = self.retry_delay * 2 ** (job.attempts - 1)
+        await check_job_crud.retry(
+            db,
+            job.id,
+            self.owner,
+            error,
+            datetime.now(timezone.utc) + timedelta(seconds=delay)
+        )
+        await dns_check_crud.update_state(db, job.check_id, status=CheckStatus.QUEUED.value, progress=0, error=error)
+        self.retried += 1
+
+    async def _give_up(self, db: AsyncSession, job: ClaimedJob, error: str) -> None:
+        await zonemaster_service.fail_check(db, job.check_id, Exception(error))
+        await check_job_crud.fail(db, job.id, self.owner, error)
+        self.failed += 1
+
+    async def _release_all(self, session_factory: async_sessionmaker) -> None:
+        """Stop the running jobs and hand them back, tests included, for another worker to resume"""
+        ids = list(self._jobs)
+        tasks = list(self._jobs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not ids:
+            return
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            for id in ids:
+                await check_job_crud.release(db, id, self.owner, now)
+        logger.info("Released %d check jobs", len(ids))
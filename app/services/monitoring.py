@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional, Set
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.config import settings
+from app.crud.monitored_domain import DueRun, monitored_domain_crud
+from app.db import get_session_factory
+from app.models.check_job import CheckPriority
+from app.schemas.dns_check import DNSCheckCreate
+from app.services.zonemaster_service import zonemaster_service
+
+logger = logging.getLogger(__name__)
+
+class MonitoringScheduler:
+    """
+    Re-checks monitored_domains on their intervals (MONITOR_ENABLED).
+
+    Every MONITOR_POLL_INTERVAL seconds due domains are claimed, at most as
+    many as there are free slots under MONITOR_CONCURRENCY, and each claimed
+    run is recorded as a queued check and driven by
+    ZonemasterService.run_check_job, or left in check_jobs for the worker
+    processes with CHECK_QUEUE=worker, in the background lane. Starts are
+    spaced out to MONITOR_MAX_STARTS_PER_MINUTE, so the backend sees a
+    steady stream rather than every due domain at once. Claims are atomic in the database,
+    so any number of replicas can run the scheduler side by side.
+    """
+
+    def __init__(self):
+        self.poll_interval = settings.MONITOR_POLL_INTERVAL
+        self.batch_size = settings.MONITOR_BATCH_SIZE
+        self.concurrency = settings.MONITOR_CONCURRENCY
+        self.starts_per_minute = settings.MONITOR_MAX_STARTS_PER_MINUTE
+        self._task: Optional[asyncio.Task] = None
+        self._runs: Set[asyncio.Task] = set()
+        self._next_start = 0.0
+        self.claimed = 0
+        self.started = 0
+
+    async def startup(self, session_factory: Optional[async_sessionmaker] = None) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(session_factory or get_session_factory()))
+
+    async def shutdown(self) -> None:
+        tasks = list(self._runs)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "in_flight": len(self._runs),
+            "claimed": self.claimed,
+            "started": self.started
+        }
+
+    async def _loop(self, session_factory: async_sessionmaker) -> None:
+        while True:
+            try:
+                await self.run_once(session_factory)
+            except Exception:
+                logger.exception("Monitoring run failed")
+            await asyncio.sleep(self.poll_interval)
+
+    def _claim_limit(self) -> int:
+        limit = min(self.batch_size, self.concurrency - len(self._runs))
+        if self.starts_per_minute > 0:
+            # No more than can be started before the next poll
+            limit = min(limit, max(1, int(self.starts_per_minute * self.poll_interval / 60)))
+        return limit
+
+    async def _pace(self) -> None:
+        if self.starts_per_minute <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        delay = self._next_start - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._next_start = max(self._next_start, loop.time()) + 60 / self.starts_per_minute
+
+    async def run_once(self, session_factory: async_sessionmaker) -> int:
+        """Claim due domains and start their checks; returns how many were started"""
+        limit = self._claim_limit()
+        if limit <= 0:
+            return 0
+        async with session_factory() as db:
+            due = await monitored_domain_crud.claim_due(db, datetime.now(timezone.utc), limit)
+        self.claimed += len(due)
+        for run in due:
+            await self._pace()
+            task = asyncio.create_task(self._run(session_factory, run))
+            self._runs.add(task)
+            task.add_done_callback(self._runs.discard)
+            self.started += 1
+        return len(due)
+
+    async def wait_idle(self) -> None:
+        """Wait for the checks started so far"""
+        while self._runs:
+            await asyncio.gather(*list(self._runs), return_exceptions=True)
+
+    async def _run(self, session_factory: async_sessionmaker, run: DueRun) -> None:
+        try:
+            async with session_factory() as db:
+                check = await zonemaster_service.enqueue_check(
+                    db,
+                    DNSCheckCreate(domain=run.domain, profile=run.profile),
+                    CheckPriority.BACKGROUND.value
+                )
+                await monitored_domain_crud.record_check(db, run.monitored_id, check.id)
+            if not settings.uses_worker_queue:
+                await zonemaster_service.run_check_job(
+                    session_factory,
+                    check.id,
+                    run.domain,
+                    run.profile,
+                    CheckPriority.BACKGROUND.value
+                )
+        except Exception:
+            logger.exception("Scheduled check of %s failed to start", run.domain)
+
+monitoring_scheduler = MonitoringScheduler()
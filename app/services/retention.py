@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.crud.dns_check import dns_check_crud
+from app.crud.result_rollup import result_rollup_crud
+from app.db import get_session_factory
+from app.db import partitions
+
+logger = logging.getLogger(__name__)
+
+class RetentionService:
+    """
+    Periodic enforcement of RETENTION_DAYS.
+
+    Finished checks older than the window are deleted RETENTION_BATCH_SIZE at
+    a time, one transaction per batch, and their results follow through
+    ON DELETE CASCADE. When dns_results is partitioned (Postgres), upcoming
+    monthly partitions are created and expired ones dropped afterwards, so
+    a run cut short never leaves checks whose results are gone, and delta
+    checks outliving their base are rewritten from its results before the
+    rows can go.
+    """
+
+    def __init__(self):
+        self.retention_days = settings.RETENTION_DAYS
+        self.interval = settings.RETENTION_INTERVAL
+        self.batch_size = settings.RETENTION_BATCH_SIZE
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[dict] = None
+
+    async def startup(self, session_factory: Optional[async_sessionmaker] = None) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(session_factory or get_session_factory()))
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self, session_factory: async_sessionmaker) -> None:
+        while True:
+            try:
+                await self.run_once(session_factory)
+            except Exception:
+                logger.exception("Retention run failed")
+            await asyncio.sleep(self.interval)
+
+    async def _delete_expired(self, db: AsyncSession, cutoff: datetime, summary: dict) -> None:
+        while True:
+            deleted = await dns_check_crud.delete_finished_before(db, cutoff, self.batch_size)
+            summary["checks_deleted"] += deleted
+            if deleted < self.batch_size:
+                break
+            # Let request handlers in between batches
+            await asyncio.sleep(0)
+        await result_rollup_crud.delete_hourly_before(db, cutoff)
+        await db.commit()
+
+    async def run_once(self, session_factory: async_sessionmaker) -> dict:
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=self.retention_days) if self.retention_days > 0 else None
+        summary = {"cutoff": cutoff, "checks_deleted": 0, "partitions_dropped": []}
+        bind = session_factory.kw.get("bind")
+        if cutoff is None and (bind is None or bind.dialect.name != "postgresql"):
+            # Nothing to delete and no partitions to maintain
+            return summary
+
+        async with session_factory() as db:
+            if cutoff is not None:
+                await self._delete_expired(db, cutoff, summary)
+            if await partitions.is_partitioned(db):
+                await partitions.ensure_partitions(
+                    db,
+                    now,
+                    partitions.add_months(partitions.month_start(now), settings.RESULTS_PARTITION_MONTHS_AHEAD + 1)
+                )
+                if cutoff is not None:
+                    summary["partitions_dropped"] = await partitions.drop_partitions_before(db, cutoff)
+                await db.commit()
+            if cutoff is None:
+                return summary
+
+        if summary["checks_deleted"] or summary["partitions_dropped"]:
+            logger.info(
+                "Retention removed %d checks and %d result partitions older than %s",
+                summary["checks_deleted"], len(summary["partitions_dropped"]), cutoff.isoformat()
+            )
+        self.last_run = {**summary, "cutoff": cutoff.isoformat(), "finished_at": datetime.now(timezone.utc).isoformat()}
+        return summary
+
+retention_service = RetentionService()
@@ -1,99 +1,665 @@
+import asyncio
+import logging
+import time
 import httpx
-from typing import List, Dict, Any
-from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core import metrics, profiling
 from app.core.config import settings
-from app.crud.dns_check import dns_check_crud
+from app.crud import result_delta, result_storage
+from app.crud.check_job import check_job_crud
+from app.crud.dns_check import dns_check_crud, result_counters
 from app.crud.dns_result import dns_result_crud
-from app.schemas.dns_check import DNSCheckCreate, DNSCheckResponse
-from app.models.dns_check import DNSCheck
+from app.crud.result_rollup import result_rollup_crud
+from app.schemas.dns_check import DNSCheckCreate, DNSCheckResponse, DNSResultResponse
+from app.models.check_job import CheckPriority
+from app.models.dns_check import CheckStatus, DNSCheck
+from app.services.admission import AdmissionController, RateLimiter
+from app.services.backend_pool import BackendLease, BackendPool, ZonemasterBackend
+from app.services.check_cache import CheckResultCache
+
+logger = logging.getLogger(__name__)
 
 class ZonemasterService:
     def __init__(self):
-        self.api_url = settings.ZONEMASTER_API_URL
+        self.backends = BackendPool(
+            settings.zonemaster_api_urls,
+            failure_threshold=settings.ZONEMASTER_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.ZONEMASTER_CIRCUIT_RESET_TIMEOUT
+        )
+        self.admission = AdmissionController(
+            max_concurrent=settings.ZONEMASTER_MAX_CONCURRENT_TESTS,
+            max_queued=settings.ZONEMASTER_MAX_QUEUED_TESTS,
+            queue_timeout=settings.ZONEMASTER_QUEUE_TIMEOUT,
+            lanes=settings.zonemaster_lanes,
+            interactive_reserved=settings.ZONEMASTER_INTERACTIVE_RESERVED
+        )
+        metrics.track_admission(lambda: self.admission)
+        self.rate_limiter = RateLimiter(settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_BURST)
+        self.health_check_interval = settings.ZONEMASTER_HEALTH_CHECK_INTERVAL
+        self._health_task: Optional[asyncio.Task] = None
         self.timeout = settings.ZONEMASTER_API_TIMEOUT
+        self.poll_interval = settings.ZONEMASTER_POLL_INTERVAL
+        self.test_timeout = settings.ZONEMASTER_TEST_TIMEOUT
+        self._client: Optional[httpx.AsyncClient] = None
+        self.cache = CheckResultCache(
+            max_entries=settings.CHECK_CACHE_MAX_ENTRIES,
+            ttl=settings.CHECK_CACHE_TTL
+        )
     
-    async def _call_zonemaster_api(self, domain: str) -> List[Dict[str, Any]]:
-        """Call Zonemaster API via JSON-RPC 2.0"""
+    def _create_client(self) -> httpx.AsyncClient:
+        http2 = settings.ZONEMASTER_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("ZONEMASTER_HTTP2 is enabled but h2 is not installed; using HTTP/1.1")
+                http2 = False
+        
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                self.timeout,
+                connect=settings.ZONEMASTER_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.ZONEMASTER_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ZONEMASTER_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.ZONEMASTER_HTTP_KEEPALIVE_EXPIRY
+            ),
+            http2=http2,
+            headers={"Content-Type": "application/json"}
+        )
+    
+    async def startup(self) -> None:
+        """Open the shared, pooled HTTP client and start backend health checks"""
+        if self._client is None:
+            self._client = self._create_client()
+        if self.health_check_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_check_loop())
+    
+    async def shutdown(self) -> None:
+        """Stop health checks and close the shared HTTP client"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily when the service is used outside the app lifespan
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await asyncio.gather(*(self._probe(backend) for backend in self.backends.backends))
+    
+    async def _probe(self, backend: ZonemasterBackend) -> None:
+        """Mark a backend healthy if it answers version_info within the connect timeout"""
+        payload = {"jsonrpc": "2.0", "method": "version_info", "params": {}, "id": 1}
+        try:
+            response = await self.client.post(
+                backend.url,
+                json=payload,
+                timeout=settings.ZONEMASTER_CONNECT_TIMEOUT
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            if backend.healthy:
+                logger.warning("Zonemaster backend %s failed its health check: %s", backend.url, e)
+            backend.record_health(False, f"health check: {e!r}")
+        else:
+            if not backend.healthy:
+                logger.info("Zonemaster backend %s is healthy again", backend.url)
+            backend.record_health(True)
+    
+    def _can_fail_over(
+        self,
+        error: httpx.HTTPError,
+        tried: List[ZonemasterBackend],
+        backend: ZonemasterBackend
+    ) -> bool:
+        """
+        Whether a request that failed on `backend` should be sent to another
+        one: only for transport errors and 5xx, and while untried backends
+        remain. Records `backend` as tried.
+        """
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500:
+            return False
+        tried.append(backend)
+        now = time.monotonic()
+        return any(b not in tried and b.available(now) for b in self.backends.backends)
+    
+    async def _rpc(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        backend: Optional[ZonemasterBackend] = None
+    ) -> Any:
+        """
+        Send a single JSON-RPC 2.0 request to a Zonemaster backend: the given
+        one (calls about an existing test must go where it was started) or
+        the least loaded available one.
+        """
+        if backend is None:
+            tried: List[ZonemasterBackend] = []
+            while True:
+                with self.backends.lease(exclude=tried) as backend:
+                    try:
+                        return await self._rpc(method, params, backend)
+                    except httpx.HTTPError as e:
+                        if not self._can_fail_over(e, tried, backend):
+                            raise
+        
         payload = {
             "jsonrpc": "2.0",
-            "method": "start_domain_test",
-            "params": {
-                "domain": domain,
-                "profile": "default"
-            },
+            "method": method,
+            "params": params,
             "id": 1
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self.api_url,
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            )
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(backend.url, json=payload)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        except httpx.TimeoutException as e:
+            latency = time.perf_counter() - started
+            backend.record_failure(latency, repr(e), timeout=True)
+            self._observe_rpc(method, latency, "timeout")
+            raise
+        except httpx.HTTPStatusError as e:
+            latency = time.perf_counter() - started
+            backend.record_failure(latency, repr(e))
+            self._observe_rpc(method, latency, "http")
+            raise
+        except httpx.HTTPError as e:
+            latency = time.perf_counter() - started
+            backend.record_failure(latency, repr(e))
+            self._observe_rpc(method, latency, "transport")
+            raise
+        
+        latency = time.perf_counter() - started
+        if response.is_error:
+            backend.record_request(latency, error=f"HTTP {response.status_code}")
+            self._observe_rpc(method, latency, "http")
             response.raise_for_status()
+        
+        result = response.json()
+        
+        # Check for JSON-RPC error
+        if "error" in result:
+            backend.record_request(latency, error=str(result["error"]))
+            self._observe_rpc(method, latency, "rpc")
+            raise Exception(f"Zonemaster API error: {result['error']}")
+        
+        backend.record_request(latency)
+        self._observe_rpc(method, latency)
+        return result.get("result")
+    
+    @staticmethod
+    def _observe_rpc(method: str, latency: float, error: Optional[str] = None) -> None:
+        metrics.zonemaster_rpc_duration.observe(latency, method)
+        profiling.record("zonemaster", latency)
+        if error is not None:
+            metrics.zonemaster_rpc_errors.inc(method, error)
+    
+    async def _call_zonemaster_api(self, domain: str, profile: str = "default") -> List[Dict[str, Any]]:
+        """Call Zonemaster API via JSON-RPC 2.0"""
+        result = await self._rpc(
+            "start_domain_test",
+            {
+                "domain": domain,
+                "profile": profile
+            }
+        )
+        
+        # Return the results array from the response
+        return result or []
+    
+    async def _start_test(self, domain: str, profile: str) -> Tuple[BackendLease, Any]:
+        """
+        Start a test on the least loaded backend, failing over to the others
+        if it cannot be reached. Returns the backend's lease unreleased, since
+        the test can only be followed there; the caller releases it.
+        """
+        tried: List[ZonemasterBackend] = []
+        while True:
+            lease = self.backends.acquire(exclude=tried)
+            try:
+                test_id = await self._rpc(
+                    "start_domain_test",
+                    {
+                        "domain": domain,
+                        "profile": profile
+                    },
+                    lease.backend
+                )
+                return lease, test_id
+            except httpx.HTTPError as e:
+                self.backends.release(lease)
+                if not self._can_fail_over(e, tried, lease.backend):
+                    raise
+            except BaseException:
+                self.backends.release(lease)
+                raise
+    
+    async def _run_zonemaster_test(
+        self,
+        domain: str,
+        profile: str = "default",
+        on_started: Optional[Callable[[str, str], Awaitable[None]]] = None,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+        resume: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Drive a Zonemaster test through the backend protocol:
+        start_domain_test -> test_progress (polled) -> get_test_results
+        
+        The test stays on the backend it was started on, which counts it as
+        outstanding until the results are in. `resume` (test id, backend url)
+        picks up polling a test started earlier instead of starting one;
+        `on_started` is given the id and backend url of a new test.
+        """
+        if resume is not None:
+            test_id, url = resume
+            lease = self.backends.acquire_url(url)
+        else:
+            lease, test_id = await self._start_test(domain, profile)
+        backend = lease.backend
+        try:
+            if on_started and resume is None:
+                await on_started(test_id, backend.url)
             
-            result = response.json()
-            
-            # Check for JSON-RPC error
-            if "error" in result:
-                raise Exception(f"Zonemaster API error: {result['error']}")
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.test_timeout
+            last_progress = -1
+            while True:
+                progress = int(await self._rpc("test_progress", {"test_id": test_id}, backend))
+                if on_progress and progress != last_progress:
+                    await on_progress(progress)
+                last_progress = progress
+                if progress >= 100:
+                    break
+                if loop.time() >= deadline:
+                    raise Exception(f"Zonemaster test {test_id} did not finish in {self.test_timeout}s")
+                await asyncio.sleep(self.poll_interval)
             
-            # Return the results array from the response
-            return result.get("result", [])
+            result = await self._rpc("get_test_results", {"id": test_id, "language": "en"}, backend)
+            return (result or {}).get("results", [])
+        finally:
+            self.backends.release(lease)
     
     def _parse_zonemaster_results(self, raw_results: List[Dict[str, Any]]) -> List[Dict[str, str]]:
         """Parse raw Zonemaster results into our format"""
-        parsed_results = []
-        
-        for result in raw_results:
-            # Extract fields from Zonemaster result format
-            # This is a simplified parser - real implementation would need
-            # to handle the actual Zonemaster result structure
-            parsed_result = {
-                "level": result.get("level", "INFO"),
-                "module": result.get("module", "UNKNOWN"),
-                "tag": result.get("tag", "UNKNOWN"),
-                "message": result.get("message", str(result))
-            }
-            parsed_results.append(parsed_result)
-        
-        return parsed_results
+        return result_storage.parse_zonemaster_results(raw_results)
     
     async def run_check_and_save(
         self, 
         db: AsyncSession, 
-        domain: str
+        domain: str,
+        profile: str = "default",
+        max_age: Optional[int] = None
     ) -> DNSCheckResponse:
-        """Run DNS check via Zonemaster API and save results to database"""
-        try:
-            # Create DNS check record
-            dns_check_create = DNSCheckCreate(domain=domain)
-            dns_check = await dns_check_crud.create(db, dns_check_create)
-            
-            # Call Zonemaster API
-            raw_results = await self._call_zonemaster_api(domain)
+        """
+        Run DNS check via Zonemaster API and save results to database.
+        
+        With a freshness window (`max_age` seconds, CHECK_CACHE_MAX_AGE by
+        default) the most recent completed check of the same domain and profile
+        is returned instead, and concurrent requests share one in-flight run.
+        """
+        if max_age is None:
+            max_age = settings.CHECK_CACHE_MAX_AGE
+        if max_age <= 0:
+            return await self._run_and_save(db, domain, profile)
+        
+        key = (domain, profile)
+        cached = self.cache.get(key, max_age)
+        if cached is not None:
+            self.cache.hits += 1
+            return cached
+        
+        since = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+        recent = await dns_check_crud.get_latest_completed(db, domain, profile, since)
+        if recent is not None:
+            self.cache.db_hits += 1
+            check = DNSCheckResponse.model_validate(recent)
+            self.cache.put(key, check)
+            return check
+        
+        self.cache.misses += 1
+        return await self.cache.single_flight(
+            key,
+            lambda: self._run_and_save(db, domain, profile)
+        )
+    
+    async def _run_and_save(
+        self,
+        db: AsyncSession,
+        domain: str,
+        profile: str
+    ) -> DNSCheckResponse:
+        # Raises AdmissionRejected (not wrapped below) when the queue is full
+        async with self.admission.slot(CheckPriority.INTERACTIVE.value):
+            try:
+                # Call Zonemaster API
+                raw_results = await self._call_zonemaster_api(domain, profile)
+                
+                # Parse results
+                parsed_results = self._parse_zonemaster_results(raw_results)
+                
+                # Save check and results in one transaction
+                with profiling.span("save"):
+                    check = await self._save_check(
+                        db,
+                        DNSCheckCreate(domain=domain, profile=profile),
+                        parsed_results,
+                        raw_results
+                    )
+                self.cache.put((domain, profile), check)
+                return check
             
-            # Parse results
+            except httpx.HTTPError as e:
+                # Handle HTTP errors from Zonemaster API
+                raise Exception(f"Failed to connect to Zonemaster API: {str(e)}")
+            except Exception as e:
+                # Handle other errors
+                raise Exception(f"DNS check failed: {str(e)}")
+    
+    async def _save_check(
+        self,
+        db: AsyncSession,
+        dns_check_in: DNSCheckCreate,
+        parsed_results: List[Dict[str, str]],
+        raw_results: Optional[List[Dict[str, Any]]] = None
+    ) -> DNSCheckResponse:
+        """
+        Persist a finished check as one unit of work: insert the check, bulk
+        insert its results, commit once, and build the response from the data
+        already in memory instead of reading it back.
+        """
+        completed_at = datetime.now(timezone.utc)
+        counters = result_counters(parsed_results)
+        try:
+            plan = await result_storage.plan_storage(db, dns_check_in.domain, dns_check_in.profile, parsed_results)
+            dns_check = await dns_check_crud.create(
+                db,
+                dns_check_in,
+                status=CheckStatus.COMPLETED,
+                commit=False,
+                progress=100,
+                completed_at=completed_at,
+                **plan.check_values(),
+                **result_storage.encode_raw(raw_results),
+                **counters
+            )
+            result_ids = await dns_result_crud.create_bulk(
+                db,
+                dns_check.id,
+                parsed_results,
+                commit=False,
+                plan=plan
+            )
+            await result_rollup_crud.add_results(db, [(completed_at, parsed_results)])
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        metrics.check_results.observe(len(parsed_results))
+        
+        return DNSCheckResponse(
+            id=dns_check.id,
+            domain=dns_check.domain,
+            profile=dns_check.profile,
+            created_at=dns_check.created_at,
+            status=dns_check.status,
+            progress=dns_check.progress,
+            completed_at=completed_at,
+            **counters,
+            # In Zonemaster order, as results are read back
+            results=[
+                DNSResultResponse(id=result_id, **result) for result_id, result in zip(result_ids, parsed_results)
+            ]
+        )
+    
+    async def enqueue_check(
+        self,
+        db: AsyncSession,
+        dns_check: DNSCheckCreate,
+        priority: str = CheckPriority.INTERACTIVE.value
+    ) -> DNSCheck:
+        """
+        Record a queued DNS check, to be run by run_check_job or, with
+        CHECK_QUEUE=worker, together with its job in the `priority` lane for
+        the worker processes
+        """
+        if not settings.uses_worker_queue:
+            return await dns_check_crud.create(db, dns_check, status=CheckStatus.QUEUED)
+        check = await dns_check_crud.create(db, dns_check, status=CheckStatus.QUEUED, commit=False)
+        await check_job_crud.create_many(db, [(check.id, check.domain, check.profile)], priority)
+        await db.commit()
+        return check
+    
+    async def execute_check(
+        self,
+        db: AsyncSession,
+        check_id: int,
+        domain: str,
+        profile: str = "default",
+        priority: str = CheckPriority.INTERACTIVE.value,
+        resume: Optional[Tuple[str, str]] = None,
+        on_started: Optional[Callable[[str, str], Awaitable[None]]] = None
+    ) -> None:
+        """
+        Run a queued check in the `priority` lane and store its results,
+        keeping its status and progress up to date on the way. `resume` and
+        `on_started` are passed through to _run_zonemaster_test. Raises,
+        with the session rolled back, when the check fails; marking it
+        failed is up to the caller.
+        """
+        async def started(test_id: str, backend_url: str) -> None:
+            await dns_check_crud.update_state(
+                db,
+                check_id,
+                status=CheckStatus.RUNNING.value,
+                test_id=str(test_id),
+                progress=0
+            )
+            if on_started:
+                await on_started(str(test_id), backend_url)
+        
+        async def on_progress(progress: int) -> None:
+            await dns_check_crud.update_state(db, check_id, progress=min(progress, 100))
+        
+        try:
+            async with self.admission.slot(priority, bounded=False):
+                raw_results = await self._run_zonemaster_test(
+                    domain,
+                    profile,
+                    on_started=started,
+                    on_progress=on_progress,
+                    resume=resume
+                )
             parsed_results = self._parse_zonemaster_results(raw_results)
-            
-            # Save results to database
-            if parsed_results:
-                await dns_result_crud.create_bulk(
-                    db, 
-                    dns_check.id, 
-                    parsed_results
+            completed_at = datetime.now(timezone.utc)
+            plan = await result_storage.plan_storage(db, domain, profile, parsed_results, exclude_id=check_id)
+            await dns_result_crud.create_bulk(db, check_id, parsed_results, commit=False, returning=False, plan=plan)
+            await result_rollup_crud.add_results(db, [(completed_at, parsed_results)])
+            await dns_check_crud.update_state(
+                db,
+                check_id,
+                status=CheckStatus.COMPLETED.value,
+                progress=100,
+                completed_at=completed_at,
+                **plan.check_values(),
+                **result_storage.encode_raw(raw_results),
+                **result_counters(parsed_results)
+            )
+        except Exception:
+            await db.rollback()
+            raise
+        metrics.check_results.observe(len(parsed_results))
+    
+    async def fail_check(self, db: AsyncSession, check_id: int, error: Exception) -> None:
+        await dns_check_crud.update_state(
+            db,
+            check_id,
+            status=CheckStatus.FAILED.value,
+            error=str(error),
+            completed_at=datetime.now(timezone.utc)
+        )
+    
+    async def run_check_job(
+        self,
+        session_factory: async_sessionmaker,
+        check_id: int,
+        domain: str,
+        profile: str = "default",
+        priority: str = CheckPriority.INTERACTIVE.value
+    ) -> None:
+        """
+        Background worker for a queued check. Uses its own session since the
+        request session is closed once the 202 response has been sent.
+        """
+        async with session_factory() as db:
+            try:
+                await self.execute_check(db, check_id, domain, profile, priority)
+            except Exception as e:
+                await self.fail_check(db, check_id, e)
+    
+    async def _save_batch_outcomes(self, db: AsyncSession, outcomes: List[Dict[str, Any]]) -> None:
+        """Persist a chunk of finished batch checks in one transaction"""
+        finished_at = datetime.now(timezone.utc)
+        rows = []
+        states = []
+        for outcome in outcomes:
+            plan = result_delta.full_plan(outcome["results"])
+            if outcome["status"] == CheckStatus.COMPLETED.value:
+                plan = await result_storage.plan_storage(
+                    db, outcome["domain"], "default", outcome["results"], exclude_id=outcome["id"]
                 )
+            rows.extend(dns_result_crud.result_rows(outcome["id"], outcome["results"], plan))
+            states.append({
+                "id": outcome["id"],
+                "status": outcome["status"],
+                "progress": 100,
+                "error": outcome["error"],
+                "completed_at": finished_at,
+                **plan.check_values(),
+                **result_storage.encode_raw(outcome["raw"]),
+                **result_counters(outcome["results"])
+            })
+        await dns_result_crud.insert_rows(db, rows, returning=False)
+        await result_rollup_crud.add_results(db, [(finished_at, outcome["results"]) for outcome in outcomes])
+        await dns_check_crud.update_many_states(db, states)
+        await db.commit()
+        for outcome in outcomes:
+            if outcome["status"] == CheckStatus.COMPLETED.value:
+                metrics.check_results.observe(len(outcome["results"]))
+    
+    async def _retry_batch_outcomes(
+        self,
+        session_factory: async_sessionmaker,
+        outcomes: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Save a chunk of batch checks again on a fresh session after its save
+        failed, and failing that mark the checks failed, so that none is
+        left queued and the batch still finishes
+        """
+        async with session_factory() as db:
+            try:
+                await self._save_batch_outcomes(db, outcomes)
+                return
+            except Exception as e:
+                await db.rollback()
+                error = f"Failed to save check results: {e}"
+                logger.exception("Failed to save %d batch checks; marking them failed", len(outcomes))
             
-            # Refresh DNS check to get results
-            dns_check_with_results = await dns_check_crud.get(db, dns_check.id)
+            finished_at = datetime.now(timezone.utc)
+            try:
+                await dns_check_crud.update_many_states(
+                    db,
+                    [
+                        {
+                            "id": outcome["id"],
+                            "status": CheckStatus.FAILED.value,
+                            "progress": 100,
+                            "error": error,
+                            "completed_at": finished_at
+                        }
+                        for outcome in outcomes
+                    ]
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                logger.exception("Failed to mark %d batch checks failed", len(outcomes))
+    
+    async def run_batch(
+        self,
+        session_factory: async_sessionmaker,
+        checks: List[Tuple[int, str]]
+    ) -> None:
+        """
+        Fan the queued checks of a batch out to Zonemaster with at most
+        BATCH_CONCURRENCY tests in flight, writing finished checks in chunks
+        of BATCH_COMMIT_SIZE instead of one commit per domain.
+        """
+        semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+        flush_lock = asyncio.Lock()
+        pending: List[Dict[str, Any]] = []
+        
+        async with session_factory() as db:
+            async def flush() -> None:
+                async with flush_lock:
+                    if not pending:
+                        return
+                    outcomes = pending[:]
+                    pending.clear()
+                    try:
+                        await self._save_batch_outcomes(db, outcomes)
+                    except Exception:
+                        await db.rollback()
+                        logger.exception("Failed to save %d batch checks; retrying", len(outcomes))
+                        await self._retry_batch_outcomes(session_factory, outcomes)
             
-            return DNSCheckResponse.model_validate(dns_check_with_results)
+            async def run_one(check_id: int, domain: str) -> None:
+                async with semaphore:
+                    try:
+                        async with self.admission.slot(CheckPriority.BATCH.value, bounded=False):
+                            raw_results = await self._run_zonemaster_test(domain)
+                        outcome = {
+                            "id": check_id,
+                            "domain": domain,
+                            "status": CheckStatus.COMPLETED.value,
+                            "error": None,
+                            "raw": raw_results,
+                            "results": self._parse_zonemaster_results(raw_results)
+                        }
+                    except Exception as e:
+                        outcome = {
+                            "id": check_id,
+                            "domain": domain,
+                            "status": CheckStatus.FAILED.value,
+                            "error": str(e),
+                            "raw": None,
+                            "results": []
+                        }
+                pending.append(outcome)
+                if len(pending) >= settings.BATCH_COMMIT_SIZE:
+                    await flush()
             
-        except httpx.HTTPError as e:
-            # Handle HTTP errors from Zonemaster API
-            raise Exception(f"Failed to connect to Zonemaster API: {str(e)}")
-        except Exception as e:
-            # Handle other errors
-            raise Exception(f"DNS check failed: {str(e)}")
+            await asyncio.gather(*(run_one(check_id, domain) for check_id, domain in checks))
+            await flush()
 
-zonemaster_service = ZonemasterService()
\ No newline at end of file
+zonemaster_service = ZonemasterService()
@@ -0,0 +1,40 @@
+"""
+Run the checks queued in check_jobs (CHECK_QUEUE=worker).
+
+Usage:
+    uv run python -m app.worker
+
+Start as many worker processes as the Zonemaster backends can keep busy,
+on any number of hosts; jobs are leased in the database, so each is run by
+one worker at a time. SIGTERM or SIGINT hands running jobs back to the
+queue, and whichever worker claims them next resumes their tests.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+from app.db import get_session_factory
+from app.services.check_worker import CheckWorker
+from app.services.zonemaster_service import zonemaster_service
+
+logger = logging.getLogger("app.worker")
+
+async def main() -> None:
+    session_factory = get_session_factory()
+    worker = CheckWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    await zonemaster_service.startup()
+    logger.info("Worker %s started", worker.owner)
+    try:
+        await worker.run(session_factory)
+    finally:
+        await zonemaster_service.shutdown()
+        await session_factory.kw["bind"].dispose()
+        logger.info("Worker %s stopped: %s", worker.owner, worker.stats())
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
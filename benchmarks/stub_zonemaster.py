@@ -0,0 +1,167 @@
+"""
+Stub Zonemaster JSON-RPC backend for load tests.
+
+Implements start_domain_test, test_progress, get_test_results and
+version_info with injectable latency, result sizes and error rates, so the
+API can be driven at full speed without a real Zonemaster.
+
+The API's interactive path (POST /checks/) reads the results straight from
+the start_domain_test response, while background jobs and batches expect a
+test id there and poll for progress; pick one with `start_returns`.
+
+Usage:
+    uv run python -m benchmarks.stub_zonemaster --port 9000 --results 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+import uvicorn
+
+class StubZonemaster:
+    def __init__(
+        self,
+        results: int = 100,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        test_duration: float = 0.0,
+        error_rate: float = 0.0,
+        http_error_rate: float = 0.0,
+        start_returns: str = "results",
+        seed: Optional[int] = None
+    ):
+        if start_returns not in ("results", "test_id"):
+            raise ValueError("start_returns must be 'results' or 'test_id'")
+        self.results = results
+        self.latency = latency
+        self.jitter = jitter
+        self.test_duration = test_duration
+        self.error_rate = error_rate
+        self.http_error_rate = http_error_rate
+        self.start_returns = start_returns
+        self._random = random.Random(seed)
+        self._test_ids = itertools.count(1)
+        self._tests: Dict[str, Tuple[float, str]] = {}
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def make_results(self, domain: str) -> List[dict]:
+        levels = ["INFO", "INFO", "INFO", "NOTICE", "WARNING", "ERROR"]
+        return [
+            {
+                "level": levels[i % len(levels)],
+                "module": ["BASIC", "DELEGATION", "NAMESERVER", "DNSSEC"][i % 4],
+                "tag": f"TAG_{i % 40:02d}",
+                "message": f"Check {i} of {domain}: nameserver ns{i % 8}.{domain} answered as expected."
+            }
+            for i in range(self.results)
+        ]
+
+    def _call(self, method: str, params: dict):
+        if method == "version_info":
+            return {"zonemaster_backend": "stub", "zonemaster_engine": "stub"}
+        if method == "start_domain_test":
+            domain = params.get("domain", "example.com")
+            if self.start_returns == "results":
+                return self.make_results(domain)
+            test_id = f"{next(self._test_ids):016x}"
+            self._tests[test_id] = (time.monotonic(), domain)
+            return test_id
+        if method == "test_progress":
+            test = self._tests.get(str(params.get("test_id")))
+            if test is None or self.test_duration <= 0:
+                return 100
+            return min(100, int((time.monotonic() - test[0]) / self.test_duration * 100))
+        if method == "get_test_results":
+            _, domain = self._tests.pop(str(params.get("id")), (0.0, "example.com"))
+            return {"results": self.make_results(domain)}
+        raise LookupError(method)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        request = json.loads(body or b"{}")
+        method = request.get("method", "")
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        status = 200
+        roll = self._random.random()
+        if roll < self.http_error_rate:
+            status, response = 500, {"error": "injected failure"}
+        elif roll < self.http_error_rate + self.error_rate:
+            response = {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": "injected error"}}
+        else:
+            try:
+                response = {"jsonrpc": "2.0", "id": request.get("id"), "result": self._call(method, request.get("params") or {})}
+            except LookupError:
+                response = {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+        if "error" in response:
+            self.errors[method] = self.errors.get(method, 0) + 1
+
+        payload = json.dumps(response).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    def stats(self) -> dict:
+        return {"calls": dict(self.calls), "errors": dict(self.errors)}
+
+def make_server(stub: StubZonemaster, host: str, port: int) -> uvicorn.Server:
+    """A uvicorn server for the stub; run it with `await server.serve()`"""
+    return uvicorn.Server(uvicorn.Config(stub, host=host, port=port, log_level="warning", access_log=False))
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--results", type=int, default=100, help="results per test")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every JSON-RPC call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- seconds around --latency")
+    parser.add_argument("--test-duration", type=float, default=0.0, help="seconds until test_progress reaches 100")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with a JSON-RPC error")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="fraction of calls answered with HTTP 500")
+    parser.add_argument("--start-returns", choices=["results", "test_id"], default="results",
+                        help="what start_domain_test returns (results for POST /checks/, test_id for jobs)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for jitter and errors")
+
+def from_arguments(args: argparse.Namespace) -> StubZonemaster:
+    return StubZonemaster(
+        results=args.results,
+        latency=args.latency,
+        jitter=args.jitter,
+        test_duration=args.test_duration,
+        error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate,
+        start_returns=args.start_returns,
+        seed=args.seed
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    add_arguments(parser)
+    args = parser.parse_args()
+    asyncio.run(make_server(from_arguments(args), args.host, args.port).serve())
@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import pytest
 import httpx
 from httpx import AsyncClient
@@ -5,7 +8,8 @@ from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.main import app
-from app.db import get_db, Base
+from app.core import metrics
+from app.db import get_db, get_session_factory, enable_sqlite_foreign_keys, instrument_engine, Base
 from app.core.config import settings
 
 # Test database URL (in-memory SQLite for testing)
@@ -19,6 +23,8 @@ test_async_engine = create_async_engine(
     },
     poolclass=StaticPool,
 )
+enable_sqlite_foreign_keys(test_async_engine)
+instrument_engine(test_async_engine)
 
 # Create test session factory
 TestAsyncSessionLocal = async_sessionmaker(
@@ -35,6 +41,7 @@ async def override_get_db():
             await session.close()
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_session_factory] = lambda: TestAsyncSessionLocal
 
 @pytest.fixture
 async def setup_database():
@@ -51,6 +58,25 @@ async def async_client():
     async with AsyncClient(app=app, base_url="http://test") as client:
         yield client
 
+@pytest.fixture(autouse=True)
+def reset_zonemaster_service():
+    """Give every test fresh circuit breakers and limiters so state does not leak between tests"""
+    from app.services.admission import AdmissionController, RateLimiter
+    from app.services.backend_pool import BackendPool
+    from app.services.zonemaster_service import zonemaster_service
+    
+    zonemaster_service.backends = BackendPool(
+        settings.zonemaster_api_urls,
+        failure_threshold=settings.ZONEMASTER_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=settings.ZONEMASTER_CIRCUIT_RESET_TIMEOUT
+    )
+    zonemaster_service.admission = AdmissionController(
+        max_concurrent=settings.ZONEMASTER_MAX_CONCURRENT_TESTS,
+        max_queued=settings.ZONEMASTER_MAX_QUEUED_TESTS,
+        queue_timeout=settings.ZONEMASTER_QUEUE_TIMEOUT
+    )
+    zonemaster_service.rate_limiter = RateLimiter(settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_BURST)
+
 @pytest.mark.asyncio
 async def test_create_dns_check_success(async_client: AsyncClient, setup_database, httpx_mock):
     """Test successful DNS check creation with mocked Zonemaster API"""
@@ -291,4 +317,1129 @@ async def test_create_dns_check_invalid_domain(async_client: AsyncClient, setup_
     )
     
     # Should return validation error
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def add_rpc_response(httpx_mock, method: str, params: dict, result):
+    """Mock one Zonemaster JSON-RPC method by matching on the request body"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        match_json={"jsonrpc": "2.0", "method": method, "params": params, "id": 1},
+        json={"jsonrpc": "2.0", "result": result, "id": 1},
+        status_code=200
+    )
+
+@pytest.mark.asyncio
+async def test_create_dns_check_job(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test queued DNS check driven through the Zonemaster job protocol"""
+    add_rpc_response(httpx_mock, "start_domain_test", {"domain": "example.com", "profile": "default"}, "abc123")
+    add_rpc_response(httpx_mock, "test_progress", {"test_id": "abc123"}, 100)
+    add_rpc_response(httpx_mock, "get_test_results", {"id": "abc123", "language": "en"}, {
+        "results": [
+            {
+                "level": "ERROR",
+                "module": "DELEGATION",
+                "tag": "D02",
+                "message": "Delegation is broken."
+            }
+        ]
+    })
+    
+    response = await async_client.post(
+        "/api/v1/checks/jobs",
+        json={"domain": "example.com"}
+    )
+    
+    assert response.status_code == 202
+    response_data = response.json()
+    assert response_data["status"] == "queued"
+    assert response.headers["location"].endswith(f"/checks/{response_data['id']}")
+    
+    # The background job has run by the time the ASGI call returns
+    get_response = await async_client.get(f"/api/v1/checks/{response_data['id']}")
+    check = get_response.json()
+    assert check["status"] == "completed"
+    assert check["progress"] == 100
+    assert len(check["results"]) == 1
+    assert check["results"][0]["level"] == "ERROR"
+
+@pytest.mark.asyncio
+async def test_create_dns_check_job_failure(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test queued DNS check is marked failed when the backend is unavailable"""
+    httpx_mock.add_exception(httpx.ConnectError("Connection failed"))
+    
+    response = await async_client.post(
+        "/api/v1/checks/jobs",
+        json={"domain": "example.com"}
+    )
+    assert response.status_code == 202
+    
+    get_response = await async_client.get(f"/api/v1/checks/{response.json()['id']}")
+    check = get_response.json()
+    assert check["status"] == "failed"
+    assert "Connection failed" in check["error"]
+    assert check["results"] == []
+
+@pytest.mark.asyncio
+async def test_create_dns_check_batch(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test batch checks report per-domain status and aggregate progress"""
+    add_rpc_response(httpx_mock, "start_domain_test", {"domain": "example.com", "profile": "default"}, "abc123")
+    add_rpc_response(httpx_mock, "test_progress", {"test_id": "abc123"}, 100)
+    add_rpc_response(httpx_mock, "get_test_results", {"id": "abc123", "language": "en"}, {
+        "results": [
+            {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."}
+        ]
+    })
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        match_json={
+            "jsonrpc": "2.0",
+            "method": "start_domain_test",
+            "params": {"domain": "broken.example", "profile": "default"},
+            "id": 1
+        },
+        json={"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid domain name"}, "id": 1}
+    )
+    
+    response = await async_client.post(
+        "/api/v1/checks/batch",
+        json={"domains": ["example.com", " broken.example ", "example.com", ""]}
+    )
+    
+    assert response.status_code == 202
+    batch = response.json()
+    assert batch["total"] == 2
+    assert batch["queued"] == 2
+    assert [c["domain"] for c in batch["checks"]] == ["example.com", "broken.example"]
+    
+    get_response = await async_client.get(f"/api/v1/checks/batch/{batch['id']}")
+    batch = get_response.json()
+    assert batch["status"] == "completed"
+    assert batch["progress"] == 100
+    assert batch["completed"] == 1
+    assert batch["failed"] == 1
+    
+    check = (await async_client.get(f"/api/v1/checks/{batch['checks'][0]['id']}")).json()
+    assert len(check["results"]) == 1
+
+@pytest.mark.asyncio
+async def test_batch_checks_finish_when_saving_fails(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """A chunk whose save fails is retried once, then its checks are marked failed rather than left queued"""
+    from app.services.zonemaster_service import zonemaster_service
+    
+    httpx_mock.add_exception(httpx.ConnectError("Connection failed"))
+    save = zonemaster_service._save_batch_outcomes
+    failures = {"left": 1}
+    
+    async def flaky_save(db, outcomes):
+        if failures["left"] > 0:
+            failures["left"] -= 1
+            raise Exception("database is locked")
+        await save(db, outcomes)
+    
+    monkeypatch.setattr(zonemaster_service, "_save_batch_outcomes", flaky_save)
+    batch = (await async_client.post("/api/v1/checks/batch", json={"domains": ["example.com"]})).json()
+    batch = (await async_client.get(f"/api/v1/checks/batch/{batch['id']}")).json()
+    assert (batch["status"], batch["failed"], batch["queued"]) == ("completed", 1, 0)
+    check = (await async_client.get(f"/api/v1/checks/{batch['checks'][0]['id']}")).json()
+    assert "Connection failed" in check["error"]
+    
+    failures["left"] = 2
+    batch = (await async_client.post("/api/v1/checks/batch", json={"domains": ["example.org"]})).json()
+    batch = (await async_client.get(f"/api/v1/checks/batch/{batch['id']}")).json()
+    assert (batch["status"], batch["failed"], batch["queued"]) == ("completed", 1, 0)
+    check = (await async_client.get(f"/api/v1/checks/{batch['checks'][0]['id']}")).json()
+    assert check["error"] == "Failed to save check results: database is locked"
+
+@pytest.mark.asyncio
+async def test_upload_dns_check_batch(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test batch creation from an uploaded domain list"""
+    httpx_mock.add_exception(httpx.ConnectError("Connection failed"))
+    
+    response = await async_client.post(
+        "/api/v1/checks/batch/upload",
+        files={"file": ("domains.csv", b"# customer zones\nexample.com,acme\nexample.org\n\n")}
+    )
+    
+    assert response.status_code == 202
+    assert [c["domain"] for c in response.json()["checks"]] == ["example.com", "example.org"]
+
+@pytest.mark.asyncio
+async def test_get_dns_check_batch_not_found(async_client: AsyncClient, setup_database):
+    """Test getting a non-existent batch"""
+    response = await async_client.get("/api/v1/checks/batch/99999")
+    
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_create_dns_check_max_age_reuses_recent_check(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test a freshness window returns the latest completed check instead of a new run"""
+    from app.services.zonemaster_service import zonemaster_service
+    zonemaster_service.cache.clear()
+    
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": [], "id": 1},
+        status_code=200
+    )
+    
+    first = await async_client.post("/api/v1/checks/", json={"domain": "Example.COM."})
+    second = await async_client.post("/api/v1/checks/?max_age=300", json={"domain": "example.com"})
+    
+    assert first.json()["domain"] == "example.com"
+    assert second.json()["id"] == first.json()["id"]
+    assert len(httpx_mock.get_requests()) == 1
+    
+    # Served from dns_checks when the in-process cache is cold
+    zonemaster_service.cache.clear()
+    third = await async_client.post("/api/v1/checks/?max_age=300", json={"domain": "example.com"})
+    assert third.json()["id"] == first.json()["id"]
+    
+    fresh = await async_client.post("/api/v1/checks/?max_age=0", json={"domain": "example.com"})
+    assert fresh.json()["id"] != first.json()["id"]
+    
+    stats = (await async_client.get("/api/v1/health/stats")).json()["cache"]
+    assert stats["hits"] >= 1
+    assert stats["db_hits"] >= 1
+
+@pytest.mark.asyncio
+async def test_failed_dns_check_leaves_no_rows(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test a failed Zonemaster call does not leave an empty check behind"""
+    httpx_mock.add_exception(httpx.ConnectError("Connection failed"))
+    
+    response = await async_client.post(
+        "/api/v1/checks/",
+        json={"domain": "example.com"}
+    )
+    assert response.status_code == 503
+    
+    list_response = await async_client.get("/api/v1/checks/")
+    assert list_response.json() == []
+
+@pytest.mark.asyncio
+async def test_create_dns_check_response_matches_stored_check(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test the in-memory POST response equals what GET reads back"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={
+            "jsonrpc": "2.0",
+            "result": [
+                {"level": "INFO", "module": "BASIC", "tag": f"B{i:02d}", "message": f"Message {i}."}
+                for i in range(25)
+            ],
+            "id": 1
+        },
+        status_code=200
+    )
+    
+    created = (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()
+    stored = (await async_client.get(f"/api/v1/checks/{created['id']}")).json()
+    
+    assert created["results"] == stored["results"]
+    assert created["status"] == stored["status"] == "completed"
+
+@pytest.mark.asyncio
+async def test_list_dns_checks_cursor_pagination(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test keyset pagination walks every check exactly once, newest first"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": [], "id": 1},
+        status_code=200
+    )
+    
+    for i in range(5):
+        await async_client.post("/api/v1/checks/", json={"domain": f"example{i}.com"})
+    
+    seen = []
+    response = await async_client.get("/api/v1/checks/?limit=2")
+    while True:
+        assert response.status_code == 200
+        seen.extend(check["domain"] for check in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        # A check created mid-walk must not shift the remaining pages
+        if len(seen) == 2:
+            await async_client.post("/api/v1/checks/", json={"domain": "late.example"})
+        response = await async_client.get("/api/v1/checks/", params={"limit": 2, "cursor": cursor})
+    
+    assert seen == [f"example{i}.com" for i in reversed(range(5))]
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_over_server_default_timestamps(async_client: AsyncClient, setup_database):
+    """Test keyset cursors over checks whose created_at came from current_timestamp (whole seconds on SQLite)"""
+    from sqlalchemy import text
+    from app.models import DNSCheck
+    
+    async with TestAsyncSessionLocal() as db:
+        for _ in range(4):
+            await db.execute(
+                text("INSERT INTO dns_checks (domain, status) VALUES ('example.com', 'completed')")
+            )
+        # And one the ORM writes, with microseconds, in the same second
+        db.add(DNSCheck(domain="example.com", status="completed"))
+        await db.commit()
+    
+    for url, order in (("/api/v1/checks/", -1), ("/api/v1/domains/example.com/history", 1)):
+        seen = []
+        response = await async_client.get(url, params={"limit": 2})
+        while True:
+            body = response.json()
+            seen.extend(check["id"] for check in (body["checks"] if isinstance(body, dict) else body))
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None or len(seen) > 5:
+                break
+            response = await async_client.get(url, params={"limit": 2, "cursor": cursor})
+        assert sorted(seen, reverse=order < 0) == seen
+        assert sorted(seen) == [1, 2, 3, 4, 5]
+
+@pytest.mark.asyncio
+async def test_list_dns_checks_filters(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test listing filters by domain and rejects malformed cursors"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": [], "id": 1},
+        status_code=200
+    )
+    
+    for domain in ["example.com", "example.org", "example.com"]:
+        await async_client.post("/api/v1/checks/", json={"domain": domain})
+    
+    response = await async_client.get("/api/v1/checks/?domain=EXAMPLE.com")
+    assert [c["domain"] for c in response.json()] == ["example.com", "example.com"]
+    
+    response = await async_client.get("/api/v1/checks/?created_before=2000-01-01T00:00:00Z")
+    assert response.json() == []
+    
+    response = await async_client.get("/api/v1/checks/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_list_dns_checks_severity_counts(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test listing returns the per-level counters stored with the check"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={
+            "jsonrpc": "2.0",
+            "result": [
+                {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."},
+                {"level": "WARNING", "module": "DNSSEC", "tag": "DS01", "message": "Weak algorithm."},
+                {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame delegation."},
+                {"level": "ERROR", "module": "DELEGATION", "tag": "D02", "message": "Lame delegation."}
+            ],
+            "id": 1
+        },
+        status_code=200
+    )
+    
+    await async_client.post("/api/v1/checks/", json={"domain": "example.com"})
+    
+    check = (await async_client.get("/api/v1/checks/")).json()[0]
+    assert check["results_count"] == 4
+    assert check["info_count"] == 1
+    assert check["warning_count"] == 1
+    assert check["error_count"] == 2
+    assert check["critical_count"] == 0
+
+@pytest.mark.asyncio
+async def test_export_dns_checks_incremental(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test NDJSON/CSV export, min_level filter and resuming from the watermark"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={
+            "jsonrpc": "2.0",
+            "result": [
+                {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."},
+                {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame, \"quoted\"."}
+            ],
+            "id": 1
+        },
+        status_code=200
+    )
+    
+    for domain in ["example.com", "example.org"]:
+        await async_client.post("/api/v1/checks/", json={"domain": domain})
+    
+    response = await async_client.get("/api/v1/checks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(l["domain"], l["level"]) for l in lines] == [
+        ("example.com", "INFO"), ("example.com", "ERROR"),
+        ("example.org", "INFO"), ("example.org", "ERROR")
+    ]
+    watermark = response.headers["x-export-watermark"]
+    etag = response.headers["etag"]
+    
+    response = await async_client.get("/api/v1/checks/export", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    
+    response = await async_client.get("/api/v1/checks/export?format=csv&min_level=warning")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0][:2] == ["check_id", "domain"]
+    assert [row[5] for row in rows[1:]] == ["ERROR", "ERROR"]
+    assert rows[1][8] == 'Lame, "quoted".'
+    
+    await async_client.post("/api/v1/checks/", json={"domain": "example.net"})
+    response = await async_client.get(f"/api/v1/checks/export?after_id={watermark}")
+    assert {json.loads(line)["domain"] for line in response.text.splitlines()} == {"example.net"}
+    
+    response = await async_client.get("/api/v1/checks/export?min_level=LOUD")
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_list_dns_check_results_filters_and_cursor(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test per-check results filtering, cursor paging and omitting results from the check"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={
+            "jsonrpc": "2.0",
+            "result": [
+                {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."},
+                {"level": "WARNING", "module": "DNSSEC", "tag": "DS01", "message": "Weak algorithm."},
+                {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame delegation."},
+                {"level": "CRITICAL", "module": "DELEGATION", "tag": "D02", "message": "No nameservers."}
+            ],
+            "id": 1
+        },
+        status_code=200
+    )
+    
+    check_id = (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()["id"]
+    url = f"/api/v1/checks/{check_id}/results"
+    
+    response = await async_client.get(url, params={"min_level": "error"})
+    assert [r["level"] for r in response.json()] == ["ERROR", "CRITICAL"]
+    response = await async_client.get(url, params=[("level", "INFO"), ("level", "WARNING")])
+    assert [r["tag"] for r in response.json()] == ["B01", "DS01"]
+    response = await async_client.get(url, params={"module": "DELEGATION", "tag": "D02"})
+    assert [r["tag"] for r in response.json()] == ["D02"]
+    
+    first = await async_client.get(url, params={"limit": 3})
+    assert len(first.json()) == 3
+    second = await async_client.get(url, params={"limit": 3, "cursor": first.headers["x-next-cursor"]})
+    assert [r["tag"] for r in second.json()] == ["D02"]
+    assert "x-next-cursor" not in second.headers
+    
+    assert (await async_client.get(url, params={"min_level": "LOUD"})).status_code == 422
+    assert (await async_client.get(url, params={"level": "INFO", "min_level": "INFO"})).status_code == 400
+    assert (await async_client.get("/api/v1/checks/999/results")).status_code == 404
+    
+    check = (await async_client.get(f"/api/v1/checks/{check_id}", params={"include_results": "false"})).json()
+    assert check["results"] == []
+    assert check["results_count"] == 4
+
+@pytest.mark.asyncio
+async def test_get_domain_history_with_trend(async_client: AsyncClient, setup_database):
+    """Test domain history ordering, paging and daily/weekly trend buckets"""
+    from datetime import datetime, timezone
+    from app.models import DNSCheck
+    
+    async with TestAsyncSessionLocal() as db:
+        db.add_all([
+            # Monday 2025-07-07, twice, then Wednesday and the next Monday
+            DNSCheck(domain="example.com", created_at=datetime(2025, 7, 7, 8, tzinfo=timezone.utc), warning_count=1),
+            DNSCheck(domain="example.com", created_at=datetime(2025, 7, 7, 20, tzinfo=timezone.utc), error_count=2),
+            DNSCheck(domain="example.com", created_at=datetime(2025, 7, 9, 12, tzinfo=timezone.utc), error_count=1),
+            DNSCheck(domain="example.com", created_at=datetime(2025, 7, 14, 0, tzinfo=timezone.utc), critical_count=1),
+            DNSCheck(domain="example.org", created_at=datetime(2025, 7, 8, tzinfo=timezone.utc), error_count=5)
+        ])
+        await db.commit()
+    
+    response = await async_client.get("/api/v1/domains/Example.COM./history", params={"limit": 3})
+    assert response.status_code == 200
+    history = response.json()
+    assert history["domain"] == "example.com"
+    assert history["trend"] is None
+    assert [c["error_count"] for c in history["checks"]] == [0, 2, 1]
+    
+    response = await async_client.get(
+        "/api/v1/domains/example.com/history",
+        params={"cursor": response.headers["x-next-cursor"], "trend": "day"}
+    )
+    history = response.json()
+    assert [c["critical_count"] for c in history["checks"]] == [1]
+    assert history["trend"] == [
+        {"period_start": "2025-07-07", "checks": 2, "warning_count": 1, "error_count": 2, "critical_count": 0},
+        {"period_start": "2025-07-09", "checks": 1, "warning_count": 0, "error_count": 1, "critical_count": 0},
+        {"period_start": "2025-07-14", "checks": 1, "warning_count": 0, "error_count": 0, "critical_count": 1}
+    ]
+    
+    response = await async_client.get("/api/v1/domains/example.com/history", params={"trend": "week"})
+    trend = response.json()["trend"]
+    assert [(b["period_start"], b["checks"], b["error_count"]) for b in trend] == [
+        ("2025-07-07", 3, 3),
+        ("2025-07-14", 1, 0)
+    ]
+
+@pytest.mark.asyncio
+async def test_stats_rollups_match_rebuild(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test /stats reads incrementally maintained rollups that agree with a rebuild"""
+    from app.crud.result_rollup import result_rollup_crud
+    
+    def totals(buckets, key):
+        # Summed over time buckets, in case the checks straddle an hour
+        counts = {}
+        for bucket in buckets:
+            counts[bucket[key]] = counts.get(bucket[key], 0) + bucket["count"]
+        return counts
+    
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={
+            "jsonrpc": "2.0",
+            "result": [
+                {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."},
+                {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame."},
+                {"level": "ERROR", "module": "DELEGATION", "tag": "D02", "message": "Lame."}
+            ],
+            "id": 1
+        },
+        status_code=200
+    )
+    for domain in ["example.com", "example.org"]:
+        await async_client.post("/api/v1/checks/", json={"domain": domain})
+    
+    response = await async_client.get("/api/v1/stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["group_by"] == ["level"]
+    assert totals(stats["buckets"], "level") == {"ERROR": 4, "INFO": 2}
+    
+    response = await async_client.get(
+        "/api/v1/stats",
+        params=[("period", "hour"), ("group_by", "tag"), ("group_by", "module"), ("level", "error")]
+    )
+    buckets = response.json()["buckets"]
+    assert all(b["level"] is None and b["module"] == "DELEGATION" for b in buckets)
+    assert totals(buckets, "tag") == {"D01": 2, "D02": 2}
+    
+    async with TestAsyncSessionLocal() as db:
+        await result_rollup_crud.rebuild(db)
+    rebuilt = (await async_client.get("/api/v1/stats", params={"period": "hour"})).json()["buckets"]
+    assert totals(rebuilt, "level") == {"ERROR": 4, "INFO": 2}
+    
+    response = await async_client.get("/api/v1/stats", params={"group_by": "domain"})
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_create_dns_check_fails_over_to_next_backend(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """Test a check is sent to another backend when the least loaded one is down"""
+    from app.services.backend_pool import BackendPool
+    from app.services.zonemaster_service import zonemaster_service
+    
+    zonemaster_service.backends = BackendPool(
+        ["http://zm1:8080/RPC2", "http://zm2:8080/RPC2"],
+        failure_threshold=1,
+        reset_timeout=60
+    )
+    httpx_mock.add_exception(httpx.ConnectError("Connection refused"), url="http://zm1:8080/RPC2")
+    httpx_mock.add_response(
+        method="POST",
+        url="http://zm2:8080/RPC2",
+        json={"jsonrpc": "2.0", "result": [{"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."}], "id": 1}
+    )
+    
+    response = await async_client.post("/api/v1/checks/", json={"domain": "example.com"})
+    assert response.status_code == 201
+    assert response.json()["results_count"] == 1
+    
+    # zm1's circuit is open now, so the next check goes straight to zm2
+    response = await async_client.post("/api/v1/checks/", json={"domain": "example.org"})
+    assert response.status_code == 201
+    
+    backends = (await async_client.get("/api/v1/health/stats")).json()["backends"]
+    assert [(b["circuit"], b["requests"], b["errors"]) for b in backends] == [("open", 1, 1), ("closed", 2, 0)]
+    # URLs and error text are for admins only
+    assert not any("url" in b or "last_error" in b for b in backends)
+    monkeypatch.setattr(settings, "PROFILING_ADMIN_TOKEN", "s3cret")
+    response = await async_client.get("/api/v1/health/stats", headers={"X-Admin-Token": "s3cret"})
+    assert [(b["url"], b["last_error"] is not None) for b in response.json()["backends"]] == [
+        ("http://zm1:8080/RPC2", True),
+        ("http://zm2:8080/RPC2", False)
+    ]
+
+@pytest.mark.asyncio
+async def test_create_dns_check_admission_control(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test 503 with Retry-After when the Zonemaster queue is full, and per-client 429s"""
+    from app.services.admission import AdmissionController, RateLimiter
+    from app.services.zonemaster_service import zonemaster_service
+    
+    # Accepted batches run in the background against an unreachable backend
+    httpx_mock.add_exception(httpx.ConnectError("Connection refused"))
+    
+    zonemaster_service.admission = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=1)
+    async with zonemaster_service.admission.slot():
+        response = await async_client.post("/api/v1/checks/", json={"domain": "example.com"})
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    
+    zonemaster_service.rate_limiter = RateLimiter(rate_per_minute=1, burst=1)
+    batch = "/api/v1/checks/batch"
+    # The rate limit applies before any work is accepted
+    assert (await async_client.post(batch, json={"domains": ["a.example"]}, headers={"X-API-Key": "k1"})).status_code == 202
+    response = await async_client.post(batch, json={"domains": ["b.example"]}, headers={"X-API-Key": "k1"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert (await async_client.post(batch, json={"domains": ["c.example"]}, headers={"X-API-Key": "k2"})).status_code == 202
+    
+    stats = (await async_client.get("/api/v1/health/stats")).json()
+    assert stats["rate_limit"]["limited"] == 1
+
+@pytest.mark.asyncio
+async def test_retention_deletes_old_checks_in_batches(setup_database):
+    """Test retention removes old finished checks and cascades to their results in the database"""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import func, select
+    from app.models import DNSCheck, DNSResult, ResultRollup
+    from app.services.retention import RetentionService
+    
+    now = datetime.now(timezone.utc)
+    old = now - timedelta(days=40)
+    async with TestAsyncSessionLocal() as db:
+        checks = [DNSCheck(domain=f"old{i}.example", created_at=old) for i in range(5)]
+        checks.append(DNSCheck(domain="running.example", created_at=old, status="running"))
+        checks.append(DNSCheck(domain="new.example", created_at=now))
+        db.add_all(checks)
+        await db.flush()
+        db.add_all([
+            DNSResult(dns_check_id=check.id, level="INFO", module="BASIC", tag="B01", message="OK.")
+            for check in checks
+        ])
+        db.add_all([
+            ResultRollup(period="hour", bucket_start=old, level="INFO", module="BASIC", tag="B01", count=5),
+            ResultRollup(period="day", bucket_start=old, level="INFO", module="BASIC", tag="B01", count=5)
+        ])
+        await db.commit()
+    
+    retention = RetentionService()
+    retention.retention_days = 30
+    retention.batch_size = 2
+    summary = await retention.run_once(TestAsyncSessionLocal)
+    assert summary["checks_deleted"] == 5
+    
+    async with TestAsyncSessionLocal() as db:
+        domains = set((await db.execute(select(DNSCheck.domain))).scalars())
+        assert domains == {"running.example", "new.example"}
+        assert (await db.execute(select(func.count()).select_from(DNSResult))).scalar() == 2
+        periods = list((await db.execute(select(ResultRollup.period))).scalars())
+        assert periods == ["day"]
+
+@pytest.mark.asyncio
+async def test_delta_storage_rebuilds_results(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """Test delta-stored checks read back like full ones, across snapshots, exports and retention"""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import func, select, update
+    from app.models import DNSCheck, DNSResult
+    from app.services.retention import RetentionService
+    
+    monkeypatch.setattr(settings, "RESULTS_STORAGE_MODE", "delta")
+    monkeypatch.setattr(settings, "RESULTS_SNAPSHOT_INTERVAL", 3)
+    a = {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."}
+    b = {"level": "NOTICE", "module": "NAMESERVER", "tag": "N01", "message": "Slow."}
+    c = {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame."}
+    d = {"level": "WARNING", "module": "DNSSEC", "tag": "S01", "message": "No DS."}
+    runs = [[a, b, c], [a, b, d], [a, d, b], [a, b, c]]
+    for results in runs:
+        httpx_mock.add_response(
+            method="POST",
+            url=settings.ZONEMASTER_API_URL,
+            json={"jsonrpc": "2.0", "result": results, "id": 1}
+        )
+    
+    created = []
+    for _ in runs:
+        response = await async_client.post("/api/v1/checks/", json={"domain": "example.com"})
+        assert response.status_code == 201
+        created.append(response.json())
+    for check in created:
+        assert (await async_client.get(f"/api/v1/checks/{check['id']}")).json()["results"] == check["results"]
+    # Zonemaster order is kept, whatever rows are reused
+    assert [[r["tag"] for r in check["results"]] for check in created] == [
+        ["B01", "N01", "D01"], ["B01", "N01", "S01"], ["B01", "S01", "N01"], ["B01", "N01", "D01"]
+    ]
+    
+    async with TestAsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(DNSCheck.storage, func.count(DNSResult.id))
+            .outerjoin(DNSResult, DNSResult.dns_check_id == DNSCheck.id)
+            .group_by(DNSCheck.id)
+            .order_by(DNSCheck.id)
+        )
+        # A snapshot, +S01/-D01, N01 moved after S01 (+N01/-N01), then a new snapshot
+        assert [tuple(row) for row in rows] == [("full", 3), ("delta", 2), ("delta", 2), ("full", 3)]
+    
+    third = created[2]["id"]
+    response = await async_client.get(f"/api/v1/checks/{third}/results", params={"min_level": "notice"})
+    assert [r["tag"] for r in response.json()] == ["S01", "N01"]
+    response = await async_client.get(f"/api/v1/checks/{third}/results", params={"limit": 2})
+    response = await async_client.get(
+        f"/api/v1/checks/{third}/results",
+        params={"limit": 2, "cursor": response.headers["x-next-cursor"]}
+    )
+    assert [r["tag"] for r in response.json()] == ["N01"]
+    # The position the cursor is built from stays internal
+    assert set(response.json()[0]) == {"id", "level", "module", "tag", "message"}
+    
+    response = await async_client.get("/api/v1/checks/export", params={"min_level": "warning"})
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["check_id"], row["tag"]) for row in exported] == [
+        (created[0]["id"], "D01"), (created[1]["id"], "S01"), (third, "S01"), (created[3]["id"], "D01")
+    ]
+    
+    # Retention rewrites the second check as a snapshot before deleting the first
+    async with TestAsyncSessionLocal() as db:
+        await db.execute(
+            update(DNSCheck)
+            .where(DNSCheck.id == created[0]["id"])
+            .values(created_at=datetime.now(timezone.utc) - timedelta(days=40))
+        )
+        await db.commit()
+    retention = RetentionService()
+    retention.retention_days = 30
+    assert (await retention.run_once(TestAsyncSessionLocal))["checks_deleted"] == 1
+    
+    # Ids of the rewritten check change; the order does not
+    for check in created[1:]:
+        stored = (await async_client.get(f"/api/v1/checks/{check['id']}")).json()
+        assert [r["tag"] for r in stored["results"]] == [r["tag"] for r in check["results"]]
+
+@pytest.mark.asyncio
+async def test_retention_retries_when_a_delta_is_saved_against_an_expiring_base(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """Test a delta check saved while retention rewrites the dependents of its base is rewritten too"""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import select, update
+    from app.crud import dns_check as dns_check_module
+    from app.crud import result_delta
+    from app.models import DNSCheck
+    from app.services.retention import RetentionService
+    
+    monkeypatch.setattr(settings, "RESULTS_STORAGE_MODE", "delta")
+    a = {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."}
+    b = {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame."}
+    c = {"level": "WARNING", "module": "DNSSEC", "tag": "S01", "message": "No DS."}
+    d = {"level": "NOTICE", "module": "NAMESERVER", "tag": "N01", "message": "Slow."}
+    for results in ([a, b, d], [a, c, d]):
+        httpx_mock.add_response(
+            method="POST",
+            url=settings.ZONEMASTER_API_URL,
+            json={"jsonrpc": "2.0", "result": results, "id": 1}
+        )
+    base = (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()["id"]
+    (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()
+    async with TestAsyncSessionLocal() as db:
+        await db.execute(
+            update(DNSCheck)
+            .where(DNSCheck.id == base)
+            .values(created_at=datetime.now(timezone.utc) - timedelta(days=40))
+        )
+        await db.commit()
+    
+    materialize = result_delta.materialize
+    late = []
+    
+    async def materialize_while_saving(db, check_id):
+        await materialize(db, check_id)
+        if not late:
+            # Another process stores a delta with no changes against the base
+            check = DNSCheck(domain="example.com", status="completed", storage="delta", base_check_id=base)
+            db.add(check)
+            await db.commit()
+            late.append(check.id)
+    
+    monkeypatch.setattr(dns_check_module.result_delta, "materialize", materialize_while_saving)
+    retention = RetentionService()
+    retention.retention_days = 30
+    assert (await retention.run_once(TestAsyncSessionLocal))["checks_deleted"] == 1
+    
+    async with TestAsyncSessionLocal() as db:
+        assert (await db.execute(select(DNSCheck.storage).where(DNSCheck.id == late[0]))).scalar_one() == "full"
+    stored = (await async_client.get(f"/api/v1/checks/{late[0]}")).json()
+    assert [r["tag"] for r in stored["results"]] == ["B01", "D01", "N01"]
+
+@pytest.mark.asyncio
+async def test_raw_storage_keeps_compressed_payload(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """Test raw storage writes no result rows and parses the blob only when results are read"""
+    from sqlalchemy import func, select
+    from app.crud import result_storage
+    from app.models import DNSCheck, DNSResult
+    
+    monkeypatch.setattr(settings, "RESULTS_STORAGE_MODE", "raw")
+    raw = [
+        {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK.", "args": {"ns": "ns1.example.com"}},
+        {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame.", "args": {}}
+    ]
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": raw, "id": 1}
+    )
+    
+    created = (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()
+    assert [(r["id"], r["tag"]) for r in created["results"]] == [(1, "B01"), (2, "D01")]
+    stored = (await async_client.get(f"/api/v1/checks/{created['id']}")).json()
+    assert stored["results"] == created["results"]
+    assert stored["error_count"] == 1
+    
+    response = await async_client.get(f"/api/v1/checks/{created['id']}/results", params={"level": "ERROR"})
+    assert [r["id"] for r in response.json()] == [2]
+    response = await async_client.get("/api/v1/checks/export")
+    assert [json.loads(line)["tag"] for line in response.text.splitlines()] == ["B01", "D01"]
+    
+    async with TestAsyncSessionLocal() as db:
+        assert (await db.execute(select(func.count()).select_from(DNSResult))).scalar() == 0
+        # The full payload, including fields the parser drops, can be read again
+        assert await result_storage.load_raw(db, created["id"]) == raw
+        check = (await db.execute(select(DNSCheck))).scalar_one()
+        assert "raw_results" not in check.__dict__
+        assert check.raw_codec == "zlib"
+
+@pytest.mark.asyncio
+async def test_indexed_storage_filters_rows_and_reads_messages_from_blob(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """Test indexed storage keeps filterable rows without messages and pages them in SQL"""
+    from sqlalchemy import select
+    from app.models import DNSCheck, DNSResult
+    
+    monkeypatch.setattr(settings, "RESULTS_STORAGE_MODE", "indexed")
+    raw = [
+        {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK.", "args": {}},
+        {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame.", "args": {}},
+        {"level": "WARNING", "module": "DNSSEC", "tag": "S01", "message": "No DS.", "args": {}},
+        {"level": "ERROR", "module": "NAMESERVER", "tag": "N01", "message": "Down.", "args": {}}
+    ]
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": raw, "id": 1}
+    )
+    
+    created = (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()
+    assert [r["message"] for r in created["results"]] == ["OK.", "Lame.", "No DS.", "Down."]
+    stored = (await async_client.get(f"/api/v1/checks/{created['id']}")).json()
+    assert stored["results"] == created["results"]
+    
+    async with TestAsyncSessionLocal() as db:
+        assert (await db.execute(select(DNSCheck.storage))).scalar_one() == "indexed"
+        rows = await db.execute(select(DNSResult.position, DNSResult.tag, DNSResult.message).order_by(DNSResult.position))
+        assert [tuple(row) for row in rows] == [(1, "B01", None), (2, "D01", None), (3, "S01", None), (4, "N01", None)]
+    
+    url = f"/api/v1/checks/{created['id']}/results"
+    response = await async_client.get(url, params={"level": "ERROR", "limit": 1})
+    assert [(r["id"], r["message"]) for r in response.json()] == [(created["results"][1]["id"], "Lame.")]
+    response = await async_client.get(
+        url,
+        params={"level": "ERROR", "limit": 1, "cursor": response.headers["x-next-cursor"]}
+    )
+    assert [(r["tag"], r["message"]) for r in response.json()] == [("N01", "Down.")]
+    response = await async_client.get("/api/v1/checks/export", params={"min_level": "warning"})
+    assert [json.loads(line)["message"] for line in response.text.splitlines()] == ["Lame.", "No DS.", "Down."]
+
+@pytest.mark.asyncio
+async def test_get_dns_check_conditional_requests(async_client: AsyncClient, setup_database, httpx_mock):
+    """Test ETag / If-None-Match and Cache-Control on check reads"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": [{"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK."}], "id": 1}
+    )
+    check_id = (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()["id"]
+    
+    response = await async_client.get(f"/api/v1/checks/{check_id}")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == f"public, max-age={settings.HTTP_CACHE_MAX_AGE_FINISHED}"
+    response = await async_client.get(f"/api/v1/checks/{check_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    
+    # Other representations of the same check have their own tags
+    response = await async_client.get(
+        f"/api/v1/checks/{check_id}",
+        params={"include_results": "false"},
+        headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    results_url = f"/api/v1/checks/{check_id}/results"
+    page_etag = (await async_client.get(results_url)).headers["etag"]
+    assert page_etag != etag
+    assert (await async_client.get(results_url, headers={"If-None-Match": page_etag})).status_code == 304
+    
+    response = await async_client.get("/api/v1/checks/")
+    assert response.headers["cache-control"] == f"public, max-age={settings.HTTP_CACHE_MAX_AGE_LIST}"
+    assert (await async_client.get("/api/v1/checks/999")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_fast_json_responses_match_validated_ones(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """Test the fast JSON read path returns the same bodies as the pydantic one"""
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={
+            "jsonrpc": "2.0",
+            "result": [
+                {"level": "INFO", "module": "BASIC", "tag": "B01", "message": "Zone « example.com » OK."},
+                {"level": "ERROR", "module": "DELEGATION", "tag": "D01", "message": "Lame."}
+            ],
+            "id": 1
+        }
+    )
+    check_id = (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()["id"]
+    urls = [
+        f"/api/v1/checks/{check_id}",
+        f"/api/v1/checks/{check_id}?include_results=false",
+        f"/api/v1/checks/{check_id}/results?limit=1",
+        "/api/v1/checks/?limit=1"
+    ]
+    
+    bodies = {}
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", fast)
+        for url in urls:
+            response = await async_client.get(url)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/json"
+            bodies.setdefault(url, []).append((json.loads(response.content), response.headers.get("x-next-cursor")))
+    for url, (validated, fast) in bodies.items():
+        assert fast == validated, url
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """Requests, Zonemaster calls, statements and result counts show up in /metrics"""
+    metrics.registry.reset()
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": [{"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK"}], "id": 1}
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "error": {"code": -32000, "message": "boom"}, "id": 1}
+    )
+    check_id = (await async_client.post("/api/v1/checks/", json={"domain": "example.com"})).json()["id"]
+    assert (await async_client.post("/api/v1/checks/", json={"domain": "example.org"})).status_code == 503
+    assert (await async_client.get(f"/api/v1/checks/{check_id}")).status_code == 200
+    
+    route = "/api/v1/checks/{check_id}"
+    assert metrics.http_request_duration.count("GET", route, "200") == 1
+    assert metrics.db_request_statements.sum(route) >= 1
+    assert metrics.zonemaster_rpc_duration.count("start_domain_test") == 2
+    assert metrics.zonemaster_rpc_errors.value("start_domain_test", "rpc") == 1
+    assert metrics.check_results.count() == 1
+    assert metrics.admission_wait.count("interactive") == 2
+    
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert f'http_request_duration_seconds_count{{method="GET",route="{route}",status="200"}} 1' in response.text
+    assert 'zonemaster_rpc_errors_total{method="start_domain_test",kind="rpc"} 1' in response.text
+    assert 'check_results_bucket{le="10"} 1' in response.text
+    assert "db_query_duration_seconds_count" in response.text
+    assert 'zonemaster_lane_queue_depth{lane="batch"} 0' in response.text
+    assert 'zonemaster_lane_wait_seconds_count{lane="interactive"} 2' in response.text
+    
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    assert (await async_client.get(f"/api/v1/checks/{check_id}")).status_code == 200
+    assert metrics.http_request_duration.count("GET", route, "200") == 1
+    assert (await async_client.get("/metrics")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_metrics_exclude_background_tasks(async_client: AsyncClient, setup_database, httpx_mock):
+    """A 202 is measured up to its response; the queued check it starts is not counted against it"""
+    metrics.registry.reset()
+    add_rpc_response(httpx_mock, "start_domain_test", {"domain": "example.com", "profile": "default"}, "abc123")
+    add_rpc_response(httpx_mock, "test_progress", {"test_id": "abc123"}, 100)
+    add_rpc_response(httpx_mock, "get_test_results", {"id": "abc123", "language": "en"}, {"results": []})
+    
+    queries_before = metrics.db_query_duration.count()
+    response = await async_client.post("/api/v1/checks/jobs", json={"domain": "example.com"})
+    assert response.status_code == 202
+    check = (await async_client.get(f"/api/v1/checks/{response.json()['id']}")).json()
+    assert check["status"] == "completed"
+    
+    route = "/api/v1/checks/jobs"
+    assert metrics.http_request_duration.count("POST", route, "202") == 1
+    assert metrics.zonemaster_rpc_duration.count("get_test_results") == 1
+    # The background job ran several statements more than the request itself
+    request_statements = metrics.db_request_statements.sum(route)
+    job_statements = metrics.db_query_duration.count() - queries_before - metrics.db_request_statements.sum("/api/v1/checks/{check_id}")
+    assert 1 <= request_statements < job_statements
+    assert request_statements <= 2
+
+@pytest.mark.asyncio
+async def test_profiled_request(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """X-Profile with the admin token adds Server-Timing and stores a downloadable profile"""
+    import marshal
+    from app.api.profiling import profile_store
+    
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_ADMIN_TOKEN", "s3cret")
+    profile_store.clear()
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": [{"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK"}], "id": 1},
+        is_reusable=True
+    )
+    
+    plain = await async_client.post("/api/v1/checks/", json={"domain": "example.com"})
+    assert plain.status_code == 201
+    assert "server-timing" not in plain.headers
+    wrong = await async_client.post(
+        "/api/v1/checks/", json={"domain": "example.com"}, headers={"X-Profile": "1", "X-Admin-Token": "nope"}
+    )
+    assert "server-timing" not in wrong.headers
+    
+    response = await async_client.post(
+        "/api/v1/checks/",
+        json={"domain": "example.com"},
+        headers={"X-Profile": "cprofile", "X-Admin-Token": "s3cret"}
+    )
+    assert response.status_code == 201
+    metrics_names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert {"zonemaster", "db", "save", "serialize", "total"} <= set(metrics_names)
+    profile_id = response.headers["x-profile-id"]
+    
+    assert (await async_client.get("/api/v1/admin/profiles")).status_code == 403
+    admin = {"X-Admin-Token": "s3cret"}
+    listing = (await async_client.get("/api/v1/admin/profiles", headers=admin)).json()["profiles"]
+    assert [(p["id"], p["path"], p["status"]) for p in listing] == [(profile_id, "/api/v1/checks/", 201)]
+    
+    download = await async_client.get(f"/api/v1/admin/profiles/{profile_id}", headers=admin)
+    assert download.headers["content-disposition"] == f'attachment; filename="{profile_id}.prof"'
+    assert any(name == "run_check_and_save" for (_, _, name) in marshal.loads(download.content))
+    text = await async_client.get(f"/api/v1/admin/profiles/{profile_id}?format=text", headers=admin)
+    assert "run_check_and_save" in text.text
+    
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", False)
+    assert (await async_client.get("/api/v1/admin/profiles", headers=admin)).status_code == 404
+
+@pytest.mark.asyncio
+async def test_monitored_domains_are_claimed_once_and_rescheduled(async_client: AsyncClient, setup_database, httpx_mock):
+    """Due domains run once, come due again about one interval later, and are never claimed twice"""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import update
+    from app.crud.monitored_domain import monitored_domain_crud
+    from app.models import MonitoredDomain
+    from app.services.monitoring import MonitoringScheduler
+    
+    response = await async_client.post(
+        "/api/v1/monitored-domains", json={"domain": "Example.COM.", "interval_seconds": 3600}
+    )
+    assert response.status_code == 201
+    created = response.json()
+    assert created["domain"] == "example.com"
+    first_run = datetime.fromisoformat(created["next_run_at"].replace("Z", "+00:00"))
+    assert first_run.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc) <= timedelta(seconds=3600)
+    assert (await async_client.post(
+        "/api/v1/monitored-domains", json={"domain": "example.com", "interval_seconds": 3600}
+    )).status_code == 409
+    bulk = await async_client.post(
+        "/api/v1/monitored-domains/bulk",
+        json={"domains": ["example.com", "example.org", "example.net", "example.org"], "interval_seconds": 3600}
+    )
+    assert bulk.json() == {"added": 2, "skipped": 1}
+    assert (await async_client.post(
+        "/api/v1/monitored-domains", json={"domain": "example.com", "interval_seconds": 10}
+    )).status_code == 422
+    
+    # Two of the three are due; example.net is paused
+    now = datetime.now(timezone.utc)
+    async with TestAsyncSessionLocal() as db:
+        await db.execute(update(MonitoredDomain).values(next_run_at=now - timedelta(minutes=1)))
+        await db.commit()
+    net = [d for d in (await async_client.get("/api/v1/monitored-domains")).json() if d["domain"] == "example.net"][0]
+    assert (await async_client.patch(f"/api/v1/monitored-domains/{net['id']}", json={"enabled": False})).json()["enabled"] is False
+    
+    async with TestAsyncSessionLocal() as db:
+        assert [run.domain for run in await monitored_domain_crud.claim_due(db, now, 1)] == ["example.com"]
+    
+    httpx_mock.add_response(method="POST", url=settings.ZONEMASTER_API_URL, json={"jsonrpc": "2.0", "result": "abc", "id": 1})
+    httpx_mock.add_response(method="POST", url=settings.ZONEMASTER_API_URL, json={"jsonrpc": "2.0", "result": 100, "id": 1})
+    httpx_mock.add_response(
+        method="POST",
+        url=settings.ZONEMASTER_API_URL,
+        json={"jsonrpc": "2.0", "result": {"results": [{"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK"}]}, "id": 1}
+    )
+    scheduler = MonitoringScheduler()
+    assert await scheduler.run_once(TestAsyncSessionLocal) == 1
+    await scheduler.wait_idle()
+    assert await scheduler.run_once(TestAsyncSessionLocal) == 0
+    
+    listing = {d["domain"]: d for d in (await async_client.get("/api/v1/monitored-domains")).json()}
+    org = listing["example.org"]
+    assert org["last_check_id"] is not None
+    check = (await async_client.get(f"/api/v1/checks/{org['last_check_id']}")).json()
+    assert (check["domain"], check["status"], check["results_count"]) == ("example.org", "completed", 1)
+    next_run = datetime.fromisoformat(org["next_run_at"].replace("Z", "+00:00")).replace(tzinfo=timezone.utc)
+    delay = (next_run - now).total_seconds()
+    assert 3600 * (1 - settings.MONITOR_JITTER) - 60 <= delay <= 3600 * (1 + settings.MONITOR_JITTER)
+    assert listing["example.net"]["last_check_id"] is None
+    
+    assert (await async_client.delete(f"/api/v1/monitored-domains/{org['id']}")).status_code == 204
+    assert (await async_client.get(f"/api/v1/monitored-domains/{org['id']}")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_worker_queue_resumes_expired_leases(async_client: AsyncClient, setup_database, httpx_mock, monkeypatch):
+    """Queued jobs wait for a worker; an expired lease is claimed again and resumes its test"""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import select, update
+    from app.models import CheckJob, JobStatus
+    from app.services.check_worker import CheckWorker
+    
+    monkeypatch.setattr(settings, "CHECK_QUEUE", "worker")
+    queued = (await async_client.post("/api/v1/checks/jobs", json={"domain": "example.com"})).json()
+    failing = (await async_client.post("/api/v1/checks/jobs", json={"domain": "example.org"})).json()
+    assert (await async_client.get(f"/api/v1/checks/{queued['id']}")).json()["status"] == "queued"
+    
+    # A worker started example.com's test and died; its lease has run out
+    async with TestAsyncSessionLocal() as db:
+        await db.execute(
+            update(CheckJob)
+            .where(CheckJob.check_id == queued["id"])
+            .values(
+                status=JobStatus.LEASED.value,
+                lease_owner="dead",
+                attempts=1,
+                available_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+                test_id="abc123",
+                backend_url=settings.ZONEMASTER_API_URL
+            )
+        )
+        await db.commit()
+    
+    # Only the resumed test is polled; example.org cannot be started
+    add_rpc_response(httpx_mock, "test_progress", {"test_id": "abc123"}, 100)
+    add_rpc_response(httpx_mock, "get_test_results", {"id": "abc123", "language": "en"}, {
+        "results": [{"level": "INFO", "module": "BASIC", "tag": "B01", "message": "OK"}]
+    })
+    httpx_mock.add_response(method="POST", url=settings.ZONEMASTER_API_URL, status_code=503)
+    
+    worker = CheckWorker(owner="w1")
+    # One at a time: the test sessions share a single SQLite connection
+    worker.concurrency = 1
+    for _ in range(2):
+        assert await worker.claim_once(TestAsyncSessionLocal) == 1
+        await worker.wait_idle()
+    assert await worker.claim_once(TestAsyncSessionLocal) == 0
+    
+    check = (await async_client.get(f"/api/v1/checks/{queued['id']}")).json()
+    assert (check["status"], check["results_count"]) == ("completed", 1)
+    assert (await async_client.get(f"/api/v1/checks/{failing['id']}")).json()["status"] == "queued"
+    async with TestAsyncSessionLocal() as db:
+        jobs = {job.check_id: job for job in (await db.execute(select(CheckJob))).scalars()}
+    assert (jobs[queued["id"]].status, jobs[queued["id"]].attempts) == (JobStatus.DONE.value, 2)
+    retry = jobs[failing["id"]]
+    assert (retry.status, retry.attempts, retry.lease_owner) == (JobStatus.QUEUED.value, 1, None)
+    assert "503" in retry.last_error
+    assert retry.available_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+    assert worker.stats()["completed"] == 1 and worker.stats()["retried"] == 1
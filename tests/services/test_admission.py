@@ -0,0 +1,167 @@
+import asyncio
+import pytest
+from app.services.admission import AdmissionController, AdmissionRejected, RateLimiter
+
+@pytest.mark.asyncio
+async def test_bounded_queue_rejects_when_full():
+    controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=5)
+    release = asyncio.Event()
+    
+    async def hold(bounded: bool = True) -> None:
+        async with controller.slot(bounded=bounded):
+            await release.wait()
+    
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert controller.stats()["in_flight"] == 1
+    assert controller.stats()["queued"] == 1
+    
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.slot():
+            pass
+    assert exc_info.value.retry_after >= 1
+    
+    # Background work queues past the bound
+    background = asyncio.create_task(hold(bounded=False))
+    await asyncio.sleep(0)
+    assert controller.stats()["queued"] == 2
+    
+    release.set()
+    await asyncio.gather(holder, waiter, background)
+    stats = controller.stats()
+    assert (stats["admitted"], stats["rejected"], stats["in_flight"], stats["queued"]) == (3, 1, 0, 0)
+
+@pytest.mark.asyncio
+async def test_queue_timeout():
+    controller = AdmissionController(max_concurrent=1, max_queued=10, queue_timeout=0.01)
+    async with controller.slot():
+        with pytest.raises(AdmissionRejected):
+            async with controller.slot():
+                pass
+    assert controller.stats()["timed_out"] == 1
+    assert controller.stats()["queued"] == 0
+
+def test_rate_limiter_token_bucket():
+    limiter = RateLimiter(rate_per_minute=60, burst=2)
+    limiter.acquire("ip:1.2.3.4")
+    limiter.acquire("ip:1.2.3.4")
+    with pytest.raises(AdmissionRejected) as exc_info:
+        limiter.acquire("ip:1.2.3.4")
+    assert exc_info.value.retry_after == 1
+    limiter.acquire("key:other")
+    assert limiter.stats() == {"enabled": True, "clients": 2, "limited": 1}
+    assert not RateLimiter(rate_per_minute=0, burst=10).enabled
+
+@pytest.mark.asyncio
+async def test_priority_lanes_share_slots_by_weight():
+    controller = AdmissionController(
+        max_concurrent=1,
+        max_queued=10,
+        queue_timeout=5,
+        lanes={"interactive": (3, 0), "batch": (1, 0), "background": (1, 0)}
+    )
+    order = []
+    
+    async def run(lane: str) -> None:
+        async with controller.slot(lane, bounded=False):
+            order.append(lane[0])
+    
+    async with controller.slot("background"):
+        # A backlog of batch work queued ahead of interactive checks
+        tasks = [asyncio.create_task(run("batch")) for _ in range(6)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(run("interactive")) for _ in range(6)]
+        await asyncio.sleep(0)
+        lanes = controller.stats()["lanes"]
+        assert (lanes["batch"]["queued"], lanes["interactive"]["queued"]) == (6, 6)
+    await asyncio.gather(*tasks)
+    
+    # Three interactive slots for each batch one while both have waiters
+    assert "".join(order) == "ibiiibiibbbb"
+
+@pytest.mark.asyncio
+async def test_lane_limit_keeps_slots_for_interactive():
+    controller = AdmissionController(
+        max_concurrent=2,
+        max_queued=0,
+        queue_timeout=5,
+        lanes={"interactive": (1, 0), "batch": (1, 1), "background": (1, 1)}
+    )
+    release = asyncio.Event()
+    
+    async def hold(lane: str) -> None:
+        async with controller.slot(lane, bounded=False):
+            await release.wait()
+    
+    batch = [asyncio.create_task(hold("batch")) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert controller.stats()["lanes"]["batch"]["in_flight"] == 1
+    assert controller.stats()["lanes"]["batch"]["queued"] == 2
+    
+    # Admitted at once despite the batch backlog and max_queued=0
+    async with controller.slot("interactive"):
+        assert controller.stats()["in_flight"] == 2
+    
+    release.set()
+    await asyncio.gather(*batch)
+    assert controller.stats()["lanes"]["batch"]["admitted"] == 3
+    assert controller.share("batch") == 0.5
+    with pytest.raises(ValueError):
+        AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=1, lanes={"batch": (0, 1)})
+
+@pytest.mark.asyncio
+async def test_slot_granted_as_timeout_fires_is_not_leaked(monkeypatch):
+    controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=5)
+    release = asyncio.Event()
+    
+    async def hold() -> None:
+        async with controller.slot():
+            await release.wait()
+    
+    async def grant_then_time_out(waiter, timeout):
+        # The holder hands its slot over just as the timeout fires
+        release.set()
+        await waiter
+        raise asyncio.TimeoutError
+    
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    monkeypatch.setattr(asyncio, "wait_for", grant_then_time_out)
+    async with controller.slot():
+        assert controller.stats()["in_flight"] == 1
+    await holder
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["lanes"]["interactive"]["in_flight"], stats["timed_out"]) == (0, 0, 0)
+
+@pytest.mark.asyncio
+async def test_interactive_reserve_holds_against_batch_and_background():
+    controller = AdmissionController(
+        max_concurrent=3,
+        max_queued=0,
+        queue_timeout=5,
+        lanes={"interactive": (1, 0), "batch": (1, 0), "background": (1, 0)},
+        interactive_reserved=1
+    )
+    release = asyncio.Event()
+    
+    async def hold(lane: str) -> None:
+        async with controller.slot(lane, bounded=False):
+            await release.wait()
+    
+    # Neither lane has a limit of its own; together they stop at 2
+    backlog = [asyncio.create_task(hold(lane)) for lane in ("batch", "background") * 3]
+    await asyncio.sleep(0)
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["queued"], stats["interactive_reserved"]) == (2, 4, 1)
+    
+    async with controller.slot("interactive"):
+        assert controller.stats()["in_flight"] == 3
+    
+    release.set()
+    await asyncio.gather(*backlog)
+    assert controller.stats()["in_flight"] == 0
+    assert controller.share() == 2 / 3
+    with pytest.raises(ValueError):
+        AdmissionController(max_concurrent=2, max_queued=1, queue_timeout=1, interactive_reserved=2)
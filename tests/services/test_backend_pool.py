@@ -0,0 +1,83 @@
+import time
+import pytest
+from app.services.backend_pool import BackendPool, CircuitState, NoBackendAvailable
+
+def make_pool(count: int = 2, failure_threshold: int = 3, reset_timeout: float = 30.0) -> BackendPool:
+    return BackendPool(
+        [f"http://zm{i}:8080/RPC2" for i in range(1, count + 1)],
+        failure_threshold=failure_threshold,
+        reset_timeout=reset_timeout
+    )
+
+def test_routes_to_backend_with_fewest_outstanding():
+    pool = make_pool(3)
+    first = pool.acquire()
+    second = pool.acquire()
+    third = pool.acquire()
+    assert len({first.backend.url, second.backend.url, third.backend.url}) == 3
+    
+    pool.release(second)
+    assert pool.acquire().backend is second.backend
+    assert [b["outstanding"] for b in pool.stats()] == [1, 1, 1]
+
+def test_circuit_opens_after_consecutive_failures_and_probes_later():
+    pool = make_pool(1, failure_threshold=2, reset_timeout=30)
+    backend = pool.backends[0]
+    
+    backend.record_failure(0.1, "timeout", timeout=True)
+    backend.record_request(0.1)
+    backend.record_failure(0.1, "timeout", timeout=True)
+    assert backend.state == CircuitState.CLOSED
+    backend.record_failure(0.1, "refused")
+    assert backend.state == CircuitState.OPEN
+    with pytest.raises(NoBackendAvailable):
+        pool.acquire()
+    
+    # After the reset timeout one probe is let through
+    backend.opened_at = time.monotonic() - 31
+    probe = pool.acquire()
+    assert probe.backend.state == CircuitState.HALF_OPEN
+    with pytest.raises(NoBackendAvailable):
+        pool.acquire()
+    probe.backend.record_failure(0.1, "refused")
+    pool.release(probe)
+    assert backend.state == CircuitState.OPEN
+    
+    backend.opened_at = time.monotonic() - 31
+    probe = pool.acquire()
+    probe.backend.record_request(0.05)
+    pool.release(probe)
+    assert backend.state == CircuitState.CLOSED
+    assert backend.stats()["timeouts"] == 2
+    assert backend.stats()["errors"] == 4
+
+def test_only_the_probe_lease_ends_the_probe():
+    pool = make_pool(1, failure_threshold=1, reset_timeout=30)
+    backend = pool.backends[0]
+    test = pool.acquire()
+    backend.record_failure(0.1, "refused")
+    assert backend.state == CircuitState.OPEN
+    
+    backend.opened_at = time.monotonic() - 31
+    probe = pool.acquire()
+    # A test started before the circuit opened ends while the probe is out
+    pool.release(test)
+    with pytest.raises(NoBackendAvailable):
+        pool.acquire()
+    pool.release(pool.acquire_url(backend.url))
+    with pytest.raises(NoBackendAvailable):
+        pool.acquire()
+    
+    pool.release(probe)
+    assert pool.acquire().probe == 2
+
+def test_unhealthy_backends_are_skipped():
+    pool = make_pool(2)
+    pool.backends[0].record_health(False, "health check: refused")
+    assert all(pool.acquire().backend is pool.backends[1] for _ in range(3))
+    
+    pool.backends[1].record_health(False, "health check: refused")
+    with pytest.raises(NoBackendAvailable):
+        pool.acquire()
+    pool.backends[0].record_health(True)
+    assert pool.acquire().backend is pool.backends[0]
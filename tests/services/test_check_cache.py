@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.schemas.dns_check import DNSCheckResponse
+from app.services.check_cache import CheckResultCache
+
+def make_check(id: int, age: int = 0) -> DNSCheckResponse:
+    completed_at = datetime.now(timezone.utc) - timedelta(seconds=age)
+    return DNSCheckResponse(id=id, domain="example.com", created_at=completed_at, completed_at=completed_at)
+
+def test_get_respects_max_age():
+    cache = CheckResultCache(max_entries=10, ttl=3600)
+    cache.put(("example.com", "default"), make_check(1, age=120))
+    
+    assert cache.get(("example.com", "default"), max_age=60) is None
+    assert cache.get(("example.com", "default"), max_age=300).id == 1
+    assert cache.get(("example.org", "default"), max_age=300) is None
+
+def test_ttl_evicts_old_entries():
+    cache = CheckResultCache(max_entries=10, ttl=60)
+    cache.put(("example.com", "default"), make_check(1, age=120))
+    
+    assert cache.get(("example.com", "default"), max_age=300) is None
+    assert cache.stats()["size"] == 0
+
+def test_lru_eviction_and_newer_entry_wins():
+    cache = CheckResultCache(max_entries=2, ttl=3600)
+    cache.put(("a.com", "default"), make_check(1))
+    cache.put(("b.com", "default"), make_check(2))
+    cache.get(("a.com", "default"), max_age=60)
+    cache.put(("c.com", "default"), make_check(3))
+    
+    assert cache.get(("b.com", "default"), max_age=60) is None
+    assert cache.get(("a.com", "default"), max_age=60).id == 1
+    
+    cache.put(("a.com", "default"), make_check(0, age=30))
+    assert cache.get(("a.com", "default"), max_age=60).id == 1
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_runs():
+    cache = CheckResultCache(max_entries=10, ttl=3600)
+    calls = 0
+    release = asyncio.Event()
+    
+    async def run():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return make_check(calls)
+    
+    tasks = [asyncio.create_task(cache.single_flight(("example.com", "default"), run)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    
+    assert calls == 1
+    assert {r.id for r in results} == {1}
+    assert cache.coalesced == 4
+    assert cache.stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_failures():
+    cache = CheckResultCache(max_entries=10, ttl=3600)
+    release = asyncio.Event()
+    
+    async def run():
+        await release.wait()
+        raise RuntimeError("backend down")
+    
+    tasks = [asyncio.create_task(cache.single_flight(("example.com", "default"), run)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    assert all(isinstance(r, RuntimeError) for r in results)
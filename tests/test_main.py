@@ -12,3 +12,12 @@ def test_health():
     response = client.get("/api/v1/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
+
+def test_lifespan_manages_zonemaster_client():
+    from app.services.zonemaster_service import zonemaster_service
+    with TestClient(app):
+        client = zonemaster_service._client
+        assert client is not None
+        assert not client.is_closed
+    assert client.is_closed
+    assert zonemaster_service._client is None